@@ -1,18 +1,12 @@
-from flask import Flask, send_from_directory
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
-from flask_swagger_ui import get_swaggerui_blueprint
 from config import config
+from app.replica import RoutingSession
 import os
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
-migrate = Migrate()
-
-# Swagger UI 配置
-SWAGGER_URL = '/api/docs'  # Swagger UI 访问路径
-API_URL = '/api/openapi.yaml'  # OpenAPI 文档路径
 
 
 def create_app(config_name='default'):
@@ -23,65 +17,95 @@ def create_app(config_name='default'):
     # 初始化扩展
     db.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
+    
+    # 数据库迁移命令只在 flask 命令行中使用，服务进程启动时不导入 Alembic
+    if os.environ.get('FLASK_RUN_FROM_CLI'):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    
+    # 配置数据库连接参数
+    from app.utils.storage import configure_storage
+    configure_storage(app)
+    
+    # GET 请求读只读副本（配置了 REPLICA_BIND 对应的绑定时）
+    from app.replica import replica_router
+    replica_router.init_app(app)
+    
+    # 请求与 SQL 指标
+    from app.utils.metrics import metrics
+    metrics.init_app(app)
+    
+    # 测试和调试模式下逐请求检查 SQL 预算
+    from app.utils.query_budget import query_guard
+    query_guard.init_app(app)
+    
+    # 响应压缩；在指标钩子之前执行，响应大小按压缩后统计
+    from app.utils.compression import compressor
+    compressor.init_app(app)
+    
+    # JSON 编码
+    from app.utils.json_provider import init_json_provider
+    init_json_provider(app)
+    
+    # 初始化密码哈希后端
+    from app.utils.passwords import password_hasher, PasswordHashBusy
+    password_hasher.init_app(app)
+    
+    @app.errorhandler(PasswordHashBusy)
+    def handle_password_hash_busy(error):
+        return jsonify({'success': False, 'message': '系统繁忙，请稍后再试'}), 503
     
     # 配置登录管理
     login_manager.login_view = 'auth.login'
     login_manager.login_message = '请先登录'
+    from app.models.user import user_cache, user_generation
+    user_cache.configure(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+    user_generation.poll_interval = app.config['USER_CACHE_POLL']
+    user_generation.invalidate()
+    
+    # 初始化图书目录响应缓存
+    from app.utils.http_cache import init_response_cache
+    init_response_cache(app)
     
-    # 注册 Swagger UI 蓝图
-    swaggerui_blueprint = get_swaggerui_blueprint(
-        SWAGGER_URL,
-        API_URL,
-        config={
-            'app_name': "图书管理系统 API"
-        }
-    )
-    app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
-    
-    # 提供 OpenAPI 文档 (YAML)
-    @app.route('/api/openapi.yaml')
-    def serve_openapi_yaml():
-        return send_from_directory(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            'openapi.yaml',
-            mimetype='text/yaml'
-        )
-    
-    # 提供 OpenAPI 文档 (JSON)
-    @app.route('/api/openapi.json')
-    def serve_openapi_json():
-        return send_from_directory(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            'openapi.json',
-            mimetype='application/json'
-        )
+    # 变更事件发布/订阅
+    from app.utils.events import change_feed
+    change_feed.init_app(app)
+    
+    # 提供 OpenAPI 文档（首次请求时读入内存并预压缩）和 Swagger UI（首次访问时载入）
+    from app.routes.docs import docs_bp
+    app.register_blueprint(docs_bp, url_prefix='/api')
     
     # 注册蓝图
     from app.routes.auth import auth_bp
     from app.routes.book import book_bp
     from app.routes.borrow import borrow_bp
     from app.routes.user import user_bp
+    from app.routes.stats import stats_bp
+    from app.routes.events import events_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(book_bp, url_prefix='/api/books')
     app.register_blueprint(borrow_bp, url_prefix='/api/borrows')
     app.register_blueprint(user_bp, url_prefix='/api/users')
+    app.register_blueprint(stats_bp, url_prefix='/api/stats')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
+    if app.config['METRICS_ENABLED']:
+        from app.routes.metrics import metrics_bp
+        app.register_blueprint(metrics_bp, url_prefix='/metrics')
+    
+    # 注册 CLI 命令
+    from app.commands import register_commands
+    register_commands(app)
+    
+    # 建表并初始化默认数据；关闭 AUTO_INIT_DB 时由 flask init-db 预先完成，
+    # 进程启动时不访问数据库
+    if app.config['AUTO_INIT_DB']:
+        from app.utils.bootstrap import init_database
+        init_database(app)
     
-    # 创建数据库表
-    with app.app_context():
-        db.create_all()
-        # 初始化默认管理员账户
-        from app.models.user import User
-        if not User.query.filter_by(username='admin').first():
-            admin = User(
-                username='admin',
-                name='管理员',
-                phone='10000000000',
-                role='admin'
-            )
-            admin.set_password('admin123')
-            db.session.add(admin)
-            db.session.commit()
+    # 定时任务；多进程部署时关闭 SCHEDULER_ENABLED，由单独的 flask run-jobs 进程运行
+    if app.config['SCHEDULER_ENABLED']:
+        from app.utils.scheduler import start_background_jobs
+        start_background_jobs(app)
     
     return app
\ No newline at end of file
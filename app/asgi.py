@@ -0,0 +1,203 @@
+import asyncio
+import functools
+import io
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+from flask import current_app, request, session
+from flask_login import current_user
+from werkzeug.exceptions import HTTPException
+from app import create_app
+from app.utils.async_db import async_db
+
+# 端点名 -> 协程视图，ASGI 模式下替代同名的同步视图
+async_views = {}
+
+
+def async_view(blueprint, endpoint):
+    """将协程函数注册为蓝图中某个 GET 接口在 ASGI 模式下的实现
+
+    路由、参数和响应格式与同步视图一致；WSGI 模式（run.py）下不会被调用。
+    """
+    def decorator(func):
+        async_views[f'{blueprint.name}.{endpoint}'] = func
+        return func
+    return decorator
+
+
+def async_login_required(view):
+    """login_required 的协程版本
+
+    先异步读取用户身份写入缓存，Flask-Login 加载用户时直接命中缓存，
+    不在事件循环中执行同步查询。
+    """
+    @wraps(view)
+    async def decorated_function(*args, **kwargs):
+        user_id = session.get('_user_id')
+        if user_id is not None:
+            from app.models.user import preload_user
+            await preload_user(user_id)
+        if not current_app.config.get('LOGIN_DISABLED') and not current_user.is_authenticated:
+            return current_app.login_manager.unauthorized()
+        return await view(*args, **kwargs)
+    return decorated_function
+
+
+class _WsgiInstance(WsgiToAsgiInstance):
+    """在线程池中执行同步 WSGI 请求
+
+    asgiref 默认把所有 WSGI 请求放到同一个线程中依次执行，这里改为
+    使用独立线程池，写接口之间可以并发。
+    """
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        run_wsgi_app = WsgiToAsgiInstance.run_wsgi_app.__wrapped__
+        self.run_wsgi_app = sync_to_async(
+            functools.partial(run_wsgi_app, self), thread_sensitive=False, executor=executor
+        )
+
+    def request_environ(self, scope):
+        """为不带请求体的请求构造 WSGI environ"""
+        self.scope = scope
+        return self.build_environ(scope, io.BytesIO())
+
+
+class AsgiApp:
+    """图书管理系统 ASGI 应用
+
+    已注册协程实现的 GET 接口（图书列表、图书搜索、借阅记录列表）直接在
+    事件循环中处理，数据库读取使用异步驱动，少量进程即可同时等待大量慢查询；
+    其余请求（包括全部写接口）交给同一个 Flask 应用，在线程池中按 WSGI 执行。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config['ASGI_SYNC_WORKERS'], thread_name_prefix='wsgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        instance = _WsgiInstance(self.app, self.executor)
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            try:
+                environ = instance.request_environ(scope)
+            except ValueError:
+                # 重复请求头过多，由 WSGI 路径返回 400
+                environ = None
+            view = self._match(environ) if environ is not None else None
+            if view is not None:
+                await self._dispatch(view, environ, receive, send)
+                return
+        await instance(scope, receive, send)
+
+    def _match(self, environ):
+        """返回请求对应的协程视图，没有时返回 None"""
+        adapter = self.app.create_url_adapter(self.app.request_class(environ))
+        try:
+            endpoint, _ = adapter.match()
+        except HTTPException:
+            return None
+        return async_views.get(endpoint)
+
+    async def _dispatch(self, view, environ, receive, send):
+        """按 Flask full_dispatch_request 的流程执行协程视图
+
+        响应体为异步生成器（事件流）时，先释放请求上下文再逐段发送，
+        长连接期间不占用请求上下文和数据库连接。
+        """
+        app = self.app
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            try:
+                ctx.push()
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await view(**request.view_args)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+            if not hasattr(response.response, '__aiter__'):
+                await self._send_response(response, environ['REQUEST_METHOD'], send)
+                return
+        finally:
+            ctx.pop(error)
+        await self._stream_response(response, receive, send)
+
+    @staticmethod
+    def _response_start(response):
+        return {
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in response.headers.items()
+            ]
+        }
+
+    @staticmethod
+    async def _send_response(response, method, send):
+        await send(AsgiApp._response_start(response))
+        await send({
+            'type': 'http.response.body',
+            'body': b'' if method == 'HEAD' else response.get_data()
+        })
+        response.close()
+
+    @staticmethod
+    async def _stream_response(response, receive, send):
+        """逐段发送异步响应体，客户端断开后停止并关闭生成器"""
+        await send(AsgiApp._response_start(response))
+
+        async def wait_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        body = response.response
+        disconnected = asyncio.ensure_future(wait_disconnect())
+        try:
+            while True:
+                chunk = asyncio.ensure_future(body.__anext__())
+                await asyncio.wait((chunk, disconnected), return_when=asyncio.FIRST_COMPLETED)
+                if not chunk.done():
+                    chunk.cancel()
+                    await asyncio.wait((chunk,))
+                    return
+                try:
+                    data = chunk.result()
+                except StopAsyncIteration:
+                    break
+                await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            await body.aclose()
+            response.close()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(config_name='default'):
+    """ASGI 应用工厂函数"""
+    app = create_app(config_name)
+    async_db.init_app(app)
+    return AsgiApp(app)
@@ -0,0 +1,73 @@
+import click
+
+
+def register_commands(app):
+    """注册 Flask CLI 命令"""
+    
+    @app.cli.command('init-db')
+    @click.option('--admin-password', default='admin123', help='新建默认管理员账户时使用的密码')
+    def init_db(admin_password):
+        """建表并初始化全文索引、统计计数器和默认管理员账户"""
+        from app.utils.bootstrap import init_database
+        init_database(app, admin_password)
+        click.echo('数据库初始化完成')
+    
+    @app.cli.command('reconcile-stats')
+    def reconcile_stats():
+        """按实际数据校准统计计数器"""
+        from app.models.stats import StatCounter
+        drift = StatCounter.reconcile()
+        if drift:
+            for name, delta in drift.items():
+                click.echo(f'{name}: 校准 {delta:+d}')
+        else:
+            click.echo('计数器无偏差')
+    
+    @app.cli.command('sweep-overdue')
+    def sweep_overdue():
+        """标记到期未还的借阅记录"""
+        from app.models.borrow import BorrowRecord
+        count = BorrowRecord.sweep_overdue()
+        click.echo(f'新标记逾期记录 {count} 条')
+    
+    @app.cli.command('sync-replica')
+    def sync_replica():
+        """把主库复制到只读副本（本地以 SQLite 文件充当副本时使用）"""
+        from app.replica import replica_router, sync_sqlite_replica
+        if not replica_router.enabled:
+            raise click.ClickException('未配置只读副本（REPLICA_DATABASE_URL）')
+        sync_sqlite_replica()
+        click.echo('副本已与主库同步')
+    
+    @app.cli.command('archive-borrows')
+    @click.option('--days', type=int, default=None, help='归还超过多少天的记录移入归档表（默认 BORROW_ARCHIVE_AFTER_DAYS）')
+    def archive_borrows(days):
+        """把已归还较久的借阅记录分批移入归档表"""
+        from app.models.borrow import BorrowRecord
+        if days is None:
+            days = app.config['BORROW_ARCHIVE_AFTER_DAYS']
+        count = BorrowRecord.archive_returned(days, app.config['BORROW_ARCHIVE_BATCH_SIZE'])
+        click.echo(f'归档借阅记录 {count} 条')
+    
+    @app.cli.command('purge-tombstones')
+    def purge_tombstones():
+        """清理超过保留天数的图书删除记录"""
+        from app.models.book import BookTombstone
+        count = BookTombstone.purge_expired(app.config['BOOK_TOMBSTONE_RETENTION_DAYS'])
+        click.echo(f'清理删除记录 {count} 条')
+    
+    @app.cli.command('run-jobs')
+    def run_jobs():
+        """在当前进程中运行全部定时任务，直到被中断（多进程部署时只启动一个）"""
+        import threading
+        from app.utils.scheduler import start_background_jobs
+        start_background_jobs(app)
+        jobs = app.extensions.get('periodic_jobs', {})
+        if not jobs:
+            raise click.ClickException('没有启用的定时任务（各任务间隔均为 0）')
+        click.echo(f'定时任务已启动: {", ".join(jobs)}')
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            for stop in jobs.values():
+                stop.set()
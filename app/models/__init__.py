@@ -1,5 +1,6 @@
 from app.models.user import User
-from app.models.book import Book
+from app.models.book import Book, BookTombstone
 from app.models.borrow import BorrowRecord
+from app.models.stats import StatCounter
 
-__all__ = ['User', 'Book', 'BorrowRecord']
\ No newline at end of file
+__all__ = ['User', 'Book', 'BookTombstone', 'BorrowRecord', 'StatCounter']
\ No newline at end of file
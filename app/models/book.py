@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from app import db
 
 
@@ -12,8 +12,8 @@ class Book(db.Model):
     isbn = db.Column(db.String(20), unique=True, nullable=False, index=True)
     quantity = db.Column(db.Integer, default=1)  # 总数量
     available = db.Column(db.Integer, default=1)  # 可借数量
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # 关联借阅记录
     borrow_records = db.relationship('BorrowRecord', backref='book', lazy='dynamic')
@@ -22,33 +22,91 @@ class Book(db.Model):
         """判断是否可借"""
         return self.available > 0
     
+    def _update_stock(self, condition, **values):
+        """按条件原子更新库存，返回是否更新成功"""
+        result = db.session.execute(
+            db.update(Book)
+            .where(Book.id == self.id, condition)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        # 库存以数据库为准，下次访问时重新加载
+        db.session.expire(self, ['quantity', 'available', 'updated_at'])
+        return result.rowcount == 1
+    
     def borrow_one(self):
-        """借出一本"""
-        if self.available > 0:
-            self.available -= 1
-            return True
-        return False
+        """借出一本（仅在库存大于 0 时扣减）"""
+        return self._update_stock(Book.available > 0, available=Book.available - 1)
     
     def return_one(self):
-        """归还一本"""
-        if self.available < self.quantity:
-            self.available += 1
-            return True
-        return False
-    
-    def to_dict(self):
-        """转换为字典"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'author': self.author,
-            'isbn': self.isbn,
-            'quantity': self.quantity,
-            'available': self.available,
-            'is_available': self.is_available(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        """归还一本（可借数量不超过总数量）"""
+        return self._update_stock(Book.available < Book.quantity, available=Book.available + 1)
+    
+    def set_quantity(self, quantity):
+        """调整总数量，可借数量随之增减，不能少于已借出数量
+
+        增减量按数据库中的当前值计算，不使用本次请求读到的 quantity，
+        与并发借还同时提交时库存不会被覆盖。
+        """
+        delta = quantity - Book.quantity
+        return self._update_stock(
+            Book.available + delta >= 0,
+            quantity=quantity,
+            available=Book.available + delta
+        )
+    
+    # 输出字段 -> (依赖的列, 取值函数)，fields 参数可从中选择
+    FIELDS = {
+        'id': (('id',), lambda book: book.id),
+        'title': (('title',), lambda book: book.title),
+        'author': (('author',), lambda book: book.author),
+        'isbn': (('isbn',), lambda book: book.isbn),
+        'quantity': (('quantity',), lambda book: book.quantity),
+        'available': (('available',), lambda book: book.available),
+        'is_available': (('available',), lambda book: book.is_available()),
+        'created_at': (('created_at',), lambda book: book.created_at),
+        'updated_at': (('updated_at',), lambda book: book.updated_at)
+    }
+    
+    # 变更事件流中库存事件（inventory）输出的字段
+    INVENTORY_FIELDS = ('id', 'quantity', 'available', 'is_available')
+    
+    @classmethod
+    def inventory(cls, data):
+        """从 to_dict 的输出中取出库存字段"""
+        return {name: data[name] for name in cls.INVENTORY_FIELDS}
+    
+    def to_dict(self, fields=None):
+        """转换为字典，fields 为需要输出的字段（默认全部）"""
+        return {name: self.FIELDS[name][1](self) for name in fields or self.FIELDS}
+    
+    def __repr__(self):
+        return f'<Book {self.title}>'
+
+
+class BookTombstone(db.Model):
+    """已删除图书的记录，供增量同步接口通知客户端删除本地缓存"""
+    __tablename__ = 'book_tombstones'
+    
+    book_id = db.Column(db.Integer, primary_key=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    @classmethod
+    def record(cls, book_id):
+        """在当前事务中记录图书删除；ID 被新图书复用后再次删除时更新删除时间"""
+        db.session.merge(cls(book_id=book_id, deleted_at=datetime.utcnow()))
+    
+    @classmethod
+    def purge_expired(cls, retention_days):
+        """删除超过保留天数的记录，返回删除的数量"""
+        before = datetime.utcnow() - timedelta(days=retention_days)
+        result = db.session.execute(
+            db.delete(cls)
+            .where(cls.deleted_at < before)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
     
     def __repr__(self):
-        return f'<Book {self.title}>'
\ No newline at end of file
+        return f'<BookTombstone {self.book_id}>'
@@ -5,14 +5,28 @@ from app import db
 class BorrowRecord(db.Model):
     """借阅记录模型"""
     __tablename__ = 'borrow_records'
+    __table_args__ = (
+        # 逾期查询：status = 'borrowed' AND due_date < now ORDER BY due_date
+        db.Index('ix_borrow_records_status_due_date', 'status', 'due_date'),
+        # 某用户的未归还记录、是否已借某书：user_id = ? AND status = ? [AND book_id = ?]
+        db.Index('ix_borrow_records_user_status_book', 'user_id', 'status', 'book_id'),
+        # 同一用户同一本书只能有一条未归还记录（部分唯一索引，仅 SQLite/PostgreSQL 创建）
+        db.Index(
+            'uq_borrow_records_open_loan', 'user_id', 'book_id',
+            unique=True,
+            sqlite_where=db.text("status = 'borrowed'"),
+            postgresql_where=db.text("status = 'borrowed'")
+        ).ddl_if(dialect=('sqlite', 'postgresql')),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # 由上面的复合索引覆盖
     book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False, index=True)
-    borrow_date = db.Column(db.DateTime, default=datetime.utcnow)
+    borrow_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     due_date = db.Column(db.DateTime, nullable=False)
     return_date = db.Column(db.DateTime, nullable=True)
     status = db.Column(db.String(10), default='borrowed')  # borrowed 或 returned
+    overdue = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())  # 由逾期扫描任务标记
     
     def __init__(self, **kwargs):
         super(BorrowRecord, self).__init__(**kwargs)
@@ -20,31 +34,175 @@ class BorrowRecord(db.Model):
         if not self.due_date:
             self.due_date = datetime.utcnow() + timedelta(days=30)
     
+    @classmethod
+    def query_with_relations(cls):
+        """预加载用户和图书的查询，避免序列化时逐行懒加载"""
+        return cls.query.options(
+            db.selectinload(cls.user),
+            db.selectinload(cls.book)
+        )
+    
+    @classmethod
+    def has_open_loan(cls, user_id, book_id):
+        """用户是否已借阅该书且未归还（只需读取复合索引）"""
+        return db.session.query(
+            db.exists().where(cls.user_id == user_id, cls.status == 'borrowed', cls.book_id == book_id)
+        ).scalar()
+    
+    @classmethod
+    def has_open_loans(cls, user_id):
+        """用户是否有未归还的借阅记录（只需读取复合索引）"""
+        return db.session.query(
+            db.exists().where(cls.user_id == user_id, cls.status == 'borrowed')
+        ).scalar()
+    
+    @classmethod
+    def with_archive(cls):
+        """合并归档表的只读查询实体（UNION ALL），用法与 BorrowRecord 相同"""
+        names = [column.name for column in cls.__table__.columns]
+        history = db.union_all(
+            db.select(*[cls.__table__.c[name] for name in names]),
+            db.select(*[borrow_records_archive.c[name] for name in names])
+        ).subquery('borrow_history')
+        return db.aliased(cls, history)
+    
+    @classmethod
+    def archive_returned(cls, after_days, batch_size=1000):
+        """把归还超过 after_days 天的记录分批移入归档表，返回移动的数量
+
+        每批在一个事务中复制并删除，写锁只持有一批的时间。ID 最大的记录始终
+        保留在热表中，以免 SQLite 复用 ID 与归档记录冲突。
+        """
+        before = datetime.utcnow() - timedelta(days=after_days)
+        hot = cls.__table__
+        names = [column.name for column in hot.columns]
+        moved = 0
+        while True:
+            ids = db.session.execute(
+                db.select(cls.id)
+                .where(
+                    cls.status == 'returned',
+                    cls.return_date < before,
+                    cls.id < db.select(db.func.max(cls.id)).scalar_subquery()
+                )
+                .order_by(cls.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return moved
+            db.session.execute(
+                borrow_records_archive.insert().from_select(
+                    names, db.select(*[hot.c[name] for name in names]).where(hot.c.id.in_(ids))
+                )
+            )
+            db.session.execute(hot.delete().where(hot.c.id.in_(ids)))
+            db.session.commit()
+            moved += len(ids)
+    
+    @classmethod
+    def sweep_overdue(cls, now=None):
+        """标记到期未还的记录并更新逾期计数，返回本次新标记的数量"""
+        from app.models.stats import StatCounter
+        result = db.session.execute(
+            db.update(cls)
+            .where(
+                cls.status == 'borrowed',
+                cls.due_date < (now or datetime.utcnow()),
+                cls.overdue.is_(False)
+            )
+            .values(overdue=True)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            StatCounter.increment(StatCounter.OVERDUE_BORROWS, result.rowcount)
+        db.session.commit()
+        return result.rowcount
+    
     def is_overdue(self):
         """判断是否逾期"""
         if self.status == 'returned':
             return False
-        return datetime.utcnow() > self.due_date
+        return self.overdue or datetime.utcnow() > self.due_date
     
     def return_book(self):
-        """归还图书"""
-        self.return_date = datetime.utcnow()
-        self.status = 'returned'
-    
-    def to_dict(self):
-        """转换为字典"""
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'book_id': self.book_id,
-            'user': self.user.to_dict() if self.user else None,
-            'book': self.book.to_dict() if self.book else None,
-            'borrow_date': self.borrow_date.isoformat() if self.borrow_date else None,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'return_date': self.return_date.isoformat() if self.return_date else None,
-            'status': self.status,
-            'is_overdue': self.is_overdue()
-        }
+        """归还图书（仅在记录未归还时原子更新），返回是否归还成功
+
+        并发重复归还同一条记录时只有一个请求成功，调用方据此决定是否恢复库存和计数。
+        """
+        result = db.session.execute(
+            db.update(BorrowRecord)
+            .where(BorrowRecord.id == self.id, BorrowRecord.status == 'borrowed')
+            .values(status='returned', return_date=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        # 状态以数据库为准，下次访问时重新加载
+        db.session.expire(self, ['status', 'return_date'])
+        return result.rowcount == 1
+    
+    @classmethod
+    def clear_overdue(cls, records):
+        """清除已归还记录的逾期标记，返回实际清除的数量，供调用方扣减逾期计数
+
+        须在 return_book 之后、同一事务内调用：记录已不是 borrowed，逾期扫描
+        不会再标记它，这里清除的数量与扫描累加到计数里的数量一致，不依赖
+        归还前读到的 overdue 值。
+        """
+        if not records:
+            return 0
+        result = db.session.execute(
+            db.update(cls)
+            .where(
+                cls.id.in_([record.id for record in records]),
+                cls.status == 'returned',
+                cls.overdue.is_(True)
+            )
+            .values(overdue=False)
+            .execution_options(synchronize_session=False)
+        )
+        for record in records:
+            db.session.expire(record, ['overdue'])
+        return result.rowcount
+    
+    # 输出字段 -> (依赖的列, 取值函数)，fields 参数可从中选择；关联的 user、book 通过 expand 展开
+    FIELDS = {
+        'id': (('id',), lambda record: record.id),
+        'user_id': (('user_id',), lambda record: record.user_id),
+        'book_id': (('book_id',), lambda record: record.book_id),
+        'borrow_date': (('borrow_date',), lambda record: record.borrow_date),
+        'due_date': (('due_date',), lambda record: record.due_date),
+        'return_date': (('return_date',), lambda record: record.return_date),
+        'status': (('status',), lambda record: record.status),
+        'is_overdue': (('status', 'overdue', 'due_date'), lambda record: record.is_overdue())
+    }
+    
+    def to_dict(self, fields=None, expand=None):
+        """转换为字典
+
+        fields 为需要输出的字段（默认全部）；expand 为 {关联名: 关联对象的字段}，
+        默认展开完整的 user 和 book。
+        """
+        data = {name: self.FIELDS[name][1](self) for name in fields or self.FIELDS}
+        if expand is None:
+            expand = {'user': None, 'book': None}
+        for relation, relation_fields in expand.items():
+            related = getattr(self, relation)
+            data[relation] = related.to_dict(relation_fields) if related else None
+        return data
     
     def __repr__(self):
-        return f'<BorrowRecord {self.id}>'
\ No newline at end of file
+        return f'<BorrowRecord {self.id}>'
+
+
+# 已归还较久的借阅记录（冷数据），结构与 borrow_records 相同，由 archive_returned 分批移入；
+# 默认只查询热表，需要历史记录时通过 BorrowRecord.with_archive() 合并查询
+borrow_records_archive = db.Table(
+    'borrow_records_archive',
+    db.Column('id', db.Integer, primary_key=True),
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), nullable=False, index=True),
+    db.Column('book_id', db.Integer, db.ForeignKey('books.id'), nullable=False, index=True),
+    db.Column('borrow_date', db.DateTime, index=True),
+    db.Column('due_date', db.DateTime, nullable=False),
+    db.Column('return_date', db.DateTime, nullable=True),
+    db.Column('status', db.String(10)),
+    db.Column('overdue', db.Boolean, nullable=False, server_default=db.false()),
+)
@@ -0,0 +1,93 @@
+from datetime import datetime
+from app import db
+from app.models.book import Book
+from app.models.borrow import BorrowRecord
+from app.models.user import User
+
+
+class StatCounter(db.Model):
+    """统计计数器模型"""
+    __tablename__ = 'stat_counters'
+    
+    BOOKS = 'books'  # 图书种数
+    USERS = 'users'  # 用户数
+    BORROWS = 'borrows'  # 借阅记录数
+    ACTIVE_BORROWS = 'active_borrows'  # 未归还记录数
+    OVERDUE_BORROWS = 'overdue_borrows'  # 已标记逾期的未归还记录数
+    CATALOGUE_GENERATION = 'catalogue_generation'  # 图书目录版本号，目录或库存变化时递增
+    USER_GENERATION = 'user_generation'  # 用户身份版本号，修改、删除用户或修改密码时递增
+    
+    name = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @classmethod
+    def increment(cls, name, delta=1):
+        """在当前事务中原子地调整计数器，随业务数据一同提交"""
+        result = db.session.execute(
+            db.update(cls)
+            .where(cls.name == name)
+            .values(value=cls.value + delta, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            db.session.add(cls(name=name, value=delta))
+    
+    @classmethod
+    def value_of(cls, name):
+        """读取单个计数器，不存在时为 0"""
+        value = db.session.query(cls.value).filter(cls.name == name).scalar()
+        return value or 0
+    
+    @classmethod
+    def snapshot(cls):
+        """读取全部计数器"""
+        return {counter.name: counter.value for counter in cls.query.all()}
+    
+    @classmethod
+    def count_all(cls):
+        """按实际数据统计各项总数的子查询（借阅记录数包括归档记录）"""
+        history = BorrowRecord.with_archive()
+        return {
+            cls.BOOKS: db.select(db.func.count(Book.id)).scalar_subquery(),
+            cls.USERS: db.select(db.func.count(User.id)).scalar_subquery(),
+            cls.BORROWS: db.select(db.func.count(history.id)).scalar_subquery(),
+            cls.ACTIVE_BORROWS: db.select(db.func.count(BorrowRecord.id)).where(
+                BorrowRecord.status == 'borrowed'
+            ).scalar_subquery(),
+            cls.OVERDUE_BORROWS: db.select(db.func.count(BorrowRecord.id)).where(
+                BorrowRecord.status == 'borrowed',
+                BorrowRecord.overdue.is_(True)
+            ).scalar_subquery(),
+        }
+    
+    @classmethod
+    def reconcile(cls):
+        """按实际数据校准计数器和用户在借数量，返回校准前后不一致的项
+
+        每个计数器用一条 UPDATE ... SET value = (SELECT count(*) ...) 在数据库中写入，
+        统计和写入在同一条语句内完成，不会覆盖并发提交的 increment。
+        偏差为校准前后读取的计数器之差，期间有并发更新时仅供参考。
+        """
+        before = cls.snapshot()
+        drift = {}
+        for name, actual in cls.count_all().items():
+            if name not in before:
+                db.session.add(cls(name=name, value=actual))
+                continue
+            result = db.session.execute(
+                db.update(cls)
+                .where(cls.name == name, cls.value != actual)
+                .values(value=actual, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                drift[name] = cls.value_of(name) - before[name]
+        # 各用户的在借数量，偏差项为校准的用户数
+        corrected = User.reconcile_active_loans()
+        if corrected:
+            drift['user_active_loans'] = corrected
+        db.session.commit()
+        return drift
+    
+    def __repr__(self):
+        return f'<StatCounter {self.name}={self.value}>'
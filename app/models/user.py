@@ -1,7 +1,14 @@
+import threading
+import time
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy.orm import make_transient_to_detached
 from app import db, login_manager
+from app.utils.cache import TTLCache
+from app.utils.passwords import password_hasher
+
+# 已登录用户身份缓存：user_id -> 身份字段（不含密码哈希）
+user_cache = TTLCache()
 
 
 class User(UserMixin, db.Model):
@@ -14,39 +21,201 @@ class User(UserMixin, db.Model):
     name = db.Column(db.String(50), nullable=False)
     phone = db.Column(db.String(20), nullable=True)
     role = db.Column(db.String(10), default='user')  # admin 或 user
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # 未归还的借阅数，随借阅、归还在同一事务中维护
+    active_loans = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # 关联借阅记录
     borrow_records = db.relationship('BorrowRecord', backref='user', lazy='dynamic')
     
     def set_password(self, password):
         """设置密码哈希"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """验证密码"""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def rehash_password_if_needed(self, password):
+        """哈希参数变更后，在验证通过时按新参数重新哈希，返回是否已更新"""
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        self.set_password(password)
+        password_hasher.record_rehash()
+        return True
     
     def is_admin(self):
         """判断是否为管理员"""
         return self.role == 'admin'
     
-    def to_dict(self):
-        """转换为字典"""
-        return {
-            'id': self.id,
-            'username': self.username,
-            'name': self.name,
-            'phone': self.phone,
-            'role': self.role,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    @classmethod
+    def adjust_active_loans(cls, user_id, delta, limit=0):
+        """在当前事务中原子调整在借数量，返回是否调整成功
+
+        delta 为正且 limit 大于 0 时，调整后超过 limit 则不调整（借阅数量上限）；
+        delta 为负时，调整后小于 0 则不调整，计数已有偏差时由调用方校准。
+        """
+        condition = cls.id == user_id
+        if delta > 0 and limit > 0:
+            condition = db.and_(condition, cls.active_loans + delta <= limit)
+        elif delta < 0:
+            condition = db.and_(condition, cls.active_loans + delta >= 0)
+        result = db.session.execute(
+            db.update(cls)
+            .where(condition)
+            .values(active_loans=cls.active_loans + delta)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+    
+    @classmethod
+    def reconcile_active_loans(cls, user_id=None):
+        """按实际未归还记录校准在借数量（默认所有用户），返回校准的用户数（不提交）"""
+        from app.models.borrow import BorrowRecord
+        actual = (
+            db.select(db.func.count(BorrowRecord.id))
+            .where(BorrowRecord.user_id == cls.id, BorrowRecord.status == 'borrowed')
+            .scalar_subquery()
+        )
+        condition = cls.active_loans != actual
+        if user_id is not None:
+            condition = db.and_(cls.id == user_id, condition)
+        result = db.session.execute(
+            db.update(cls)
+            .where(condition)
+            .values(active_loans=actual)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
+    # 输出字段 -> (依赖的列, 取值函数)，fields 参数可从中选择；不含密码哈希
+    FIELDS = {
+        'id': (('id',), lambda user: user.id),
+        'username': (('username',), lambda user: user.username),
+        'name': (('name',), lambda user: user.name),
+        'phone': (('phone',), lambda user: user.phone),
+        'role': (('role',), lambda user: user.role),
+        'created_at': (('created_at',), lambda user: user.created_at),
+        'active_loans': (('active_loans',), lambda user: user.active_loans)
+    }
+    
+    def to_dict(self, fields=None):
+        """转换为字典，fields 为需要输出的字段（默认全部）"""
+        return {name: self.FIELDS[name][1](self) for name in fields or self.FIELDS}
     
     def __repr__(self):
         return f'<User {self.username}>'
 
 
+# 缓存的身份字段，用于 login_required 和 is_admin() 判断
+_CACHED_FIELDS = ('id', 'username', 'name', 'phone', 'role', 'created_at')
+
+
+class UserGeneration:
+    """用户身份版本号
+
+    版本号保存在 stat_counters 表中，修改用户、删除用户和修改密码时在同一事务内
+    递增，多进程共享。各进程最多每 poll_interval 秒随用户查询一起回表读取一次，
+    发现版本号增大（其他进程修改过用户）时清空本进程的身份缓存。
+    """
+
+    def __init__(self):
+        self.poll_interval = 1.0
+        self._lock = threading.Lock()
+        self._value = None
+        self._checked_at = 0.0
+
+    def due(self):
+        """距上次回表是否已超过 poll_interval 秒"""
+        with self._lock:
+            return time.monotonic() - self._checked_at >= self.poll_interval
+
+    def column(self):
+        """版本号的标量子查询，与用户查询合并为一条语句"""
+        from app.models.stats import StatCounter
+        return db.func.coalesce(
+            db.select(StatCounter.value)
+            .where(StatCounter.name == StatCounter.USER_GENERATION)
+            .scalar_subquery(),
+            0
+        )
+
+    def observe(self, value, checked_at):
+        """记录回表读到的版本号，比已知的版本号大时清空身份缓存"""
+        with self._lock:
+            changed = self._value is not None and value > self._value
+            if self._value is None or value > self._value:
+                self._value = value
+            self._checked_at = max(self._checked_at, checked_at)
+        if changed:
+            user_cache.clear()
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._checked_at = 0.0
+
+    def bump(self):
+        """在当前事务中递增版本号"""
+        from app.models.stats import StatCounter
+        StatCounter.increment(StatCounter.USER_GENERATION)
+
+
+user_generation = UserGeneration()
+
+
+def invalidate_user_cache(user_id):
+    """用户信息、角色或密码变更提交后清除本进程的身份缓存
+
+    其他进程由 user_generation 在 USER_CACHE_POLL 秒内发现变更，调用方需在
+    同一事务中调用 user_generation.bump()。
+    """
+    user_cache.delete(user_id)
+
+
+def _select_user(user_id):
+    """按主键查询用户并同时读取身份版本号"""
+    return db.select(User, user_generation.column()).where(User.id == user_id)
+
+
+def _cache_user(user, generation, checked_at):
+    user_generation.observe(generation, checked_at)
+    user_cache.set(user.id, {field: getattr(user, field) for field in _CACHED_FIELDS})
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    """Flask-Login 用户加载回调"""
-    return User.query.get(int(user_id))
\ No newline at end of file
+    """Flask-Login 用户加载回调（优先读取进程内身份缓存）"""
+    user_id = int(user_id)
+    
+    # 需要检查版本号时不使用缓存，随用户一起回表
+    values = None if user_generation.due() else user_cache.get(user_id)
+    if values is not None:
+        # 以缓存字段重建对象并挂到当前会话，未缓存的字段在访问时再加载
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
+    checked_at = time.monotonic()
+    row = db.session.execute(_select_user(user_id)).first()
+    if row is None:
+        return None
+    _cache_user(*row, checked_at)
+    return row[0]
+
+
+async def preload_user(user_id):
+    """异步读取用户身份并写入缓存（ASGI 读接口使用）
+
+    随后 Flask-Login 调用 load_user 时直接命中缓存，不在事件循环中执行同步查询。
+    """
+    user_id = int(user_id)
+    if not user_cache.enabled or (user_id in user_cache and not user_generation.due()):
+        return
+    
+    from app.utils.async_db import async_db
+    checked_at = time.monotonic()
+    async with async_db.session() as session:
+        row = (await session.execute(_select_user(user_id))).first()
+    if row is not None:
+        _cache_user(*row, checked_at)
\ No newline at end of file
@@ -0,0 +1,95 @@
+import time
+from flask import g, request, session, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+# 会话中记录“此时间之前读主库”的键（时间戳，秒）
+_STICKY_KEY = '_primary_until'
+
+
+def replica_bind():
+    """当前请求读取的副本绑定名，读主库时为 None"""
+    return g.get('replica_bind') if has_request_context() else None
+
+
+class RoutingSession(Session):
+    """按请求选择主库或只读副本的会话
+
+    被 ReplicaRouter 标记为读副本的请求中，查询发往副本；flush 以及
+    INSERT/UPDATE/DELETE 语句始终发往主库。没有请求上下文（后台任务、
+    命令行）或未配置副本时与 Flask-SQLAlchemy 默认的会话相同。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        key = replica_bind()
+        if key is not None and bind is None \
+                and not self._flushing and not isinstance(clause, UpdateBase):
+            return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(Session, 'after_commit')
+def _remember_write(session):
+    if has_request_context():
+        g.replica_wrote = True
+
+
+class ReplicaRouter:
+    """把 REPLICA_BLUEPRINTS 中蓝图的 GET/HEAD 请求路由到只读副本
+
+    REPLICA_BIND 指定的绑定不在 SQLALCHEMY_BINDS 中时不启用。请求中提交过
+    事务后，在会话 Cookie 中记录 REPLICA_STICKY_SECONDS 秒的时限，期间同一
+    客户端的读请求仍走主库，保证能读到自己刚写入的数据。
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.bind = 'replica'
+        self.blueprints = frozenset()
+        self.sticky_seconds = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.bind = app.config['REPLICA_BIND']
+        self.enabled = self.bind in (app.config.get('SQLALCHEMY_BINDS') or {})
+        if not self.enabled:
+            return
+
+        self.blueprints = frozenset(app.config['REPLICA_BLUEPRINTS'])
+        self.sticky_seconds = app.config['REPLICA_STICKY_SECONDS']
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.extensions['replica_router'] = self
+
+    def _before_request(self):
+        if request.method not in ('GET', 'HEAD') or request.blueprint not in self.blueprints:
+            return
+        if session.get(_STICKY_KEY, 0) > time.time():
+            return
+        g.replica_bind = self.bind
+
+    def _after_request(self, response):
+        if g.pop('replica_wrote', False):
+            session[_STICKY_KEY] = time.time() + self.sticky_seconds
+        elif _STICKY_KEY in session and session[_STICKY_KEY] <= time.time():
+            session.pop(_STICKY_KEY)
+        return response
+
+
+replica_router = ReplicaRouter()
+
+
+def sync_sqlite_replica():
+    """把主库整体复制到副本（均为 SQLite 文件，本地以文件充当副本时使用）"""
+    from app import db
+    from app.utils.http_cache import catalogue_generation
+    primary = db.engines[None]
+    replica = db.engines[replica_router.bind]
+    if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+        raise RuntimeError('sync-replica 只支持 SQLite 主库和副本')
+    with primary.connect() as source, replica.connect() as target:
+        source.connection.dbapi_connection.backup(target.connection.dbapi_connection)
+    # 副本上的目录版本号已变化，不必等待下一次回表
+    catalogue_generation.invalidate()
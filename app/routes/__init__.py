@@ -2,5 +2,6 @@ from app.routes.auth import auth_bp
 from app.routes.book import book_bp
 from app.routes.borrow import borrow_bp
 from app.routes.user import user_bp
+from app.routes.stats import stats_bp
 
-__all__ = ['auth_bp', 'book_bp', 'borrow_bp', 'user_bp']
\ No newline at end of file
+__all__ = ['auth_bp', 'book_bp', 'borrow_bp', 'user_bp', 'stats_bp']
\ No newline at end of file
@@ -1,12 +1,15 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from app import db
-from app.models.user import User
+from app.models.user import User, invalidate_user_cache, user_generation
+from app.models.stats import StatCounter
+from app.utils.query_budget import query_budget
 
 auth_bp = Blueprint('auth', __name__)
 
 
 @auth_bp.route('/login', methods=['POST'])
+@query_budget(3)
 def login():
     """用户登录"""
     data = request.get_json()
@@ -25,6 +28,10 @@ def login():
     if user is None or not user.check_password(password):
         return jsonify({'success': False, 'message': '用户名或密码错误'}), 401
     
+    # 哈希参数变更后透明升级已有密码
+    if user.rehash_password_if_needed(password):
+        db.session.commit()
+    
     login_user(user)
     return jsonify({
         'success': True,
@@ -34,6 +41,7 @@ def login():
 
 
 @auth_bp.route('/logout', methods=['POST'])
+@query_budget(1)
 @login_required
 def logout():
     """用户登出"""
@@ -42,6 +50,7 @@ def logout():
 
 
 @auth_bp.route('/register', methods=['POST'])
+@query_budget(5)
 def register():
     """用户注册"""
     data = request.get_json()
@@ -69,6 +78,7 @@ def register():
     user.set_password(password)
     
     db.session.add(user)
+    StatCounter.increment(StatCounter.USERS)
     db.session.commit()
     
     return jsonify({
@@ -79,6 +89,7 @@ def register():
 
 
 @auth_bp.route('/me', methods=['GET'])
+@query_budget(1)
 @login_required
 def get_current_user():
     """获取当前登录用户信息"""
@@ -89,6 +100,7 @@ def get_current_user():
 
 
 @auth_bp.route('/change-password', methods=['POST'])
+@query_budget(5)
 @login_required
 def change_password():
     """修改密码"""
@@ -107,6 +119,8 @@ def change_password():
         return jsonify({'success': False, 'message': '旧密码错误'}), 400
     
     current_user.set_password(new_password)
+    user_generation.bump()
     db.session.commit()
+    invalidate_user_cache(current_user.id)
     
     return jsonify({'success': True, 'message': '密码修改成功'})
\ No newline at end of file
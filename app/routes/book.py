@@ -1,7 +1,20 @@
-from flask import Blueprint, request, jsonify
+import csv
+import io
+import json
+from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
 from app import db
-from app.models.book import Book
+from app.models.book import Book, BookTombstone
+from app.models.stats import StatCounter
+from app.utils import paginate, paginate_async, match_keyword
+from app.utils.async_db import async_db
+from app.utils.delta_sync import collect_changes
+from app.utils.events import change_feed
+from app.utils.fieldsets import parse_fieldset, select_fieldset
+from app.utils.http_cache import catalogue_cached, catalogue_generation
+from app.asgi import async_view, async_login_required
+from app.utils.query_budget import query_budget
 
 book_bp = Blueprint('book', __name__)
 
@@ -17,40 +30,111 @@ def admin_required(f):
     return decorated_function
 
 
-@book_bp.route('', methods=['GET'])
-@login_required
-def get_books():
-    """获取图书列表"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+def parse_book_data(data):
+    """校验并规整新增图书数据，返回 (字段字典, 错误信息)"""
+    title = data.get('title')
+    author = data.get('author')
+    isbn = data.get('isbn')
+    quantity = data.get('quantity')
     
-    pagination = Book.query.order_by(Book.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    if isinstance(title, str):
+        title = title.strip()
+    if isinstance(author, str):
+        author = author.strip()
+    if isinstance(isbn, str):
+        isbn = isbn.strip()
+    
+    if not title or not author or not isbn:
+        return None, '书名、作者和ISBN不能为空'
     
-    books = [book.to_dict() for book in pagination.items]
+    if quantity is None or quantity == '':
+        quantity = 1
+    try:
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        return None, '数量必须为整数'
+    if quantity < 0:
+        return None, '数量不能为负数'
+    
+    return {
+        'title': title,
+        'author': author,
+        'isbn': isbn,
+        'quantity': quantity,
+        'available': quantity
+    }, None
+
+
+def _select_fields(query, sort_column=Book.created_at):
+    """按 fields 参数只加载需要的列，返回 (query, fields)"""
+    fields, _ = parse_fieldset(Book)
+    return select_fieldset(query, Book, fields, required=(sort_column,)), fields
+
+
+def _book_list_response(items, meta, fields=None):
+    """图书列表响应"""
+    books = [book.to_dict(fields) for book in items]
     
     return jsonify({
         'success': True,
         'books': books,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
+        **meta
+    })
+
+
+@book_bp.route('', methods=['GET'])
+@query_budget(4)
+@login_required
+@catalogue_cached
+def get_books():
+    """获取图书列表"""
+    query, fields = _select_fields(Book.query)
+    items, meta = paginate(query, Book.created_at, Book.id)
+    return _book_list_response(items, meta, fields)
+
+
+@async_view(book_bp, 'get_books')
+@async_login_required
+@catalogue_cached
+async def get_books_async():
+    """获取图书列表（ASGI 模式，异步读取数据库）"""
+    query, fields = _select_fields(Book.query)
+    async with async_db.session() as session:
+        items, meta = await paginate_async(session, query, Book.created_at, Book.id)
+    return _book_list_response(items, meta, fields)
+
+
+@book_bp.route('/changes', methods=['GET'])
+@query_budget(3)
+@login_required
+def get_book_changes():
+    """增量同步：获取水位之后新增、修改和删除的图书"""
+    query, fields = _select_fields(Book.query, Book.updated_at)
+    items, deleted, meta = collect_changes(query)
+    return jsonify({
+        'success': True,
+        'books': [book.to_dict(fields) for book in items],
+        'deleted': deleted,
+        **meta
     })
 
 
 @book_bp.route('/<int:book_id>', methods=['GET'])
+@query_budget(3)
 @login_required
+@catalogue_cached
 def get_book(book_id):
     """获取图书详情"""
-    book = Book.query.get_or_404(book_id)
+    query, fields = _select_fields(Book.query)
+    book = query.get_or_404(book_id)
     return jsonify({
         'success': True,
-        'book': book.to_dict()
+        'book': book.to_dict(fields)
     })
 
 
 @book_bp.route('', methods=['POST'])
+@query_budget(9)
 @login_required
 @admin_required
 def create_book():
@@ -60,36 +144,32 @@ def create_book():
     if not data:
         return jsonify({'success': False, 'message': '请提供图书信息'}), 400
     
-    title = data.get('title')
-    author = data.get('author')
-    isbn = data.get('isbn')
-    quantity = data.get('quantity', 1)
-    
-    if not title or not author or not isbn:
-        return jsonify({'success': False, 'message': '书名、作者和ISBN不能为空'}), 400
+    fields, error = parse_book_data(data)
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
     
-    if Book.query.filter_by(isbn=isbn).first():
+    if Book.query.filter_by(isbn=fields['isbn']).first():
         return jsonify({'success': False, 'message': 'ISBN已存在'}), 400
     
-    book = Book(
-        title=title,
-        author=author,
-        isbn=isbn,
-        quantity=quantity,
-        available=quantity
-    )
+    book = Book(**fields)
     
     db.session.add(book)
+    StatCounter.increment(StatCounter.BOOKS)
+    catalogue_generation.bump()
     db.session.commit()
     
+    book_data = book.to_dict()
+    change_feed.publish('book.created', book_data)
+    
     return jsonify({
         'success': True,
         'message': '图书添加成功',
-        'book': book.to_dict()
+        'book': book_data
     }), 201
 
 
 @book_bp.route('/<int:book_id>', methods=['PUT'])
+@query_budget(7)
 @login_required
 @admin_required
 def update_book(book_id):
@@ -113,23 +193,29 @@ def update_book(book_id):
         book.isbn = data['isbn']
     if 'quantity' in data:
         new_quantity = data['quantity']
-        # 计算已借出数量
-        borrowed = book.quantity - book.available
-        if new_quantity < borrowed:
+        # 按已借出数量原子调整库存，避免与并发借还互相覆盖
+        if not book.set_quantity(new_quantity):
+            db.session.rollback()
+            borrowed = book.quantity - book.available
             return jsonify({'success': False, 'message': f'库存不能少于已借出数量({borrowed})'}), 400
-        book.available = new_quantity - borrowed
-        book.quantity = new_quantity
     
+    catalogue_generation.bump()
     db.session.commit()
     
+    book_data = book.to_dict()
+    change_feed.publish('book.updated', book_data)
+    if 'quantity' in data:
+        change_feed.publish('inventory', Book.inventory(book_data))
+    
     return jsonify({
         'success': True,
         'message': '图书更新成功',
-        'book': book.to_dict()
+        'book': book_data
     })
 
 
 @book_bp.route('/<int:book_id>', methods=['DELETE'])
+@query_budget(8)
 @login_required
 @admin_required
 def delete_book(book_id):
@@ -142,52 +228,176 @@ def delete_book(book_id):
         return jsonify({'success': False, 'message': f'该图书有{borrowed_count}本未归还，无法删除'}), 400
     
     db.session.delete(book)
+    BookTombstone.record(book_id)
+    StatCounter.increment(StatCounter.BOOKS, -1)
+    catalogue_generation.bump()
     db.session.commit()
     
+    change_feed.publish('book.deleted', {'id': book_id})
+    
     return jsonify({
         'success': True,
         'message': '图书删除成功'
     })
 
 
-@book_bp.route('/search', methods=['GET'])
-@login_required
-def search_books():
-    """搜索图书"""
+def _search_query():
+    """按搜索参数构建查询，返回 (query, relevance)"""
     keyword = request.args.get('keyword', '')
     search_type = request.args.get('type', 'all')  # all, title, author, isbn
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
     
     query = Book.query
+    relevance = None
     
     if keyword:
-        if search_type == 'title':
-            query = query.filter(Book.title.contains(keyword))
-        elif search_type == 'author':
-            query = query.filter(Book.author.contains(keyword))
-        elif search_type == 'isbn':
-            query = query.filter(Book.isbn.contains(keyword))
+        if search_type in ('title', 'author', 'isbn'):
+            fields = (search_type,)
         else:
             # 搜索所有字段
-            query = query.filter(
-                db.or_(
-                    Book.title.contains(keyword),
-                    Book.author.contains(keyword),
-                    Book.isbn.contains(keyword)
-                )
-            )
+            fields = ('title', 'author', 'isbn')
+        query, relevance = match_keyword(query, Book, fields, keyword)
+    
+    return query, relevance
+
+
+@book_bp.route('/search', methods=['GET'])
+@query_budget(4)
+@login_required
+@catalogue_cached
+def search_books():
+    """搜索图书"""
+    query, relevance = _search_query()
+    query, fields = _select_fields(query)
+    items, meta = paginate(query, Book.created_at, Book.id, relevance=relevance)
+    return _book_list_response(items, meta, fields)
+
+
+@async_view(book_bp, 'search_books')
+@async_login_required
+@catalogue_cached
+async def search_books_async():
+    """搜索图书（ASGI 模式，异步读取数据库）"""
+    query, relevance = _search_query()
+    query, fields = _select_fields(query)
+    async with async_db.session() as session:
+        items, meta = await paginate_async(session, query, Book.created_at, Book.id, relevance=relevance)
+    return _book_list_response(items, meta, fields)
+
+
+def _iter_import_rows(fmt):
+    """逐行读取请求体，产出 (行号, 数据字典, 解析错误)"""
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+    
+    if fmt == 'csv':
+        for line_no, row in enumerate(csv.DictReader(stream), start=1):
+            yield line_no, row, None
+        return
     
-    pagination = query.order_by(Book.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_no, None, 'JSON格式错误'
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, '每行必须是JSON对象'
+            continue
+        yield line_no, row, None
+
+
+def _import_chunk(chunk, errors):
+    """导入一批已校验的图书，返回成功导入的数量"""
+    isbns = [fields['isbn'] for _, fields in chunk]
+    existing = {
+        isbn for (isbn,) in db.session.query(Book.isbn).filter(Book.isbn.in_(isbns))
+    }
     
-    books = [book.to_dict() for book in pagination.items]
+    pending = []
+    for line_no, fields in chunk:
+        if fields['isbn'] in existing:
+            errors.append({'row': line_no, 'isbn': fields['isbn'], 'message': 'ISBN已存在'})
+            continue
+        existing.add(fields['isbn'])
+        pending.append((line_no, fields))
+    
+    if not pending:
+        return 0
+    
+    try:
+        db.session.execute(db.insert(Book), [fields for _, fields in pending])
+        StatCounter.increment(StatCounter.BOOKS, len(pending))
+        catalogue_generation.bump()
+        db.session.commit()
+        return len(pending)
+    except IntegrityError:
+        # 并发写入导致 ISBN 冲突时，逐行重试以定位冲突行
+        db.session.rollback()
+    
+    imported = 0
+    for line_no, fields in pending:
+        try:
+            db.session.execute(db.insert(Book), [fields])
+            StatCounter.increment(StatCounter.BOOKS)
+            catalogue_generation.bump()
+            db.session.commit()
+            imported += 1
+        except IntegrityError:
+            db.session.rollback()
+            errors.append({'row': line_no, 'isbn': fields['isbn'], 'message': 'ISBN已存在'})
+    return imported
+
+
+@book_bp.route('/import', methods=['POST'])
+@query_budget(None, repeats=0)  # 语句数随导入批次增长，不设上限
+@login_required
+@admin_required
+def import_books():
+    """批量导入图书（CSV 或 NDJSON）"""
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'csv' if request.mimetype in ('text/csv', 'application/csv') else 'ndjson'
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'message': '仅支持 csv 或 ndjson 格式'}), 400
+    
+    chunk_size = current_app.config['BOOK_IMPORT_CHUNK_SIZE']
+    imported = 0
+    total = 0
+    errors = []
+    chunk = []
+    
+    try:
+        for line_no, data, error in _iter_import_rows(fmt):
+            total += 1
+            if error is None:
+                fields, error = parse_book_data(data)
+            if error:
+                errors.append({'row': line_no, 'isbn': (data or {}).get('isbn'), 'message': error})
+                continue
+            chunk.append((line_no, fields))
+            if len(chunk) >= chunk_size:
+                imported += _import_chunk(chunk, errors)
+                chunk = []
+        if chunk:
+            imported += _import_chunk(chunk, errors)
+    except (UnicodeDecodeError, csv.Error):
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'文件解析失败，已导入{imported}本',
+            'imported': imported,
+            'errors': errors
+        }), 400
+    
+    errors.sort(key=lambda e: e['row'])
     
     return jsonify({
         'success': True,
-        'books': books,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
-    })
\ No newline at end of file
+        'message': f'导入完成：成功{imported}本，失败{len(errors)}本',
+        'total': total,
+        'imported': imported,
+        'failed': len(errors),
+        'errors': errors
+    })
@@ -1,10 +1,21 @@
+import csv
+import io
 from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models.book import Book
 from app.models.borrow import BorrowRecord
+from app.models.stats import StatCounter
 from app.models.user import User
+from app.utils import paginate, paginate_async
+from app.utils.async_db import async_db
+from app.utils.events import change_feed
+from app.utils.fieldsets import parse_fieldset, select_fieldset
+from app.utils.http_cache import catalogue_generation
+from app.asgi import async_view, async_login_required
+from app.utils.query_budget import query_budget
 
 borrow_bp = Blueprint('borrow', __name__)
 
@@ -20,46 +31,88 @@ def admin_required(f):
     return decorated_function
 
 
-@borrow_bp.route('', methods=['GET'])
-@login_required
-def get_borrows():
-    """获取借阅记录列表"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+def _records_query(status):
+    """按 history 参数选择查询的表，返回 (query, 实体)
+
+    默认只查询热表；history=true 时合并归档表（只有已归还的记录会被归档，
+    仅查询未归还记录时无需合并）。
+    """
+    history = request.args.get('history', '').lower() in ('1', 'true', 'yes')
+    records = BorrowRecord.with_archive() if history and status != 'borrowed' else BorrowRecord
+    return db.session.query(records), records
+
+
+def _filter_status(query, status):
+    """按状态筛选（borrowed, returned，其他值不筛选）"""
+    if status in ('borrowed', 'returned'):
+        query = query.filter_by(status=status)
+    return query
+
+
+def _borrows_query():
+    """按当前用户和状态参数构建借阅记录查询，返回 (query, 实体)"""
     status = request.args.get('status', '')  # borrowed, returned, all
     
-    query = BorrowRecord.query
+    query, records = _records_query(status)
     
     # 非管理员只能查看自己的借阅记录
     if not current_user.is_admin():
         query = query.filter_by(user_id=current_user.id)
     
-    # 按状态筛选
-    if status == 'borrowed':
-        query = query.filter_by(status='borrowed')
-    elif status == 'returned':
-        query = query.filter_by(status='returned')
-    
-    pagination = query.order_by(BorrowRecord.borrow_date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    
-    records = [record.to_dict() for record in pagination.items]
+    return _filter_status(query, status), records
+
+
+def _select_fields(query, *required, records=BorrowRecord):
+    """按 fields/expand 参数只加载需要的列并预加载展开的关联，返回 (query, fields, expand)"""
+    fields, expand = parse_fieldset(BorrowRecord, ('user', 'book'))
+    return select_fieldset(query, records, fields, expand, required), fields, expand
+
+
+def _record_list_response(items, meta, fields=None, expand=None):
+    """借阅记录列表响应"""
+    records = [record.to_dict(fields, expand) for record in items]
     
     return jsonify({
         'success': True,
         'records': records,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
+        **meta
     })
 
 
+@borrow_bp.route('', methods=['GET'])
+@query_budget(5)
+@login_required
+def get_borrows():
+    """获取借阅记录列表"""
+    query, records = _borrows_query()
+    query, fields, expand = _select_fields(query, records.borrow_date, records=records)
+    items, meta = paginate(query, records.borrow_date, records.id)
+    return _record_list_response(items, meta, fields, expand)
+
+
+@async_view(borrow_bp, 'get_borrows')
+@async_login_required
+async def get_borrows_async():
+    """获取借阅记录列表（ASGI 模式，异步读取数据库）"""
+    query, records = _borrows_query()
+    query, fields, expand = _select_fields(query, records.borrow_date, records=records)
+    async with async_db.session() as session:
+        items, meta = await paginate_async(session, query, records.borrow_date, records.id)
+    return _record_list_response(items, meta, fields, expand)
+
+
 @borrow_bp.route('/<int:record_id>', methods=['GET'])
+@query_budget(5)
 @login_required
 def get_borrow(record_id):
-    """获取借阅记录详情"""
-    record = BorrowRecord.query.get_or_404(record_id)
+    """获取借阅记录详情（包括已归档的记录）"""
+    query, fields, expand = _select_fields(BorrowRecord.query, BorrowRecord.user_id)
+    record = query.get(record_id)
+    if record is None:
+        # 热表中没有时再合并归档表查找
+        history = BorrowRecord.with_archive()
+        query, fields, expand = _select_fields(db.session.query(history), history.user_id, records=history)
+        record = query.filter(history.id == record_id).first_or_404()
     
     # 非管理员只能查看自己的借阅记录
     if not current_user.is_admin() and record.user_id != current_user.id:
@@ -67,11 +120,12 @@ def get_borrow(record_id):
     
     return jsonify({
         'success': True,
-        'record': record.to_dict()
+        'record': record.to_dict(fields, expand)
     })
 
 
 @borrow_bp.route('', methods=['POST'])
+@query_budget(15)
 @login_required
 @admin_required
 def create_borrow():
@@ -98,18 +152,20 @@ def create_borrow():
     if not book:
         return jsonify({'success': False, 'message': '图书不存在'}), 404
     
-    # 检查图书是否可借
-    if not book.is_available():
+    # 检查用户是否已借阅该书且未归还（以借阅记录为准，不依赖在借数量计数）
+    if BorrowRecord.has_open_loan(user_id, book_id):
+        return jsonify({'success': False, 'message': '该用户已借阅此书且未归还'}), 400
+    
+    # 扣减库存（条件原子更新，库存不足时不扣减）；与批量借阅一样先锁定图书行再锁定用户行
+    if not book.borrow_one():
+        db.session.rollback()
         return jsonify({'success': False, 'message': '该图书暂无库存'}), 400
     
-    # 检查用户是否已借阅该书且未归还
-    existing = BorrowRecord.query.filter_by(
-        user_id=user_id,
-        book_id=book_id,
-        status='borrowed'
-    ).first()
-    if existing:
-        return jsonify({'success': False, 'message': '该用户已借阅此书且未归还'}), 400
+    # 增加在借数量（条件原子更新，达到借阅上限时不增加）
+    max_loans = current_app.config['MAX_ACTIVE_LOANS']
+    if not User.adjust_active_loans(user_id, 1, max_loans):
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'该用户在借数量已达上限({max_loans}本)'}), 400
     
     # 创建借阅记录
     record = BorrowRecord(
@@ -120,47 +176,271 @@ def create_borrow():
         status='borrowed'
     )
     
-    # 扣减库存
-    book.borrow_one()
-    
     db.session.add(record)
-    db.session.commit()
+    try:
+        # 并发请求重复借阅时由未归还记录唯一索引拦截，先 flush 以便在此处捕获，库存扣减一并回滚
+        db.session.flush()
+        StatCounter.increment(StatCounter.BORROWS)
+        StatCounter.increment(StatCounter.ACTIVE_BORROWS)
+        catalogue_generation.bump()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': '该用户已借阅此书且未归还'}), 400
+    
+    record_data = record.to_dict()
+    _publish_record('borrow.created', record_data)
     
     return jsonify({
         'success': True,
         'message': '借阅成功',
-        'record': record.to_dict()
+        'record': record_data
     }), 201
 
 
 @borrow_bp.route('/<int:record_id>/return', methods=['PUT'])
+@query_budget(14)
 @login_required
 @admin_required
 def return_book(record_id):
     """办理归还"""
     record = BorrowRecord.query.get_or_404(record_id)
     
-    if record.status == 'returned':
+    # 归还图书（条件原子更新，并发重复归还时只有一个请求成功）
+    if not record.return_book():
+        db.session.rollback()
         return jsonify({'success': False, 'message': '该图书已归还'}), 400
     
-    # 归还图书
-    record.return_book()
-    
     # 恢复库存
     book = Book.query.get(record.book_id)
     if book:
         book.return_one()
     
+    # 在借数量不足以扣减说明计数已有偏差，按未归还记录重新校准
+    if not User.adjust_active_loans(record.user_id, -1):
+        User.reconcile_active_loans(record.user_id)
+    StatCounter.increment(StatCounter.ACTIVE_BORROWS, -1)
+    if BorrowRecord.clear_overdue([record]):
+        StatCounter.increment(StatCounter.OVERDUE_BORROWS, -1)
+    catalogue_generation.bump()
     db.session.commit()
     
+    record_data = record.to_dict()
+    _publish_record('borrow.returned', record_data)
+    
     return jsonify({
         'success': True,
         'message': '归还成功',
-        'record': record.to_dict()
+        'record': record_data
     })
 
 
+def _publish_record(event_type, record):
+    """推送借阅/归还事件（仅管理员和借阅人可见）以及对应图书的库存变化"""
+    change_feed.publish(event_type, record, user_id=record['user_id'])
+    if record['book']:
+        change_feed.publish('inventory', Book.inventory(record['book']))
+
+
+def _serialize_results(results):
+    """序列化批量操作结果中的借阅记录，用一次预加载查询取回提交后的数据"""
+    # 提交后对象已过期，从标识键取 ID 以免逐条刷新
+    for result in results:
+        if 'record' in result:
+            result['record'] = db.inspect(result['record']).identity[0]
+    record_ids = [result['record'] for result in results if 'record' in result]
+    if not record_ids:
+        return
+    records = {
+        record.id: record
+        for record in BorrowRecord.query_with_relations().filter(BorrowRecord.id.in_(record_ids))
+    }
+    for result in results:
+        if 'record' in result:
+            result['record'] = records[result['record']].to_dict()
+
+
+@borrow_bp.route('/batch', methods=['POST'])
+@query_budget(115, repeats=50)  # 每本一条库存扣减和一条插入，最多 BORROW_BATCH_LIMIT 本
+@login_required
+@admin_required
+def create_borrows_batch():
+    """批量办理借阅"""
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'success': False, 'message': '请提供借阅信息'}), 400
+    
+    user_id = data.get('user_id')
+    book_ids = data.get('book_ids')
+    days = data.get('days', 30)  # 借阅天数，默认30天
+    
+    if not user_id or not book_ids or not isinstance(book_ids, list):
+        return jsonify({'success': False, 'message': '用户ID和图书ID列表不能为空'}), 400
+    
+    if not all(isinstance(book_id, int) for book_id in book_ids):
+        return jsonify({'success': False, 'message': '图书ID必须为整数'}), 400
+    
+    limit = current_app.config['BORROW_BATCH_LIMIT']
+    if len(book_ids) > limit:
+        return jsonify({'success': False, 'message': f'单次最多办理{limit}本'}), 400
+    
+    # 检查用户是否存在
+    user = db.session.get(User, user_id)
+    if not user:
+        return jsonify({'success': False, 'message': '用户不存在'}), 404
+    
+    # 一次查询取出全部图书及该用户对这些图书的未还记录（以借阅记录为准，不依赖在借数量计数）
+    books = {book.id: book for book in Book.query.filter(Book.id.in_(book_ids))}
+    borrowed_ids = {
+        book_id for (book_id,) in db.session.query(BorrowRecord.book_id).filter(
+            BorrowRecord.user_id == user_id,
+            BorrowRecord.status == 'borrowed',
+            BorrowRecord.book_id.in_(book_ids)
+        )
+    }
+    
+    # 本批最多还能借的数量
+    max_loans = current_app.config['MAX_ACTIVE_LOANS']
+    remaining = max_loans - user.active_loans if max_loans > 0 else len(book_ids)
+    
+    # 去重后按图书 ID 升序扣减库存：并发的借阅请求都按 ID 顺序锁定图书行，之后才锁定
+    # 用户行，不会互相等待对方持有的锁而死锁。借阅上限不足时优先办理 ID 较小的图书
+    now = datetime.utcnow()
+    outcomes = {}
+    created = []
+    for book_id in sorted(set(book_ids)):
+        book = books.get(book_id)
+        if not book:
+            outcomes[book_id] = {'book_id': book_id, 'success': False, 'message': '图书不存在'}
+        elif book_id in borrowed_ids:
+            outcomes[book_id] = {'book_id': book_id, 'success': False, 'message': '该用户已借阅此书且未归还'}
+        elif len(created) >= remaining:
+            outcomes[book_id] = {'book_id': book_id, 'success': False, 'message': f'该用户在借数量已达上限({max_loans}本)'}
+        elif not book.borrow_one():
+            outcomes[book_id] = {'book_id': book_id, 'success': False, 'message': '该图书暂无库存'}
+        else:
+            record = BorrowRecord(
+                user_id=user_id,
+                book_id=book_id,
+                borrow_date=now,
+                due_date=now + timedelta(days=days),
+                status='borrowed'
+            )
+            db.session.add(record)
+            created.append(record)
+            outcomes[book_id] = {'book_id': book_id, 'success': True, 'message': '借阅成功', 'record': record}
+    
+    # 结果按请求中的顺序返回，重复的图书 ID 只办理一次
+    results = []
+    for book_id in book_ids:
+        result = outcomes.pop(book_id, None)
+        results.append(result or {'book_id': book_id, 'success': False, 'message': '图书ID重复'})
+    
+    try:
+        # 并发请求重复借阅时由未归还记录唯一索引拦截，先 flush 以便在此处捕获，整批回滚
+        db.session.flush()
+        
+        # 并发借阅使在借数量超出上限时整批回滚
+        if created and not User.adjust_active_loans(user_id, len(created), max_loans):
+            db.session.rollback()
+            return jsonify({'success': False, 'message': f'该用户在借数量已达上限({max_loans}本)，请重试'}), 409
+        
+        if created:
+            StatCounter.increment(StatCounter.BORROWS, len(created))
+            StatCounter.increment(StatCounter.ACTIVE_BORROWS, len(created))
+            catalogue_generation.bump()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': '该用户已借阅其中部分图书且未归还，请重试'}), 409
+    
+    _serialize_results(results)
+    for result in results:
+        if 'record' in result:
+            _publish_record('borrow.created', result['record'])
+    
+    return jsonify({
+        'success': bool(created),
+        'message': f'成功借阅{len(created)}本，失败{len(results) - len(created)}本',
+        'succeeded': len(created),
+        'failed': len(results) - len(created),
+        'results': results
+    }), 201 if created else 400
+
+
+@borrow_bp.route('/batch/return', methods=['PUT'])
+@query_budget(115, repeats=50)  # 每本一条记录更新和一条库存恢复，最多 BORROW_BATCH_LIMIT 本
+@login_required
+@admin_required
+def return_books_batch():
+    """批量办理归还"""
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'success': False, 'message': '请提供归还信息'}), 400
+    
+    record_ids = data.get('record_ids')
+    
+    if not record_ids or not isinstance(record_ids, list):
+        return jsonify({'success': False, 'message': '借阅记录ID列表不能为空'}), 400
+    
+    limit = current_app.config['BORROW_BATCH_LIMIT']
+    if len(record_ids) > limit:
+        return jsonify({'success': False, 'message': f'单次最多办理{limit}本'}), 400
+    
+    # 一次查询取出全部借阅记录及对应图书
+    records = {
+        record.id: record
+        for record in BorrowRecord.query_with_relations().filter(BorrowRecord.id.in_(record_ids))
+    }
+    
+    results = []
+    returned = []
+    released = {}  # user_id -> 归还数量
+    for record_id in record_ids:
+        record = records.get(record_id)
+        if not record:
+            results.append({'record_id': record_id, 'success': False, 'message': '借阅记录不存在'})
+            continue
+        # 条件原子更新，已归还或被并发请求归还的记录不恢复库存和计数
+        if not record.return_book():
+            results.append({'record_id': record_id, 'success': False, 'message': '该图书已归还'})
+            continue
+        
+        if record.book:
+            record.book.return_one()
+        released[record.user_id] = released.get(record.user_id, 0) + 1
+        returned.append(record)
+        results.append({'record_id': record_id, 'success': True, 'message': '归还成功', 'record': record})
+    
+    for user_id, count in released.items():
+        if not User.adjust_active_loans(user_id, -count):
+            User.reconcile_active_loans(user_id)
+    if returned:
+        StatCounter.increment(StatCounter.ACTIVE_BORROWS, -len(returned))
+        overdue = BorrowRecord.clear_overdue(returned)
+        if overdue:
+            StatCounter.increment(StatCounter.OVERDUE_BORROWS, -overdue)
+        catalogue_generation.bump()
+    db.session.commit()
+    
+    _serialize_results(results)
+    for result in results:
+        if 'record' in result:
+            _publish_record('borrow.returned', result['record'])
+    
+    return jsonify({
+        'success': bool(returned),
+        'message': f'成功归还{len(returned)}本，失败{len(results) - len(returned)}本',
+        'succeeded': len(returned),
+        'failed': len(results) - len(returned),
+        'results': results
+    }), 200 if returned else 400
+
+
 @borrow_bp.route('/user/<int:user_id>', methods=['GET'])
+@query_budget(5)
 @login_required
 def get_user_borrows(user_id):
     """查询用户借阅记录"""
@@ -168,86 +448,150 @@ def get_user_borrows(user_id):
     if not current_user.is_admin() and user_id != current_user.id:
         return jsonify({'success': False, 'message': '无权查看此用户的借阅记录'}), 403
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
     status = request.args.get('status', '')
     
-    query = BorrowRecord.query.filter_by(user_id=user_id)
-    
-    if status == 'borrowed':
-        query = query.filter_by(status='borrowed')
-    elif status == 'returned':
-        query = query.filter_by(status='returned')
-    
-    pagination = query.order_by(BorrowRecord.borrow_date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    
-    records = [record.to_dict() for record in pagination.items]
+    query, records = _records_query(status)
+    query = _filter_status(query.filter_by(user_id=user_id), status)
     
-    return jsonify({
-        'success': True,
-        'records': records,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
-    })
+    query, fields, expand = _select_fields(query, records.borrow_date, records=records)
+    items, meta = paginate(query, records.borrow_date, records.id)
+    return _record_list_response(items, meta, fields, expand)
 
 
 @borrow_bp.route('/book/<int:book_id>', methods=['GET'])
+@query_budget(5)
 @login_required
 @admin_required
 def get_book_borrows(book_id):
     """查询图书借阅记录"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
     status = request.args.get('status', '')
     
-    query = BorrowRecord.query.filter_by(book_id=book_id)
-    
-    if status == 'borrowed':
-        query = query.filter_by(status='borrowed')
-    elif status == 'returned':
-        query = query.filter_by(status='returned')
-    
-    pagination = query.order_by(BorrowRecord.borrow_date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    
-    records = [record.to_dict() for record in pagination.items]
+    query, records = _records_query(status)
+    query = _filter_status(query.filter_by(book_id=book_id), status)
     
-    return jsonify({
-        'success': True,
-        'records': records,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
-    })
+    query, fields, expand = _select_fields(query, records.borrow_date, records=records)
+    items, meta = paginate(query, records.borrow_date, records.id)
+    return _record_list_response(items, meta, fields, expand)
 
 
 @borrow_bp.route('/overdue', methods=['GET'])
+@query_budget(5)
 @login_required
 @admin_required
 def get_overdue_borrows():
     """获取逾期借阅记录"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
     
     query = BorrowRecord.query.filter(
         BorrowRecord.status == 'borrowed',
         BorrowRecord.due_date < datetime.utcnow()
     )
     
-    pagination = query.order_by(BorrowRecord.due_date.asc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    query, fields, expand = _select_fields(query, BorrowRecord.due_date)
+    items, meta = paginate(query, BorrowRecord.due_date, BorrowRecord.id, descending=False)
+    return _record_list_response(items, meta, fields, expand)
+
+
+def _export_columns(records):
+    """导出字段：(列名, SQL 表达式)，records 为借阅记录实体"""
+    return (
+        ('id', records.id),
+        ('user_id', records.user_id),
+        ('username', User.username),
+        ('user_name', User.name),
+        ('book_id', records.book_id),
+        ('book_title', Book.title),
+        ('isbn', Book.isbn),
+        ('borrow_date', records.borrow_date),
+        ('due_date', records.due_date),
+        ('return_date', records.return_date),
+        ('status', records.status),
+        ('overdue', records.overdue),
     )
+
+
+def _parse_date_arg(name):
+    """解析日期查询参数（ISO 8601），未提供时返回 None"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+
+@borrow_bp.route('/export', methods=['GET'])
+@query_budget(1)  # 流式响应体中的分批查询不计入
+@login_required
+@admin_required
+def export_borrows():
+    """流式导出借阅记录（CSV 或 NDJSON）"""
+    fmt = request.args.get('format', 'csv')
+    status = request.args.get('status', '')
     
-    records = [record.to_dict() for record in pagination.items]
-    
-    return jsonify({
-        'success': True,
-        'records': records,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
-    })
\ No newline at end of file
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'message': '仅支持 csv 或 ndjson 格式'}), 400
+    
+    try:
+        start = _parse_date_arg('start')
+        end = _parse_date_arg('end')
+    except ValueError:
+        return jsonify({'success': False, 'message': '日期格式错误，应为 YYYY-MM-DD'}), 400
+    
+    # 导出完整历史，已归还的记录包括归档表中的记录
+    records = BorrowRecord if status == 'borrowed' else BorrowRecord.with_archive()
+    columns = _export_columns(records)
+    names = [name for name, _ in columns]
+    stmt = (
+        db.select(*[column for _, column in columns])
+        .join(User, User.id == records.user_id)
+        .join(Book, Book.id == records.book_id)
+        .order_by(records.id)
+    )
+    if status in ('borrowed', 'returned'):
+        stmt = stmt.where(records.status == status)
+    if start:
+        stmt = stmt.where(records.borrow_date >= start)
+    if end:
+        stmt = stmt.where(records.borrow_date < end)
+    
+    batch_size = current_app.config['BORROW_EXPORT_BATCH_SIZE']
+    
+    # 只对日期列做格式化，避免逐个字段判断类型
+    date_indexes = [
+        index for index, (_, column) in enumerate(columns)
+        if isinstance(column.type, db.DateTime)
+    ]
+    
+    def format_row(row):
+        row = list(row)
+        for index in date_indexes:
+            if row[index] is not None:
+                row[index] = row[index].isoformat()
+        return row
+    
+    def generate():
+        # 服务端分批读取，每批格式化后立即输出，内存占用与总行数无关；
+        # 直接走 Core 连接执行，跳过 ORM 结果处理
+        result = db.session.connection().execute(stmt.execution_options(yield_per=batch_size))
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            buffer.write('\ufeff')  # BOM，便于 Excel 识别 UTF-8
+            writer.writerow(names)
+            for rows in result.partitions():
+                writer.writerows(map(format_row, rows))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            # 日期时间由应用的 JSON 编码器转换
+            dumps = current_app.json.dumps
+            for rows in result.partitions():
+                yield ''.join(dumps(dict(zip(names, row))) + '\n' for row in rows)
+    
+    filename = f"borrow_records_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{fmt}"
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from flask import Blueprint, Response, current_app, request, send_from_directory
+from app.utils.query_budget import query_budget
+
+docs_bp = Blueprint('docs', __name__)
+
+# OpenAPI 文档位于项目根目录
+DOCS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Swagger UI 访问路径和展示的文档
+SWAGGER_URL = '/api/docs'
+API_URL = '/api/openapi.yaml'
+
+# 文件名 -> (原文, gzip 压缩后的内容, ETag)，首次请求时载入
+_documents = {}
+# Swagger UI 的 (静态文件目录, 首页 HTML)，首次访问时载入
+_swagger_ui = None
+_lock = threading.Lock()
+
+
+def _load(filename):
+    """读入文档并预压缩，每个进程只在首次请求时读取一次文件"""
+    document = _documents.get(filename)
+    if document is None:
+        with _lock:
+            document = _documents.get(filename)
+            if document is None:
+                with open(os.path.join(DOCS_DIR, filename), 'rb') as f:
+                    body = f.read()
+                document = (body, gzip.compress(body, 9, mtime=0), hashlib.sha1(body).hexdigest())
+                _documents[filename] = document
+    return document
+
+
+def _serve(filename, mimetype):
+    body, compressed, etag = _load(filename)
+    response = Response(mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = True
+    if request.accept_encodings['gzip'] > 0:
+        response.set_data(compressed)
+        response.content_encoding = 'gzip'
+        response.set_etag(etag + '-gzip')
+    else:
+        response.set_data(body)
+        response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+@docs_bp.route('/openapi.yaml', methods=['GET'])
+@query_budget(0)
+def serve_openapi_yaml():
+    """OpenAPI 文档 (YAML)"""
+    return _serve('openapi.yaml', 'text/yaml')
+
+
+@docs_bp.route('/openapi.json', methods=['GET'])
+@query_budget(0)
+def serve_openapi_json():
+    """OpenAPI 文档 (JSON)"""
+    return _serve('openapi.json', 'application/json')
+
+
+def _load_swagger_ui():
+    """首次访问时才导入 flask_swagger_ui，渲染首页并记下静态文件目录"""
+    global _swagger_ui
+    if _swagger_ui is None:
+        with _lock:
+            if _swagger_ui is None:
+                import flask_swagger_ui
+                root = os.path.dirname(flask_swagger_ui.__file__)
+                with open(os.path.join(root, 'templates', 'index.template.html'), encoding='utf-8') as f:
+                    template = current_app.jinja_env.from_string(f.read())
+                page = template.render(
+                    base_url=SWAGGER_URL,
+                    app_name='图书管理系统 API',
+                    config_json=json.dumps({
+                        'dom_id': '#swagger-ui',
+                        'url': API_URL,
+                        'layout': 'StandaloneLayout',
+                        'deepLinking': True
+                    })
+                )
+                _swagger_ui = (os.path.join(root, 'dist'), page)
+    return _swagger_ui
+
+
+@docs_bp.route('/docs/', methods=['GET'])
+@docs_bp.route('/docs/<path:path>', methods=['GET'])
+@query_budget(0)
+def swagger_ui(path=None):
+    """Swagger UI 页面及其静态文件"""
+    static_dir, page = _load_swagger_ui()
+    if not path or path == 'index.html':
+        return Response(page, mimetype='text/html')
+    return send_from_directory(static_dir, path)
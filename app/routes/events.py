@@ -0,0 +1,44 @@
+from flask import Blueprint, Response, request, jsonify, current_app
+from flask_login import current_user, login_required
+from app.asgi import async_view, async_login_required
+from app.utils.events import change_feed
+from app.utils.query_budget import query_budget
+
+events_bp = Blueprint('events', __name__)
+
+
+@events_bp.route('', methods=['GET'])
+@query_budget(1)
+@login_required
+def stream_events():
+    """变更事件流（Server-Sent Events）
+
+    长连接会一直占用一个同步工作线程，WSGI 模式下不提供，由 ASGI 模式的
+    协程视图在事件循环中推送。
+    """
+    return jsonify({'success': False, 'message': '事件流仅在 ASGI 模式下提供'}), 503
+
+
+@async_view(events_bp, 'stream_events')
+@async_login_required
+async def stream_events_async():
+    """变更事件流（ASGI 模式，等待事件时不占用线程）"""
+    subscription = change_feed.subscribe(
+        current_user.id, current_user.is_admin(), request.headers.get('Last-Event-ID')
+    )
+    if subscription is None:
+        return jsonify({'success': False, 'message': '事件流连接数已满，请稍后再试'}), 503
+    
+    # 响应体是异步生成器，由 AsgiApp 在释放请求上下文之后逐段发送
+    response = Response(
+        change_feed.stream(
+            subscription,
+            current_app.config['EVENTS_HEARTBEAT'],
+            current_app.config['EVENTS_STREAM_LIFETIME']
+        ),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    # 关闭反向代理（nginx）的响应缓冲
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
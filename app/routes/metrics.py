@@ -0,0 +1,16 @@
+from flask import Blueprint, Response, request, jsonify, current_app
+from app.utils.metrics import metrics
+from app.utils.query_budget import query_budget
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('', methods=['GET'])
+@query_budget(0)
+def get_metrics():
+    """Prometheus 指标"""
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'success': False, 'message': '无权访问指标'}), 401
+    
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,39 @@
+from flask import Blueprint, jsonify
+from flask_login import login_required, current_user
+from app import db
+from app.models.borrow import BorrowRecord
+from app.models.stats import StatCounter
+from app.utils.query_budget import query_budget
+
+stats_bp = Blueprint('stats', __name__)
+
+
+@stats_bp.route('', methods=['GET'])
+@query_budget(3)
+@login_required
+def get_stats():
+    """获取仪表板统计数据"""
+    counters = StatCounter.snapshot()
+    
+    if current_user.is_admin():
+        stats = {
+            'total_books': counters.get(StatCounter.BOOKS, 0),
+            'total_users': counters.get(StatCounter.USERS, 0),
+            'total_borrows': counters.get(StatCounter.BORROWS, 0),
+            'active_borrows': counters.get(StatCounter.ACTIVE_BORROWS, 0),
+            'overdue_borrows': counters.get(StatCounter.OVERDUE_BORROWS, 0)
+        }
+    else:
+        # 普通用户只统计自己的借阅记录（含归档记录，两张表的 user_id 都有索引）
+        history = BorrowRecord.with_archive()
+        stats = {
+            'total_books': counters.get(StatCounter.BOOKS, 0),
+            'total_borrows': db.session.query(db.func.count(history.id)).filter(
+                history.user_id == current_user.id
+            ).scalar()
+        }
+    
+    return jsonify({
+        'success': True,
+        'stats': stats
+    })
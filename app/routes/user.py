@@ -1,7 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from app import db
-from app.models.user import User
+from app.models.user import User, invalidate_user_cache, user_generation
+from app.models.borrow import BorrowRecord
+from app.models.stats import StatCounter
+from app.utils import paginate, match_keyword
+from app.utils.fieldsets import parse_fieldset, select_fieldset
+from app.utils.query_budget import query_budget
 
 user_bp = Blueprint('user', __name__)
 
@@ -17,30 +22,32 @@ def admin_required(f):
     return decorated_function
 
 
+def _select_fields(query):
+    """按 fields 参数只加载需要的列，返回 (query, fields)"""
+    fields, _ = parse_fieldset(User)
+    return select_fieldset(query, User, fields, required=(User.created_at,)), fields
+
+
 @user_bp.route('', methods=['GET'])
+@query_budget(3)
 @login_required
 @admin_required
 def get_users():
     """获取用户列表"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    
-    pagination = User.query.order_by(User.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    query, fields = _select_fields(User.query)
+    items, meta = paginate(query, User.created_at, User.id)
     
-    users = [user.to_dict() for user in pagination.items]
+    users = [user.to_dict(fields) for user in items]
     
     return jsonify({
         'success': True,
         'users': users,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
+        **meta
     })
 
 
 @user_bp.route('/<int:user_id>', methods=['GET'])
+@query_budget(2)
 @login_required
 def get_user(user_id):
     """获取用户详情"""
@@ -48,14 +55,16 @@ def get_user(user_id):
     if not current_user.is_admin() and user_id != current_user.id:
         return jsonify({'success': False, 'message': '无权查看此用户信息'}), 403
     
-    user = User.query.get_or_404(user_id)
+    query, fields = _select_fields(User.query)
+    user = query.get_or_404(user_id)
     return jsonify({
         'success': True,
-        'user': user.to_dict()
+        'user': user.to_dict(fields)
     })
 
 
 @user_bp.route('', methods=['POST'])
+@query_budget(6)
 @login_required
 @admin_required
 def create_user():
@@ -89,6 +98,7 @@ def create_user():
     user.set_password(password)
     
     db.session.add(user)
+    StatCounter.increment(StatCounter.USERS)
     db.session.commit()
     
     return jsonify({
@@ -99,6 +109,7 @@ def create_user():
 
 
 @user_bp.route('/<int:user_id>', methods=['PUT'])
+@query_budget(6)
 @login_required
 def update_user(user_id):
     """修改用户"""
@@ -133,7 +144,9 @@ def update_user(user_id):
         if 'password' in data and data['password']:
             user.set_password(data['password'])
     
+    user_generation.bump()
     db.session.commit()
+    invalidate_user_cache(user_id)
     
     return jsonify({
         'success': True,
@@ -143,6 +156,7 @@ def update_user(user_id):
 
 
 @user_bp.route('/<int:user_id>', methods=['DELETE'])
+@query_budget(9)
 @login_required
 @admin_required
 def delete_user(user_id):
@@ -153,13 +167,18 @@ def delete_user(user_id):
     if user_id == current_user.id:
         return jsonify({'success': False, 'message': '不能删除自己'}), 400
     
-    # 检查是否有未归还的借阅记录
-    borrowed_count = user.borrow_records.filter_by(status='borrowed').count()
+    # 检查是否有未归还的借阅记录：在借数量可能有偏差，只作快速判断，为 0 时仍以借阅记录为准
+    borrowed_count = user.active_loans
     if borrowed_count > 0:
         return jsonify({'success': False, 'message': f'该用户有{borrowed_count}本书未归还，无法删除'}), 400
+    if BorrowRecord.has_open_loans(user_id):
+        return jsonify({'success': False, 'message': '该用户有未归还的图书，无法删除'}), 400
     
     db.session.delete(user)
+    StatCounter.increment(StatCounter.USERS, -1)
+    user_generation.bump()
     db.session.commit()
+    invalidate_user_cache(user_id)
     
     return jsonify({
         'success': True,
@@ -168,35 +187,26 @@ def delete_user(user_id):
 
 
 @user_bp.route('/search', methods=['GET'])
+@query_budget(3)
 @login_required
 @admin_required
 def search_users():
     """搜索用户"""
     keyword = request.args.get('keyword', '')
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
     
     query = User.query
+    relevance = None
     
     if keyword:
-        query = query.filter(
-            db.or_(
-                User.username.contains(keyword),
-                User.name.contains(keyword),
-                User.phone.contains(keyword)
-            )
-        )
-    
-    pagination = query.order_by(User.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+        query, relevance = match_keyword(query, User, ('username', 'name', 'phone'), keyword)
+    
+    query, fields = _select_fields(query)
+    items, meta = paginate(query, User.created_at, User.id, relevance=relevance)
     
-    users = [user.to_dict() for user in pagination.items]
+    users = [user.to_dict(fields) for user in items]
     
     return jsonify({
         'success': True,
         'users': users,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
+        **meta
     })
\ No newline at end of file
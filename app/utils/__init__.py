@@ -0,0 +1,5 @@
+from app.utils.pagination import paginate, paginate_async
+from app.utils.search import match_keyword
+from app.utils.passwords import password_hasher, PasswordHashBusy
+
+__all__ = ['paginate', 'paginate_async', 'match_keyword', 'password_hasher', 'PasswordHashBusy']
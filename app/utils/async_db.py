@@ -0,0 +1,87 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.replica import replica_bind
+from app.utils.metrics import metrics
+from app.utils.query_budget import query_guard
+from app.utils.storage import apply_sqlite_pragmas
+
+# 同步驱动对应的异步驱动
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def async_database_uri(database_uri):
+    """由同步连接串推导异步驱动连接串"""
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'不支持异步访问的数据库: {backend}')
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+class AsyncDatabase:
+    """ASGI 模式下读接口使用的异步数据库引擎
+
+    与 Flask-SQLAlchemy 共用同一数据库、模型和连接池参数，未配置
+    ASYNC_DATABASE_URI 时按 SQLALCHEMY_DATABASE_URI 推导异步驱动。
+    配置了只读副本时另建副本引擎，被路由到副本的请求从副本读取。
+    引擎在首次使用时创建，绑定到当前事件循环。
+    """
+
+    def __init__(self, app=None):
+        self.uri = None
+        self.replica_uri = None
+        self.options = {}
+        self.pragmas = {}
+        self._engines = {}
+        self._sessionmakers = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._engines = {}
+        self._sessionmakers = {}
+        self.uri = app.config.get('ASYNC_DATABASE_URI') or \
+            async_database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+        replica = (app.config.get('SQLALCHEMY_BINDS') or {}).get(app.config['REPLICA_BIND'])
+        if isinstance(replica, dict):
+            replica = replica['url']
+        self.replica_uri = async_database_uri(replica) if replica else None
+        self.options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        self.pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+        app.extensions['async_db'] = self
+
+    def _create_engine(self, uri):
+        engine = create_async_engine(uri, **self.options)
+        if self.pragmas and engine.dialect.name == 'sqlite':
+            apply_sqlite_pragmas(engine.sync_engine, self.pragmas)
+        if metrics.enabled:
+            metrics.instrument_engine(engine.sync_engine)
+        if query_guard.mode != 'off':
+            query_guard.instrument_engine(engine.sync_engine)
+        self._engines[uri] = engine
+        self._sessionmakers[uri] = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    @property
+    def engine(self):
+        if self.uri not in self._engines:
+            self._create_engine(self.uri)
+        return self._engines[self.uri]
+
+    def session(self):
+        """新建 AsyncSession，用法：async with async_db.session() as session"""
+        uri = self.replica_uri if self.replica_uri and replica_bind() else self.uri
+        if uri not in self._engines:
+            self._create_engine(uri)
+        return self._sessionmakers[uri]()
+
+    async def dispose(self):
+        engines, self._engines, self._sessionmakers = self._engines, {}, {}
+        for engine in engines.values():
+            await engine.dispose()
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,98 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+from app import db
+
+# 默认管理员账户
+DEFAULT_ADMIN_USERNAME = 'admin'
+DEFAULT_ADMIN_PASSWORD = 'admin123'
+
+
+def init_database(app, admin_password=DEFAULT_ADMIN_PASSWORD):
+    """建表（补建缺失的列和索引），初始化全文索引和统计计数器，创建默认管理员账户
+
+    可重复执行，已存在的表、索引、计数器和管理员账户保持不变。
+    """
+    with app.app_context():
+        # 只在主库建表，只读副本的内容由主库复制而来
+        db.create_all(bind_key=None)
+        # create_all 也不会为已存在的表补建后来新增的列
+        added = add_missing_columns()
+        # create_all 不会为已存在的表补建后来新增的索引
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+        # 初始化全文索引
+        from app.utils.search import init_fulltext_index
+        init_fulltext_index(app)
+        # 初始化统计计数器
+        from app.models.stats import StatCounter
+        if added or not StatCounter.query.first():
+            StatCounter.reconcile()
+        ensure_admin(admin_password)
+
+
+def _backfill_overdue():
+    """标记已到期未还的记录"""
+    from app.models.borrow import BorrowRecord
+    BorrowRecord.sweep_overdue()
+
+
+def _backfill_active_loans():
+    """按未归还记录统计各用户的在借数量"""
+    from app.models.user import User
+    User.reconcile_active_loans()
+
+
+# 建表后新增的列：(表名, 列名, 回填函数)。新列须可为空或带 server_default
+ADDED_COLUMNS = [
+    ('borrow_records', 'overdue', _backfill_overdue),
+    ('users', 'active_loans', _backfill_active_loans),
+]
+
+
+def add_missing_columns():
+    """为旧版本创建的表补建 ADDED_COLUMNS 中缺失的列并回填数据，返回补建的列
+
+    补建后由 init_database 重新校准统计计数器。
+    """
+    inspector = db.inspect(db.engine)
+    added = []
+    for table_name, column_name, backfill in ADDED_COLUMNS:
+        existing = {column['name'] for column in inspector.get_columns(table_name)}
+        if column_name in existing:
+            continue
+        column = db.metadata.tables[table_name].c[column_name]
+        ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+        with db.engine.begin() as connection:
+            connection.execute(db.text(f'ALTER TABLE {table_name} ADD COLUMN {ddl}'))
+        backfill()
+        db.session.commit()
+        added.append(f'{table_name}.{column_name}')
+    return added
+
+
+def ensure_admin(password=DEFAULT_ADMIN_PASSWORD):
+    """默认管理员账户不存在时创建，返回是否新建
+
+    多个进程同时执行时由用户名唯一约束保证只创建一个。
+    """
+    from app.models.stats import StatCounter
+    from app.models.user import User
+    if User.query.filter_by(username=DEFAULT_ADMIN_USERNAME).first():
+        return False
+
+    admin = User(
+        username=DEFAULT_ADMIN_USERNAME,
+        name='管理员',
+        phone='10000000000',
+        role='admin'
+    )
+    admin.set_password(password)
+    db.session.add(admin)
+    StatCounter.increment(StatCounter.USERS)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
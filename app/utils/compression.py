@@ -0,0 +1,108 @@
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，未安装时只提供 gzip
+    brotli = None
+
+# 压缩的响应类型，图片等已压缩的内容不再压缩
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/plain',
+    'text/html',
+    'text/yaml',
+}
+
+
+class Compressor:
+    """按 Accept-Encoding 压缩响应体
+
+    响应体达到 COMPRESS_MIN_SIZE 字节时，按客户端可接受的编码压缩（质量值相同时
+    按 COMPRESS_ALGORITHMS 的顺序优先），br 需要安装 brotli。流式响应（导出）逐块
+    压缩并立即刷出，不等待全部生成。已设置 Content-Encoding 的响应（预压缩的
+    OpenAPI 文档）保持不变。压缩后的强 ETag 改为弱 ETag，与未压缩的表示区分。
+    """
+
+    def __init__(self, app=None):
+        self.algorithms = ()
+        self.min_size = 1024
+        self.level = 6
+        self.brotli_quality = 4
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        algorithms = [
+            name.strip() for name in app.config['COMPRESS_ALGORITHMS'].split(',') if name.strip()
+        ]
+        for name in algorithms:
+            if name not in ('br', 'gzip'):
+                raise ValueError(f'未知的压缩算法: {name}')
+        # 未安装 brotli 时跳过 br
+        self.algorithms = tuple(name for name in algorithms if name != 'br' or brotli is not None)
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.level = app.config['COMPRESS_LEVEL']
+        self.brotli_quality = app.config['COMPRESS_BROTLI_QUALITY']
+        if self.algorithms:
+            app.after_request(self._after_request)
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, self.level, mtime=0)
+
+    def _stream(self, chunks, encoding):
+        """逐块压缩，每块都刷出，客户端可以边下载边解压"""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            compress = compressor.compress
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            finish = compressor.flush
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                data = compress(chunk) + flush()
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def _after_request(self, response):
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough \
+                or 'Content-Encoding' in response.headers \
+                or response.status_code < 200 or response.status_code in (204, 304):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(self.algorithms)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(self.compress(data, encoding))
+        response.content_encoding = encoding
+
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compressor = Compressor()
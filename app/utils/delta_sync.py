@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from flask import request, jsonify, abort, make_response, current_app
+from app import db
+from app.models.book import Book, BookTombstone
+from app.utils.pagination import _encode_cursor, _decode_cursor
+
+
+def _after(query, time_column, id_column, position):
+    """(时间, ID) 严格大于 position 的记录"""
+    timestamp, last_id = position
+    return query.filter(db.or_(
+        time_column > timestamp,
+        db.and_(time_column == timestamp, id_column > last_id)
+    ))
+
+
+def _parse_request():
+    """解析 since 和 limit 参数，返回 (起始位置或 None, 条数上限, 是否需要全量重建)"""
+    max_limit = current_app.config['DELTA_SYNC_LIMIT']
+    limit = min(max(request.args.get('limit', max_limit, type=int), 1), max_limit)
+
+    since = request.args.get('since', '')
+    if not since:
+        return None, limit, True
+    try:
+        position = _decode_cursor(since)
+    except (ValueError, TypeError):
+        abort(make_response(jsonify({'success': False, 'message': '无效的同步水位'}), 400))
+
+    # 删除记录只保留 BOOK_TOMBSTONE_RETENTION_DAYS 天，更早的水位可能错过删除，需全量重建
+    horizon = datetime.utcnow() - timedelta(days=current_app.config['BOOK_TOMBSTONE_RETENTION_DAYS'])
+    if position[0] < horizon:
+        return None, limit, True
+    return position, limit, False
+
+
+def collect_changes(query):
+    """按请求中的水位收集图书变更，返回 (变更的图书, 删除的图书 ID, 响应附加字段)
+
+    图书按 (updated_at, id)、删除记录按 (deleted_at, book_id) 合并排序后取前 limit 条，
+    新水位为最后一条的位置，客户端下次以 since=水位 请求即可接着同步。
+    只返回 DELTA_SYNC_LAG 秒之前的变更：时间戳在事务提交前生成，留出的间隔
+    保证较早开始、较晚提交的事务不会落在已返回的水位之前。
+
+    query 为图书查询（可带 load_only 等选项）；未携带 since 或水位早于
+    删除记录的保留期限时从头开始，reset 为 true，客户端应先清空本地缓存。
+    """
+    position, limit, reset = _parse_request()
+    upper = datetime.utcnow() - timedelta(seconds=current_app.config['DELTA_SYNC_LAG'])
+
+    rows = query.filter(Book.updated_at <= upper)
+    deletions = BookTombstone.query.filter(BookTombstone.deleted_at <= upper)
+    if position is not None:
+        rows = _after(rows, Book.updated_at, Book.id, position)
+        deletions = _after(deletions, BookTombstone.deleted_at, BookTombstone.book_id, position)
+    rows = rows.order_by(Book.updated_at, Book.id).limit(limit + 1).all()
+    deletions = deletions.order_by(BookTombstone.deleted_at, BookTombstone.book_id).limit(limit + 1).all()
+
+    changes = sorted(
+        [(row.updated_at, row.id, row) for row in rows]
+        + [(item.deleted_at, item.book_id, None) for item in deletions],
+        key=lambda change: change[:2]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    # 同一 ID 先删除后被新图书复用（或反之）时只保留较晚的状态
+    latest = {}
+    for timestamp, row_id, row in changes:
+        latest[row_id] = row
+    items = [row for row in latest.values() if row is not None]
+    deleted = [row_id for row_id, row in latest.items() if row is None]
+
+    watermark = (upper, 0)
+    if changes and (has_more or changes[-1][:2] > watermark):
+        watermark = changes[-1][:2]
+
+    return items, deleted, {
+        'watermark': _encode_cursor(*watermark),
+        'has_more': has_more,
+        'reset': reset
+    }
@@ -0,0 +1,183 @@
+import asyncio
+import secrets
+import threading
+import time
+from collections import deque
+from flask import current_app
+
+
+class Event:
+    """已发布的变更事件，SSE 报文在发布时编码一次，所有订阅者共享"""
+
+    __slots__ = ('id', 'type', 'user_id', 'message')
+
+    def __init__(self, event_id, event_type, data, user_id):
+        self.id = event_id
+        self.type = event_type
+        self.user_id = user_id
+        self.message = (
+            f'id: {event_id}\nevent: {event_type}\ndata: {current_app.json.dumps(data)}\n\n'
+        ).encode()
+
+
+class Subscription:
+    """一个 SSE 连接的事件缓冲区
+
+    缓冲区最多保存 buffer_size 个事件；客户端读取过慢导致缓冲区写满时清空缓冲区
+    并标记 overflowed，由连接发送 resync 事件通知客户端重新拉取列表。
+    """
+
+    def __init__(self, user_id, is_admin, buffer_size):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.buffer_size = buffer_size
+        self.overflowed = False
+        self.waker = None  # 协程等待时由 put 在发布线程中调用
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def visible(self, event):
+        """借阅类事件只推送给管理员和借阅人本人"""
+        return event.user_id is None or self.is_admin or event.user_id == self.user_id
+
+    def put(self, event):
+        with self._lock:
+            if len(self._events) >= self.buffer_size:
+                self._events.clear()
+                self.overflowed = True
+            else:
+                self._events.append(event)
+            waker = self.waker
+        if waker is not None:
+            waker()
+
+    async def get(self, timeout):
+        """等待并取出缓冲的事件，返回 (事件列表, 是否溢出)；超时返回空列表
+
+        等待期间不占用线程，发布线程通过 waker 唤醒事件循环。
+        """
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+        with self._lock:
+            if self._events or self.overflowed:
+                return self._take()
+            self.waker = wake
+        try:
+            await asyncio.wait_for(ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.waker = None
+        with self._lock:
+            return self._take()
+
+    def _take(self):
+        events = list(self._events)
+        self._events.clear()
+        overflowed, self.overflowed = self.overflowed, False
+        return events, overflowed
+
+
+class ChangeFeed:
+    """进程内变更事件发布/订阅
+
+    写接口提交事务后调用 publish，事件按发布顺序编号并推送给当前进程的所有
+    SSE 连接。最近 EVENTS_HISTORY 个事件保留在内存中，客户端断线重连时按
+    Last-Event-ID 补发；编号包含进程启动时生成的前缀，重启后的旧编号无法补发，
+    客户端收到 resync 后重新拉取。多进程部署时每个连接只能收到所在进程的事件。
+    """
+
+    def __init__(self, app=None):
+        self.buffer_size = 100
+        self.max_clients = 8
+        self._epoch = secrets.token_hex(4)
+        self._sequence = 0
+        self._history = deque(maxlen=256)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.buffer_size = app.config['EVENTS_BUFFER_SIZE']
+        self.max_clients = app.config['EVENTS_MAX_CLIENTS']
+        with self._lock:
+            self._history = deque(self._history, maxlen=app.config['EVENTS_HISTORY'])
+
+    def _parse_id(self, event_id):
+        """返回本进程事件编号的序号，其他进程或重启前的编号返回 None"""
+        epoch, _, sequence = (event_id or '').partition('-')
+        if epoch != self._epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def publish(self, event_type, data, user_id=None):
+        """发布事件；user_id 不为空时只推送给该用户和管理员"""
+        with self._lock:
+            self._sequence += 1
+            event = Event(f'{self._epoch}-{self._sequence}', event_type, data, user_id)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.visible(event):
+                subscription.put(event)
+
+    def subscribe(self, user_id, is_admin, last_event_id=None):
+        """注册订阅，连接数已满时返回 None
+
+        携带 Last-Event-ID 时把历史中之后的事件放入缓冲区；编号无法识别或
+        已不在历史中时标记 overflowed，客户端会先收到 resync。
+        """
+        subscription = Subscription(user_id, is_admin, self.buffer_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            if last_event_id:
+                sequence = self._parse_id(last_event_id)
+                oldest = self._parse_id(self._history[0].id) if self._history else self._sequence + 1
+                if sequence is None or sequence < oldest - 1 or sequence > self._sequence:
+                    subscription.overflowed = True
+                else:
+                    for event in self._history:
+                        if self._parse_id(event.id) > sequence and subscription.visible(event):
+                            subscription.put(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    async def stream(self, subscription, heartbeat, lifetime):
+        """SSE 响应体（异步生成器）：推送事件，空闲时每 heartbeat 秒发送注释保活；
+
+        连接保持 lifetime 秒后结束，EventSource 会携带 Last-Event-ID 自动重连。
+        等待事件时不占用线程，只能由 ASGI 模式输出。
+        """
+        deadline = time.monotonic() + lifetime
+        try:
+            yield b'retry: 3000\n\n'
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                events, overflowed = await subscription.get(min(heartbeat, remaining))
+                if overflowed:
+                    yield b'event: resync\ndata: {}\n\n'
+                if events:
+                    yield b''.join(event.message for event in events)
+                elif not overflowed:
+                    yield b': keepalive\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,89 @@
+from flask import request, jsonify, abort, make_response
+from app import db
+
+
+def _bad_request(message):
+    abort(make_response(jsonify({'success': False, 'message': message}), 400))
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def _check_fields(model, names, prefix=''):
+    unknown = [name for name in names if name not in model.FIELDS]
+    if unknown:
+        _bad_request('未知字段: ' + ', '.join(prefix + name for name in unknown))
+    # id 始终输出，保持请求中的字段顺序
+    return tuple(dict.fromkeys(('id', *names)))
+
+
+def parse_fieldset(model, relations=()):
+    """解析请求中的 fields 和 expand 参数
+
+    fields 为逗号分隔的输出字段（见模型的 FIELDS），关联对象的字段写作
+    “关联名.字段”，如 fields=id,status,book.title；expand 为需要嵌入的关联对象，
+    如 expand=user,book。relations 为允许展开的关联名。
+
+    返回 (fields, expand)：fields 为字段元组，未指定时为 None（输出全部字段）；
+    expand 为 {关联名: 字段元组或 None}。两个参数都未指定时展开全部关联，
+    与不带参数的完整输出一致；指定了 fields 时只展开 expand 中或 fields 中
+    带前缀出现的关联。参数无效时返回 400。
+    """
+    fields_arg = request.args.get('fields')
+    expand_arg = request.args.get('expand')
+    if fields_arg is None and expand_arg is None:
+        return None, dict.fromkeys(relations)
+
+    own = []
+    nested = {}
+    for name in _split(fields_arg or ''):
+        relation, dot, field = name.partition('.')
+        if dot:
+            if relation not in relations:
+                _bad_request(f'不能展开: {relation}')
+            nested.setdefault(relation, []).append(field)
+        else:
+            own.append(name)
+
+    expand = {}
+    for relation in _split(expand_arg or ''):
+        if relation not in relations:
+            _bad_request(f'不能展开: {relation}')
+        expand[relation] = None
+    for relation, names in nested.items():
+        related = getattr(model, relation).property.mapper.class_
+        expand[relation] = _check_fields(related, names, relation + '.')
+
+    fields = _check_fields(model, own) if fields_arg is not None else None
+    return fields, expand
+
+
+def _columns(model, fields):
+    names = {'id'}
+    for field in fields:
+        names.update(model.FIELDS[field][0])
+    return [getattr(model, name) for name in sorted(names)]
+
+
+def select_fieldset(query, model, fields, expand=None, required=()):
+    """按字段集只加载需要的列，并以 selectinload 预加载展开的关联对象
+
+    required 为字段之外必须加载的列，如分页排序用的列。
+    """
+    if fields is not None:
+        columns = _columns(model, fields)
+        # 展开关联需要本表的外键列
+        for relation in expand or ():
+            columns.extend(
+                getattr(model, column.key) for column in getattr(model, relation).property.local_columns
+            )
+        query = query.options(db.load_only(*columns, *required))
+
+    for relation, relation_fields in (expand or {}).items():
+        loader = db.selectinload(getattr(model, relation))
+        if relation_fields is not None:
+            related = getattr(model, relation).property.mapper.class_
+            loader = loader.load_only(*_columns(related, relation_fields))
+        query = query.options(loader)
+    return query
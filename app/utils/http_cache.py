@@ -0,0 +1,164 @@
+import hashlib
+import inspect
+import threading
+import time
+from functools import wraps
+from flask import current_app, request, make_response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.utils.cache import TTLCache
+
+# 图书目录接口的响应缓存：(目录版本, 接口, 参数) -> (状态码, 响应体, Content-Type)
+response_cache = TTLCache()
+
+
+class CatalogueGeneration:
+    """图书目录版本号
+
+    版本号保存在 stat_counters 表中，随目录写操作在同一事务内递增，多进程共享。
+    各进程在本地缓存读取结果，最多每 poll_interval 秒回表一次；本进程提交了
+    目录变更后立即失效本地缓存。
+    """
+
+    def __init__(self):
+        self.poll_interval = 1.0
+        self._lock = threading.Lock()
+        # 绑定名（主库为 None）-> (版本号, 回表时间)；读副本的请求使用副本上的版本号，
+        # 避免把副本上的旧数据缓存在主库的新版本号下
+        self._values = {}
+
+    def _cached(self, bind):
+        with self._lock:
+            value, checked_at = self._values.get(bind, (None, 0.0))
+            if value is not None and time.monotonic() - checked_at < self.poll_interval:
+                return value
+        return None
+
+    def _store(self, bind, value, checked_at):
+        with self._lock:
+            self._values[bind] = (value, checked_at)
+        return value
+
+    def current(self):
+        from app.replica import replica_bind
+        bind = replica_bind()
+        value = self._cached(bind)
+        if value is not None:
+            return value
+        from app.models.stats import StatCounter
+        checked_at = time.monotonic()
+        return self._store(bind, StatCounter.value_of(StatCounter.CATALOGUE_GENERATION), checked_at)
+
+    async def current_async(self):
+        """current 的异步版本，回表时使用异步数据库会话"""
+        from app.replica import replica_bind
+        bind = replica_bind()
+        value = self._cached(bind)
+        if value is not None:
+            return value
+        from app import db
+        from app.models.stats import StatCounter
+        from app.utils.async_db import async_db
+        checked_at = time.monotonic()
+        async with async_db.session() as session:
+            value = await session.scalar(
+                db.select(StatCounter.value).where(StatCounter.name == StatCounter.CATALOGUE_GENERATION)
+            )
+        return self._store(bind, value or 0, checked_at)
+
+    def invalidate(self):
+        with self._lock:
+            self._values.clear()
+
+    def bump(self):
+        """在当前事务中递增版本号，提交后本进程立即可见"""
+        from app import db
+        from app.models.stats import StatCounter
+        StatCounter.increment(StatCounter.CATALOGUE_GENERATION)
+        db.session.info['catalogue_changed'] = True
+
+
+catalogue_generation = CatalogueGeneration()
+
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_catalogue_generation(session):
+    if session.info.pop('catalogue_changed', False):
+        catalogue_generation.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_catalogue_change(session):
+    session.info.pop('catalogue_changed', None)
+
+
+def init_response_cache(app):
+    response_cache.configure(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL'])
+    catalogue_generation.poll_interval = app.config['CATALOGUE_GENERATION_POLL']
+    catalogue_generation.invalidate()
+
+
+def _cache_key():
+    """按目录版本号之外的请求内容生成缓存键"""
+    params = tuple(sorted(request.args.items(multi=True)))
+    return request.endpoint, tuple(sorted(request.view_args.items())), params
+
+
+def _cached_response(key, etag):
+    """命中 If-None-Match 或响应缓存时直接返回响应，否则返回 None"""
+    # 压缩后的响应为弱 ETag，If-None-Match 按弱比较
+    if request.if_none_match.contains_weak(etag):
+        return current_app.response_class(status=304)
+    cached = response_cache.get(key)
+    if cached is not None:
+        status, body, mimetype = cached
+        return current_app.response_class(body, status=status, mimetype=mimetype)
+    return None
+
+
+def _finalize(response, etag):
+    response.set_etag(etag)
+    # 需要登录的接口，只允许客户端私有缓存且每次都需校验
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def catalogue_cached(view):
+    """图书目录读接口的响应缓存装饰器
+
+    以目录版本号和规范化后的查询参数生成 ETag（压缩后改为弱 ETag）。请求带 If-None-Match 且
+    版本未变时直接返回 304，不查询数据库；否则优先返回缓存的响应体。
+    同时支持同步视图和 ASGI 模式下的协程视图。
+    """
+    if inspect.iscoroutinefunction(view):
+        @wraps(view)
+        async def decorated_coroutine(*args, **kwargs):
+            if not response_cache.enabled:
+                return await view(*args, **kwargs)
+
+            key = (await catalogue_generation.current_async(), *_cache_key())
+            etag = hashlib.sha1(repr(key).encode()).hexdigest()
+            response = _cached_response(key, etag)
+            if response is None:
+                response = make_response(await view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response_cache.set(key, (200, response.get_data(), response.mimetype))
+            return _finalize(response, etag)
+        return decorated_coroutine
+
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        if not response_cache.enabled:
+            return view(*args, **kwargs)
+
+        key = (catalogue_generation.current(), *_cache_key())
+        etag = hashlib.sha1(repr(key).encode()).hexdigest()
+        response = _cached_response(key, etag)
+        if response is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            response_cache.set(key, (200, response.get_data(), response.mimetype))
+        return _finalize(response, etag)
+    return decorated_function
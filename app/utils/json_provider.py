@@ -0,0 +1,79 @@
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库 json
+    orjson = None
+
+
+def _default(o):
+    """日期时间输出为 ISO 8601（Flask 默认为 HTTP 日期格式），其余类型沿用 Flask 的处理"""
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """标准库 json 编码
+
+    模型的 to_dict 直接输出 datetime，由编码器统一转换为 ISO 8601。
+    按字段定义顺序输出，不转义中文。
+    """
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+    sort_keys = False
+
+
+class OrjsonProvider(JSONProvider):
+    """orjson 编码，输出内容与 JSONProvider 一致
+
+    jsonify 直接使用 orjson 生成的字节串作为响应体，不再经过 str 转换。
+    """
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps(obj, kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def _dumps(self, obj, kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get('sort_keys'):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # 与 Flask 一致：调试模式下缩进输出，末尾换行
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            self._dumps(obj, {'indent': indent}) + b'\n', mimetype=self.mimetype
+        )
+
+
+PROVIDERS = {
+    'json': JSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+
+def init_json_provider(app):
+    """按 JSON_PROVIDER 配置替换应用的 JSON 编码
+
+    取值为 auto（安装了 orjson 时使用 orjson，否则使用标准库）、json、orjson，
+    或 flask.json.provider.JSONProvider 的子类。
+    """
+    provider = app.config['JSON_PROVIDER']
+    if provider == 'auto':
+        provider = 'orjson' if orjson is not None else 'json'
+    if isinstance(provider, str):
+        if provider not in PROVIDERS:
+            raise ValueError(f'未知的 JSON_PROVIDER: {provider}')
+        if provider == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_PROVIDER=orjson 需要安装 orjson')
+        provider = PROVIDERS[provider]
+    app.json = provider(app)
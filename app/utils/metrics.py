@@ -0,0 +1,218 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+
+# 直方图分桶上界
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# 当前请求的 SQL 统计 [语句数, 耗时]，请求之外（后台任务等）为 None
+_request_sql = ContextVar('request_sql', default=None)
+
+
+class Histogram:
+    """固定分桶的直方图，调用方负责加锁"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        """按 Prometheus 格式输出累计分桶、总和和次数"""
+        cumulative = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            cumulative += count
+            yield f'{name}_bucket', {**labels, 'le': _format_value(bound)}, cumulative
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, self.count
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+
+class Metrics:
+    """请求与数据库指标
+
+    通过请求钩子记录各接口的请求数、耗时和响应大小，通过 SQLAlchemy 引擎
+    事件统计每个请求执行的 SQL 语句数和耗时。指标保存在进程内，由 /metrics
+    以 Prometheus 文本格式输出；多进程部署时需逐个进程抓取。
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._engines = set()
+        self.reset()
+        if app is not None:
+            self.init_app(app)
+
+    def reset(self):
+        with self._lock:
+            self._requests = {}
+            self._latency = {}
+            self._sql_count = {}
+            self._sql_seconds = {}
+            self._response_size = {}
+            self._statements = 0
+            self._statement_seconds = 0.0
+
+    def init_app(self, app):
+        self.enabled = app.config['METRICS_ENABLED']
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+        from app import db
+        with app.app_context():
+            for engine in db.engines.values():
+                self.instrument_engine(engine)
+        app.extensions['metrics'] = self
+
+    def instrument_engine(self, engine):
+        """为引擎注册语句计数与计时事件（同一引擎只注册一次）"""
+        if engine in self._engines:
+            return
+        self._engines.add(engine)
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_started_at', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_started_at'].pop()
+        current = _request_sql.get()
+        if current is not None:
+            current[0] += 1
+            current[1] += elapsed
+        with self._lock:
+            self._statements += 1
+            self._statement_seconds += elapsed
+
+    @staticmethod
+    def _before_request():
+        g.metrics_started_at = time.perf_counter()
+        _request_sql.set([0, 0.0])
+
+    def _after_request(self, response):
+        started_at = g.pop('metrics_started_at', None)
+        if started_at is None:
+            return response
+        elapsed = time.perf_counter() - started_at
+        statements, sql_seconds = _request_sql.get() or (0, 0.0)
+        _request_sql.set(None)
+
+        endpoint = request.endpoint or 'unmatched'
+        key = (endpoint, request.method, response.status_code)
+        # 流式响应在此时尚未生成响应体，不计大小
+        size = None if response.is_streamed else response.calculate_content_length()
+
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._observe(self._latency, endpoint, LATENCY_BUCKETS, elapsed)
+            self._observe(self._sql_count, endpoint, STATEMENT_BUCKETS, statements)
+            self._observe(self._sql_seconds, endpoint, LATENCY_BUCKETS, sql_seconds)
+            if size is not None:
+                self._observe(self._response_size, endpoint, SIZE_BUCKETS, size)
+        return response
+
+    @staticmethod
+    def _observe(histograms, endpoint, buckets, value):
+        histogram = histograms.get(endpoint)
+        if histogram is None:
+            histogram = histograms[endpoint] = Histogram(buckets)
+        histogram.observe(value)
+
+    def _families(self):
+        """产出 (指标名, 类型, 说明, [(样本名, 标签, 值)])"""
+        with self._lock:
+            yield 'bms_http_requests_total', 'counter', '请求数', [
+                ('bms_http_requests_total', {'endpoint': e, 'method': m, 'status': s}, n)
+                for (e, m, s), n in sorted(self._requests.items())
+            ]
+            for name, description, histograms in (
+                ('bms_http_request_duration_seconds', '请求处理耗时（秒）', self._latency),
+                ('bms_http_response_size_bytes', '响应体大小（字节，压缩后，不含流式响应）', self._response_size),
+                ('bms_db_statements_per_request', '每个请求执行的 SQL 语句数', self._sql_count),
+                ('bms_db_seconds_per_request', '每个请求的 SQL 执行耗时（秒）', self._sql_seconds),
+            ):
+                samples = []
+                for endpoint, histogram in sorted(histograms.items()):
+                    samples.extend(histogram.samples(name, {'endpoint': endpoint}))
+                yield name, 'histogram', description, samples
+            yield 'bms_db_statements_total', 'counter', 'SQL 语句总数（含后台任务）', [
+                ('bms_db_statements_total', {}, self._statements)
+            ]
+            yield 'bms_db_statement_seconds_total', 'counter', 'SQL 执行总耗时（秒）', [
+                ('bms_db_statement_seconds_total', {}, self._statement_seconds)
+            ]
+
+        from app.models.user import user_cache
+        from app.utils.http_cache import response_cache
+        from app.utils.passwords import password_hasher
+
+        caches = {'user': user_cache.stats(), 'response': response_cache.stats()}
+        for field, kind, description in (
+            ('hits', 'counter', '缓存命中次数'),
+            ('misses', 'counter', '缓存未命中次数'),
+            ('evictions', 'counter', '缓存淘汰次数'),
+            ('size', 'gauge', '缓存条目数'),
+            ('hit_ratio', 'gauge', '缓存命中率'),
+        ):
+            name = f'bms_cache_{field}' + ('_total' if kind == 'counter' else '')
+            yield name, kind, description, [
+                (name, {'cache': cache}, stats[field]) for cache, stats in caches.items()
+            ]
+
+        hasher = password_hasher.stats()
+        for field, kind, description in (
+            ('completed', 'counter', '已完成的密码哈希次数'),
+            ('rejected', 'counter', '排队超时被拒绝的密码哈希次数'),
+            ('rehashed', 'counter', '登录时按新参数重新哈希的次数'),
+            ('seconds', 'counter', '密码哈希累计耗时（秒）'),
+            ('in_flight', 'gauge', '正在计算和排队的密码哈希数'),
+            ('queue_depth', 'gauge', '排队等待的密码哈希数'),
+            ('workers', 'gauge', '密码哈希并发数'),
+        ):
+            name = f'bms_password_hash_{field}' + ('_total' if kind == 'counter' else '')
+            yield name, kind, description, [(name, {}, hasher[field])]
+
+    def render(self):
+        """Prometheus 文本格式"""
+        lines = []
+        for name, kind, description, samples in self._families():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample, labels, value in samples:
+                lines.append(f'{sample}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -0,0 +1,148 @@
+import base64
+import json
+import math
+from datetime import datetime
+from flask import request, jsonify, abort, make_response
+from app import db
+
+
+def _encode_cursor(sort_value, row_id):
+    """将排序键编码为不透明游标"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """解析游标，返回 (排序值, ID)"""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return datetime.fromisoformat(sort_value), int(row_id)
+
+
+def _wants_total():
+    return request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
+
+
+def _ordering(sort_column, id_column, descending):
+    if descending:
+        return sort_column.desc(), id_column.desc()
+    return sort_column.asc(), id_column.asc()
+
+
+def _after_cursor(query, sort_column, id_column, descending):
+    """按请求中的游标过滤出其后的记录，游标无效时返回 400"""
+    cursor = request.args.get('cursor', '')
+    if not cursor:
+        return query
+    try:
+        sort_value, last_id = _decode_cursor(cursor)
+    except (ValueError, TypeError):
+        abort(make_response(jsonify({'success': False, 'message': '无效的游标'}), 400))
+    if descending:
+        return query.filter(db.or_(
+            sort_column < sort_value,
+            db.and_(sort_column == sort_value, id_column < last_id)
+        ))
+    return query.filter(db.or_(
+        sort_column > sort_value,
+        db.and_(sort_column == sort_value, id_column > last_id)
+    ))
+
+
+def _cursor_page(rows, per_page, sort_column, id_column, meta):
+    """截取多查询的一行判断是否还有下一页，生成 next_cursor"""
+    items = rows[:per_page]
+    has_more = len(rows) > per_page
+
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        next_cursor = _encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    meta.update({'next_cursor': next_cursor, 'has_more': has_more})
+    return items, meta
+
+
+def paginate(query, sort_column, id_column, descending=True, relevance=None):
+    """按请求参数分页
+
+    默认使用页码分页（page/per_page），返回 total/pages/current_page；
+    请求中带有 cursor 参数（首页可为空）时使用游标分页，按 (sort_column, id)
+    定位，不执行 OFFSET 和 COUNT，返回 next_cursor，仅在 include_total=true
+    时附带 total。
+
+    relevance 为全文检索的相关度表达式，页码分页时优先按其排序；游标分页
+    始终按 (sort_column, id) 排序，以保证游标稳定。
+
+    返回 (items, meta)，meta 直接合并到响应 JSON 中。
+    """
+    per_page = request.args.get('per_page', 10, type=int)
+    ordering = _ordering(sort_column, id_column, descending)
+
+    if 'cursor' not in request.args:
+        page = request.args.get('page', 1, type=int)
+        page_ordering = ordering if relevance is None else (relevance, *ordering)
+        pagination = query.order_by(*page_ordering).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        return pagination.items, {
+            'total': pagination.total,
+            'pages': pagination.pages,
+            'current_page': page
+        }
+
+    per_page = max(per_page, 1)
+    meta = {}
+    if _wants_total():
+        meta['total'] = query.order_by(None).count()
+
+    query = _after_cursor(query, sort_column, id_column, descending)
+    rows = query.order_by(*ordering).limit(per_page + 1).all()
+    return _cursor_page(rows, per_page, sort_column, id_column, meta)
+
+
+async def _fetch_all(session, query):
+    return (await session.scalars(query.statement)).all()
+
+
+async def _fetch_count(session, query):
+    subquery = query.enable_eagerloads(False).order_by(None).statement.subquery()
+    return await session.scalar(db.select(db.func.count()).select_from(subquery))
+
+
+async def paginate_async(session, query, sort_column, id_column, descending=True, relevance=None):
+    """paginate 的异步版本
+
+    query 仍按同步接口的方式构建，只在 AsyncSession 上执行其 SQL 语句，
+    参数、排序和返回值与 paginate 相同。预加载需使用 selectinload，
+    序列化时不能再触发懒加载。
+    """
+    per_page = request.args.get('per_page', 10, type=int)
+    ordering = _ordering(sort_column, id_column, descending)
+
+    if 'cursor' not in request.args:
+        page = request.args.get('page', 1, type=int)
+        page_ordering = ordering if relevance is None else (relevance, *ordering)
+        # 与 Flask-SQLAlchemy 的 paginate(error_out=False) 取值一致
+        current_page = max(page, 1)
+        size = per_page if per_page >= 1 else 20
+        items = await _fetch_all(
+            session, query.order_by(*page_ordering).limit(size).offset((current_page - 1) * size)
+        )
+        total = await _fetch_count(session, query)
+        return items, {
+            'total': total,
+            'pages': math.ceil(total / size) if total else 0,
+            'current_page': page
+        }
+
+    per_page = max(per_page, 1)
+    meta = {}
+    if _wants_total():
+        meta['total'] = await _fetch_count(session, query)
+
+    query = _after_cursor(query, sort_column, id_column, descending)
+    rows = await _fetch_all(session, query.order_by(*ordering).limit(per_page + 1))
+    return _cursor_page(rows, per_page, sort_column, id_column, meta)
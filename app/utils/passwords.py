@@ -0,0 +1,120 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHashBusy(Exception):
+    """密码哈希排队已满"""
+
+
+class PasswordHasher:
+    """密码哈希后端
+
+    将 KDF 计算放到有界的线程池或进程池中执行，限制同时进行的哈希数量。
+    等待结果的请求线程也计入上限，没有空位时立即拒绝（或最多等待
+    PASSWORD_HASH_QUEUE_TIMEOUT 秒），登录高峰不会占满处理其他接口的请求线程。
+    未初始化或 executor 为 none 时在当前线程同步计算。
+    """
+
+    def __init__(self, app=None):
+        self.method = 'scrypt'
+        self.workers = 0
+        self._executor = None
+        self._slots = None
+        self._timeout = None
+        self._prefix = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'in_flight': 0,
+            'completed': 0,
+            'rejected': 0,
+            'rehashed': 0,
+            'seconds': 0.0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self._prefix = None
+
+        kind = app.config['PASSWORD_HASH_EXECUTOR']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        if kind == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        elif kind == 'thread':
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='password-hash'
+            )
+        elif kind == 'none':
+            self._executor = None
+        else:
+            raise ValueError(f'未知的密码哈希执行器: {kind}')
+
+        # 正在计算和排队的哈希总数上限，即同时阻塞在哈希上的请求线程数上限
+        self._slots = threading.BoundedSemaphore(
+            self.workers + app.config['PASSWORD_HASH_MAX_PENDING']
+        )
+        self._timeout = app.config['PASSWORD_HASH_QUEUE_TIMEOUT']
+        app.extensions['password_hasher'] = self
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _run(self, func, *args):
+        if self._executor is None:
+            return func(*args)
+
+        if self._timeout > 0:
+            acquired = self._slots.acquire(timeout=self._timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise PasswordHashBusy()
+
+        with self._lock:
+            self._stats['in_flight'] += 1
+        start = time.perf_counter()
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+            with self._lock:
+                self._stats['in_flight'] -= 1
+                self._stats['completed'] += 1
+                self._stats['seconds'] += time.perf_counter() - start
+
+    def hash(self, password):
+        """按当前配置生成密码哈希"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """校验密码"""
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """哈希参数与当前配置不一致时需要重新哈希"""
+        if self._prefix is None:
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def record_rehash(self):
+        with self._lock:
+            self._stats['rehashed'] += 1
+
+    def stats(self):
+        """哈希队列指标"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        stats['queue_depth'] = max(0, stats['in_flight'] - self.workers)
+        return stats
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,181 @@
+import re
+from collections import Counter
+from contextvars import ContextVar
+from flask import current_app, g, request
+from sqlalchemy import event
+
+# 当前正在记录的语句列表（请求级以及嵌套的 with query_budget(...) 块各一个）
+_recorders = ContextVar('query_budget_recorders', default=())
+
+_WHITESPACE = re.compile(r'\s+')
+# IN (?, ?, ...) 只是参数个数不同，视为同一形状
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\s*\)')
+
+
+def statement_shape(statement):
+    """语句形状：合并空白并折叠参数列表，参数值不同的同一查询形状相同"""
+    return _PLACEHOLDER_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+class QueryBudgetExceeded(AssertionError):
+    """请求或代码块执行的 SQL 超出预算"""
+
+    def __init__(self, label, problems, statements):
+        self.label = label
+        self.problems = problems
+        self.statements = statements
+        super().__init__(format_report(label, problems, statements))
+
+
+def format_report(label, problems, statements):
+    lines = [f'{label}: ' + '；'.join(problems)]
+    lines.extend(f'  {i}. {statement_shape(s)}' for i, s in enumerate(statements, 1))
+    return '\n'.join(lines)
+
+
+class query_budget:
+    """SQL 语句预算
+
+    作为视图装饰器（写在 route 下方）声明该接口处理一次请求最多执行的语句数，
+    由 query_guard 在测试和调试模式下逐请求检查；作为上下文管理器时检查
+    with 块内执行的语句，超出即抛出 QueryBudgetExceeded：
+
+        @book_bp.route('/<int:book_id>', methods=['GET'])
+        @query_budget(2)
+        @login_required
+        def get_book(book_id): ...
+
+        with query_budget(3, repeats=1):
+            client.get('/api/borrows')
+
+    statements 为语句总数上限（None 不限）；repeats 为同一形状语句的重复次数上限
+    （None 取 QUERY_BUDGET_REPEATS，0 不检查），用于发现逐行懒加载等 N+1 查询。
+    """
+
+    def __init__(self, statements, repeats=None):
+        self.statements = statements
+        self.repeats = repeats
+        self._tokens = []
+
+    def __call__(self, view):
+        view.query_budget = self
+        return view
+
+    def problems(self, statements, default_repeats=None):
+        """返回超出预算的描述列表，未超出时为空"""
+        problems = []
+        if self.statements is not None and len(statements) > self.statements:
+            problems.append(f'执行 {len(statements)} 条 SQL，预算 {self.statements} 条')
+        problems.extend(repeat_problems(
+            statements, default_repeats if self.repeats is None else self.repeats
+        ))
+        return problems
+
+    def __enter__(self):
+        from app import db
+        for engine in db.engines.values():
+            query_guard.instrument_engine(engine)
+        records = []
+        self._tokens.append((_recorders.set(_recorders.get() + (records,)), records))
+        return records
+
+    def __exit__(self, exc_type, exc, tb):
+        token, records = self._tokens.pop()
+        _recorders.reset(token)
+        if exc_type is not None:
+            return False
+        problems = self.problems(records, current_app.config.get('QUERY_BUDGET_REPEATS'))
+        if problems:
+            raise QueryBudgetExceeded('query_budget', problems, records)
+        return False
+
+
+def repeat_problems(statements, limit):
+    if not limit:
+        return []
+    return [
+        f'同一语句执行 {count} 次，上限 {limit} 次: {shape[:120]}'
+        for shape, count in Counter(map(statement_shape, statements)).most_common()
+        if count > limit
+    ]
+
+
+class QueryGuard:
+    """逐请求检查 SQL 预算
+
+    QUERY_BUDGET_MODE 为 raise（测试配置）时超出预算的请求抛出
+    QueryBudgetExceeded，测试客户端会直接失败；为 log（开发配置）时
+    记录警告并列出本次请求的全部语句；为 off 时不注册任何钩子。
+    未声明预算的接口只检查重复语句。流式响应只统计生成响应体之前的语句。
+    """
+
+    def __init__(self, app=None):
+        self.mode = 'off'
+        self._engines = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.mode = app.config['QUERY_BUDGET_MODE']
+        if self.mode == 'off':
+            return
+        if self.mode not in ('raise', 'log'):
+            raise ValueError(f'未知的 QUERY_BUDGET_MODE: {self.mode}')
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+        from app import db
+        with app.app_context():
+            for engine in db.engines.values():
+                self.instrument_engine(engine)
+        app.extensions['query_guard'] = self
+
+    def instrument_engine(self, engine):
+        """为引擎注册语句记录事件（同一引擎只注册一次）"""
+        if engine in self._engines:
+            return
+        self._engines.add(engine)
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        for records in _recorders.get():
+            records.append(statement)
+
+    @staticmethod
+    def _before_request():
+        records = []
+        g.query_budget_records = (records, _recorders.set(_recorders.get() + (records,)))
+
+    def _after_request(self, response):
+        if 'query_budget_records' not in g:
+            return response
+        statements = g.query_budget_records[0]
+
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        default_repeats = current_app.config['QUERY_BUDGET_REPEATS']
+        if budget is not None:
+            problems = budget.problems(statements, default_repeats)
+        else:
+            problems = repeat_problems(statements, default_repeats)
+        if not problems:
+            return response
+
+        label = f'{request.method} {request.path} ({request.endpoint})'
+        if self.mode == 'raise':
+            raise QueryBudgetExceeded(label, problems, statements)
+        current_app.logger.warning('SQL 超出预算 %s', format_report(label, problems, statements))
+        return response
+
+    @staticmethod
+    def _teardown_request(error):
+        # 在 teardown 中停止记录，异常中断的请求也不会留下记录列表
+        records = g.pop('query_budget_records', None)
+        if records is not None:
+            _recorders.reset(records[1])
+
+
+query_guard = QueryGuard()
@@ -0,0 +1,74 @@
+import threading
+
+
+def start_periodic_job(app, name, interval, func):
+    """在后台守护线程中按固定间隔执行任务
+
+    interval 为秒数，不大于 0 时不启动。任务在应用上下文中执行，
+    异常会记录日志但不会终止后续调度。
+    """
+    if not interval or interval <= 0:
+        return None
+
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            with app.app_context():
+                try:
+                    func()
+                except Exception:
+                    app.logger.exception('定时任务 %s 执行失败', name)
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    app.extensions.setdefault('periodic_jobs', {})[name] = stop
+    return stop
+
+
+def start_background_jobs(app):
+    """启动全部定时任务，同一应用只启动一次
+
+    由 SCHEDULER_ENABLED 开启的应用进程或 flask run-jobs 调用。任务都以
+    条件更新或整条 SQL 完成，但多个进程同时执行仍会重复工作，部署时应
+    只有一个进程运行。
+    """
+    if app.extensions.get('periodic_jobs'):
+        return
+    
+    # 定期校准统计计数器
+    from app.models.stats import StatCounter
+    start_periodic_job(
+        app, 'reconcile-stats', app.config['STATS_RECONCILE_INTERVAL'],
+        lambda: StatCounter.reconcile()
+    )
+    
+    # 定期标记逾期记录
+    from app.models.borrow import BorrowRecord
+    start_periodic_job(
+        app, 'sweep-overdue', app.config['OVERDUE_SWEEP_INTERVAL'],
+        lambda: BorrowRecord.sweep_overdue()
+    )
+    
+    # 定期归档已归还较久的借阅记录
+    start_periodic_job(
+        app, 'archive-borrows', app.config['BORROW_ARCHIVE_INTERVAL'],
+        lambda: BorrowRecord.archive_returned(
+            app.config['BORROW_ARCHIVE_AFTER_DAYS'], app.config['BORROW_ARCHIVE_BATCH_SIZE']
+        )
+    )
+    
+    # 定期清理过期的图书删除记录
+    from app.models.book import BookTombstone
+    start_periodic_job(
+        app, 'purge-tombstones', app.config['TOMBSTONE_PURGE_INTERVAL'],
+        lambda: BookTombstone.purge_expired(app.config['BOOK_TOMBSTONE_RETENTION_DAYS'])
+    )
+    
+    # 本地以 SQLite 文件充当只读副本时定期从主库复制
+    from app.replica import replica_router
+    if replica_router.enabled:
+        from app.replica import sync_sqlite_replica
+        start_periodic_job(
+            app, 'sync-replica', app.config['REPLICA_SYNC_INTERVAL'], sync_sqlite_replica
+        )
@@ -0,0 +1,107 @@
+from flask import current_app
+from sqlalchemy.exc import OperationalError
+from app import db
+
+# 全文索引表：索引表名 -> (源表名, 索引字段)
+FULLTEXT_TABLES = {
+    'books_fts': ('books', ('title', 'author', 'isbn')),
+    'users_fts': ('users', ('username', 'name', 'phone')),
+}
+
+# trigram 分词器只能匹配不少于 3 个字符的关键词
+MIN_KEYWORD_LENGTH = 3
+
+
+def _create_fulltext_table(conn, fts_table, source_table, fields):
+    """创建外部内容 FTS5 表及同步触发器"""
+    columns = ', '.join(fields)
+    new_values = ', '.join(f'new.{f}' for f in fields)
+    old_values = ', '.join(f'old.{f}' for f in fields)
+
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+        f"{columns}, content='{source_table}', content_rowid='id', tokenize='trigram')"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source_table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+    )
+    # 仅在索引字段变化时重建索引行，借还书修改库存不会触发
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {columns} ON {source_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    )
+    # 为已有数据建立索引
+    conn.exec_driver_sql(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def init_fulltext_index(app):
+    """初始化全文索引（仅 SQLite FTS5 可用时启用）"""
+    app.extensions['fulltext'] = False
+    if db.engine.dialect.name != 'sqlite':
+        return
+
+    try:
+        with db.engine.begin() as conn:
+            existing = {
+                row[0] for row in conn.exec_driver_sql(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+            for fts_table, (source_table, fields) in FULLTEXT_TABLES.items():
+                if fts_table not in existing:
+                    _create_fulltext_table(conn, fts_table, source_table, fields)
+    except OperationalError:
+        # SQLite 未编译 FTS5 或不支持 trigram 分词器
+        app.logger.warning('SQLite FTS5 trigram 不可用，搜索将使用 LIKE 查询')
+        return
+    app.extensions['fulltext'] = True
+
+
+def fulltext_available():
+    """全文索引是否可用
+
+    启动时未初始化数据库（AUTO_INIT_DB 关闭）的进程在首次搜索时检查一次索引表是否存在。
+    """
+    available = current_app.extensions.get('fulltext')
+    if available is None:
+        available = False
+        if db.engine.dialect.name == 'sqlite':
+            with db.engine.connect() as conn:
+                existing = {
+                    row[0] for row in conn.exec_driver_sql(
+                        "SELECT name FROM sqlite_master WHERE type = 'table'"
+                    )
+                }
+            available = all(fts_table in existing for fts_table in FULLTEXT_TABLES)
+        current_app.extensions['fulltext'] = available
+    return available
+
+
+def match_keyword(query, model, fields, keyword):
+    """按关键词过滤查询
+
+    全文索引可用且关键词足够长时通过 FTS5 匹配，返回按相关度排序的表达式；
+    否则退回到 LIKE 子串匹配，排序表达式为 None。
+    返回 (query, relevance)。
+    """
+    keyword = keyword.strip()
+    fts_table = f'{model.__tablename__}_fts'
+
+    if len(keyword) >= MIN_KEYWORD_LENGTH and fulltext_available():
+        fts = db.table(fts_table, db.column('rowid'), db.column('rank'))
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        expression = '{' + ' '.join(fields) + '}: ' + phrase
+        query = query.join(fts, fts.c.rowid == model.id).filter(
+            db.literal_column(fts_table).op('MATCH')(expression)
+        )
+        return query, fts.c.rank
+
+    return query.filter(
+        db.or_(*[getattr(model, field).contains(keyword) for field in fields])
+    ), None
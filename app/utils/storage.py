@@ -0,0 +1,25 @@
+from sqlalchemy import event
+from app import db
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """在引擎每次建立 SQLite 连接时执行 PRAGMA"""
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+
+def configure_storage(app):
+    """为 SQLite 连接（含只读副本）设置 SQLITE_PRAGMAS，需在首次建立连接前调用"""
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            apply_sqlite_pragmas(engine, pragmas)
@@ -0,0 +1,10 @@
+import os
+from app.asgi import create_asgi_app
+
+# 获取配置环境，默认为开发环境
+config_name = os.environ.get('FLASK_CONFIG') or 'development'
+app = create_asgi_app(config_name)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5000)
@@ -0,0 +1 @@
+"""性能与并发基准脚本"""
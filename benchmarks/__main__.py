@@ -0,0 +1,37 @@
+"""基准测试命令入口
+
+    python -m benchmarks generate   生成合成数据集
+    python -m benchmarks run        运行基准场景并写入结果
+    python -m benchmarks compare    与基线比较结果
+    python -m benchmarks stress     热门图书并发借阅压力测试
+    python -m benchmarks storage    SQLite 存储配置并发基准
+    python -m benchmarks startup    应用启动耗时基准
+    python -m benchmarks payload    响应编码与压缩基准
+"""
+import importlib
+import sys
+
+# 子命令 -> (模块, 入口函数)
+COMMANDS = {
+    'generate': ('benchmarks.data', 'main'),
+    'run': ('benchmarks.runner', 'main'),
+    'compare': ('benchmarks.runner', 'compare_main'),
+    'stress': ('benchmarks.borrow_stress', 'main'),
+    'storage': ('benchmarks.storage', 'main'),
+    'startup': ('benchmarks.startup', 'main'),
+    'payload': ('benchmarks.payload', 'main'),
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(__doc__)
+        sys.exit(2)
+
+    command = sys.argv.pop(1)
+    module, func = COMMANDS[command]
+    getattr(importlib.import_module(module), func)()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""热门图书并发借阅压力测试
+
+多个线程同时对同一本库存有限的图书办理借阅，并让若干线程对同一用户重复借阅，
+结束后校验：借出数量不超过库存、库存不为负、同一用户同一本书最多一条未归还记录。
+随后多个线程同时归还同一条借阅记录，校验只有一个请求成功，库存和计数只恢复一次。
+所有请求的状态码都应为 201/200 或 400，出现其他状态码（如 500）同样视为失败。
+
+用法：
+    python -m benchmarks stress --workers 16 --quantity 50 --attempts 400
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks stress', description='热门图书并发借阅压力测试')
+    parser.add_argument('--workers', type=int, default=16, help='并发线程数')
+    parser.add_argument('--quantity', type=int, default=50, help='热门图书库存')
+    parser.add_argument('--attempts', type=int, default=400, help='借阅请求总数')
+    parser.add_argument('--duplicates', type=int, default=8, help='对同一用户重复借阅的并发请求数')
+    parser.add_argument('--returns', type=int, default=8, help='重复归还同一条记录的并发请求数')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    db_dir = tempfile.mkdtemp(prefix='bms-stress-')
+    os.environ['DEV_DATABASE_URL'] = 'sqlite:///' + os.path.join(db_dir, 'stress.db')
+
+    from app import create_app, db
+    from app.models import Book, BorrowRecord, StatCounter, User
+
+    app = create_app('development')
+    app.config['DEBUG'] = False
+
+    with app.app_context():
+        book = Book(title='热门图书', author='压力测试', isbn='STRESS-0001',
+                    quantity=args.quantity, available=args.quantity)
+        db.session.add(book)
+        users = [User(username=f'stress{i}', name=f'读者{i}', password_hash='-')
+                 for i in range(args.attempts)]
+        db.session.add_all(users)
+        db.session.commit()
+        book_id = book.id
+        user_ids = [user.id for user in users]
+
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+            local.client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+        return local.client
+
+    def borrow(user_id):
+        response = client().post('/api/borrows', json={'user_id': user_id, 'book_id': book_id})
+        return response.status_code
+
+    def return_record(record_id):
+        response = client().put(f'/api/borrows/{record_id}/return')
+        return response.status_code
+
+    # 大部分请求来自不同用户，另有一组请求对同一用户重复借阅
+    requests_ = user_ids + [user_ids[0]] * args.duplicates
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        statuses = list(pool.map(borrow, requests_))
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        book = db.session.get(Book, book_id)
+        open_loans = BorrowRecord.query.filter_by(book_id=book_id, status='borrowed').count()
+        first_user_loans = BorrowRecord.query.filter_by(
+            book_id=book_id, user_id=user_ids[0], status='borrowed'
+        ).count()
+        available = book.available
+
+    succeeded = statuses.count(201)
+    print(f'请求数: {len(statuses)}  线程数: {args.workers}  耗时: {elapsed:.2f}s  '
+          f'吞吐: {len(statuses) / elapsed:.0f} req/s')
+    print(f'成功: {succeeded}  库存不足/重复借阅: {statuses.count(400)}  '
+          f'其他: {len(statuses) - succeeded - statuses.count(400)}')
+    print(f'剩余库存: {available}  未归还记录: {open_loans}')
+
+    errors = []
+    unexpected = len(statuses) - succeeded - statuses.count(400)
+    if unexpected:
+        errors.append(f'借阅请求中有{unexpected}个返回了 201/400 以外的状态码')
+    if succeeded != open_loans:
+        errors.append(f'成功请求数({succeeded})与未归还记录数({open_loans})不一致')
+    if open_loans > args.quantity:
+        errors.append(f'超借：未归还记录数({open_loans})超过库存({args.quantity})')
+    if available < 0 or available != args.quantity - open_loans:
+        errors.append(f'库存不一致：剩余{available}，应为{args.quantity - open_loans}')
+    if first_user_loans > 1:
+        errors.append(f'重复借阅：同一用户有{first_user_loans}条未归还记录')
+
+    # 并发重复归还同一条记录
+    with app.app_context():
+        record = BorrowRecord.query.filter_by(book_id=book_id, status='borrowed').first()
+        record_id, record_user_id = (record.id, record.user_id) if record else (None, None)
+    if record_id is not None:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            return_statuses = list(pool.map(return_record, [record_id] * args.returns))
+
+        with app.app_context():
+            available = db.session.get(Book, book_id).available
+            open_loans = BorrowRecord.query.filter_by(book_id=book_id, status='borrowed').count()
+            active_loans = db.session.get(User, record_user_id).active_loans
+            active_borrows = StatCounter.value_of(StatCounter.ACTIVE_BORROWS)
+
+        returned = return_statuses.count(200)
+        print(f'重复归还: {len(return_statuses)}  成功: {returned}  已归还: {return_statuses.count(400)}  '
+              f'其他: {len(return_statuses) - returned - return_statuses.count(400)}')
+        print(f'剩余库存: {available}  未归还记录: {open_loans}')
+
+        if returned != 1:
+            errors.append(f'重复归还：{returned}个请求归还成功，应为1个')
+        if returned + return_statuses.count(400) != len(return_statuses):
+            errors.append('归还请求中有 200/400 以外的状态码')
+        if available != args.quantity - open_loans:
+            errors.append(f'归还后库存不一致：剩余{available}，应为{args.quantity - open_loans}')
+        if active_loans != 0:
+            errors.append(f'归还后用户在借数量为{active_loans}，应为0')
+        if active_borrows != open_loans:
+            errors.append(f'未归还记录计数为{active_borrows}，应为{open_loans}')
+
+    for error in errors:
+        print('失败:', error)
+    if not errors:
+        print('通过')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
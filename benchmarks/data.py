@@ -0,0 +1,248 @@
+"""基准测试数据生成
+
+按固定随机种子生成图书、读者和借阅记录，分布带有真实馆藏的偏斜：
+少数热门图书和活跃读者占据大部分借阅，借阅日期越近越密集，近期借阅中
+有一部分尚未归还，其中超过应还日期的记为逾期。同样的参数总是生成同样的数据。
+
+用法：
+    python -m benchmarks generate --books 200000 --users 50000 --borrows 2000000
+"""
+import argparse
+import bisect
+import itertools
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# 所有读者的密码，基准场景以此登录
+READER_PASSWORD = 'reader123'
+
+# 书名和作者的构词表，搜索场景从中取关键词
+TITLE_WORDS = (
+    'Python', 'Java', '数据', '算法', '系统', '网络', '设计', '原理', '实践', '历史',
+    '中国', '世界', '文学', '经济', '管理', '心理', '哲学', '艺术', '科学', '工程',
+    'Linux', 'Web', '机器学习', '数据库', '操作系统', '编译器', '分布式', '人工智能',
+    '小说', '散文', '诗歌', '传记', '旅行', '城市', '自然', '宇宙', '生命', '战争'
+)
+SURNAMES = '王李张刘陈杨黄赵周吴徐孙马朱胡郭何林罗高'
+GIVEN_NAMES = '伟芳娜敏静丽强磊军洋勇艳杰涛明超秀霞平刚'
+
+DEFAULT_BOOKS = 200000
+DEFAULT_USERS = 50000
+DEFAULT_BORROWS = 2000000
+DEFAULT_SEED = 42
+
+# 借阅时间跨度、借期，以及视为近期（可能未归还）的天数
+HISTORY_DAYS = 730
+LOAN_DAYS = 30
+RECENT_DAYS = 45
+INSERT_BATCH = 20000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks generate', description='生成基准测试数据库')
+    parser.add_argument('--books', type=int, default=DEFAULT_BOOKS, help='图书数量')
+    parser.add_argument('--users', type=int, default=DEFAULT_USERS, help='读者数量')
+    parser.add_argument('--borrows', type=int, default=DEFAULT_BORROWS, help='借阅记录数量')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='随机种子')
+    parser.add_argument('--output', help='数据库文件路径，默认放在系统临时目录')
+    parser.add_argument('--force', action='store_true', help='文件已存在时重新生成')
+    return parser.parse_args()
+
+
+def default_path(books, users, borrows, seed):
+    """按数据规模和种子确定的缓存路径，相同参数复用已生成的文件"""
+    return os.path.join(
+        tempfile.gettempdir(), 'bms-bench', f'library-{books}-{users}-{borrows}-{seed}.db'
+    )
+
+
+def bench_config(name, database_uri, **overrides):
+    """基于生产配置生成基准用配置类：指定数据库，关闭后台定时任务"""
+    from config import config, ProductionConfig, engine_options
+    attrs = {
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(database_uri),
+        'STATS_RECONCILE_INTERVAL': 0,
+        'OVERDUE_SWEEP_INTERVAL': 0,
+    }
+    attrs.update(overrides)
+    config[name] = type(name, (ProductionConfig,), attrs)
+    return name
+
+
+def zipf_weights(n, s=1.1):
+    """前几名占大头的 Zipf 分布累计权重"""
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def _book_rows(rng, count, now):
+    authors = max(count // 4, 1)
+    author_weights = zipf_weights(authors, 0.8)
+    for i in range(1, count + 1):
+        author = rng.choices(range(authors), cum_weights=author_weights)[0]
+        surname = SURNAMES[author % len(SURNAMES)]
+        given = GIVEN_NAMES[(author // len(SURNAMES)) % len(GIVEN_NAMES)]
+        words = rng.sample(TITLE_WORDS, rng.randint(1, 3))
+        quantity = rng.randint(1, 5)
+        yield {
+            'title': ''.join(words) + f' 第{i % 7 + 1}版',
+            'author': f'{surname}{given}{author}',
+            'isbn': f'978{i:010d}',
+            'quantity': quantity,
+            'available': quantity,
+            'created_at': now - timedelta(days=HISTORY_DAYS * (1 - i / count), seconds=i),
+            'updated_at': now,
+        }
+
+
+def _user_rows(rng, count, now, password_hash):
+    for i in range(1, count + 1):
+        yield {
+            'username': f'reader{i}',
+            'password_hash': password_hash,
+            'name': rng.choice(SURNAMES) + rng.choice(GIVEN_NAMES) + rng.choice(GIVEN_NAMES),
+            'phone': f'1{rng.randint(3, 9)}{i:09d}',
+            'role': 'user',
+            'created_at': now - timedelta(days=HISTORY_DAYS * (1 - i / count), seconds=i),
+        }
+
+
+def _borrow_rows(rng, count, book_ids, user_ids, quantities, now):
+    """生成借阅记录；未归还记录满足库存和“同一读者同一本书只有一条”约束"""
+    book_weights = zipf_weights(len(book_ids))
+    user_weights = zipf_weights(len(user_ids), 0.7)
+    # 热门书目打散到整个 ID 范围，避免热门书都是最早入库的
+    shuffled_books = list(book_ids)
+    rng.shuffle(shuffled_books)
+    shuffled_users = list(user_ids)
+    rng.shuffle(shuffled_users)
+
+    open_loans = set()
+    on_loan = {}
+    for i in range(count):
+        book_id = shuffled_books[bisect.bisect_left(book_weights, rng.random() * book_weights[-1])]
+        user_id = shuffled_users[bisect.bisect_left(user_weights, rng.random() * user_weights[-1])]
+        # 借阅日期越近越密集
+        age_days = HISTORY_DAYS * (rng.random() ** 2)
+        borrow_date = now - timedelta(days=age_days, seconds=rng.randint(0, 86399))
+        due_date = borrow_date + timedelta(days=LOAN_DAYS)
+
+        # 近期借阅大多未还，更早的借阅偶有长期未还
+        still_out = rng.random() < (0.7 if age_days < RECENT_DAYS else 0.001)
+        if still_out and (user_id, book_id) not in open_loans \
+                and on_loan.get(book_id, 0) < quantities[book_id]:
+            open_loans.add((user_id, book_id))
+            on_loan[book_id] = on_loan.get(book_id, 0) + 1
+            yield {
+                'user_id': user_id,
+                'book_id': book_id,
+                'borrow_date': borrow_date,
+                'due_date': due_date,
+                'return_date': None,
+                'status': 'borrowed',
+                'overdue': due_date < now,
+            }
+            continue
+
+        return_date = min(borrow_date + timedelta(days=rng.uniform(1, LOAN_DAYS + 10)), now)
+        yield {
+            'user_id': user_id,
+            'book_id': book_id,
+            'borrow_date': borrow_date,
+            'due_date': due_date,
+            'return_date': return_date,
+            'status': 'returned',
+            'overdue': False,
+        }
+
+
+def _insert(conn, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            conn.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+
+
+def generate(path, books=DEFAULT_BOOKS, users=DEFAULT_USERS, borrows=DEFAULT_BORROWS,
+             seed=DEFAULT_SEED, log=print):
+    """在 path 生成基准数据库（覆盖已有文件）"""
+    from app import create_app, db
+    from app.models import Book, BorrowRecord, User, StatCounter
+    from app.utils.bootstrap import init_database
+    from app.utils.passwords import password_hasher
+
+    # 先写入临时文件，生成完成后再替换，中断时不会留下不完整的数据集
+    building = os.path.abspath(path) + '.building'
+    os.makedirs(os.path.dirname(building), exist_ok=True)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(building + suffix):
+            os.remove(building + suffix)
+
+    app = create_app(bench_config('bench-generate', 'sqlite:///' + building))
+    init_database(app)
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    started = time.perf_counter()
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            # 导入期间不需要逐事务落盘
+            conn.exec_driver_sql('PRAGMA synchronous = OFF')
+            _insert(conn, Book.__table__, _book_rows(rng, books, now))
+            log(f'图书 {books} 条  {time.perf_counter() - started:.1f}s')
+
+            _insert(conn, User.__table__, _user_rows(rng, users, now, password_hasher.hash(READER_PASSWORD)))
+            log(f'读者 {users} 条  {time.perf_counter() - started:.1f}s')
+
+            book_ids = range(1, books + 1)
+            quantities = dict(zip(book_ids, conn.execute(
+                db.select(Book.quantity).order_by(Book.id)
+            ).scalars()))
+            user_ids = list(conn.execute(
+                db.select(User.id).where(User.role == 'user').order_by(User.id)
+            ).scalars())
+            _insert(conn, BorrowRecord.__table__,
+                    _borrow_rows(rng, borrows, book_ids, user_ids, quantities, now))
+            log(f'借阅记录 {borrows} 条  {time.perf_counter() - started:.1f}s')
+
+            conn.execute(
+                db.update(Book).values(available=Book.quantity - db.select(db.func.count())
+                                       .where(BorrowRecord.book_id == Book.id,
+                                              BorrowRecord.status == 'borrowed')
+                                       .scalar_subquery())
+            )
+        StatCounter.reconcile()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+        # 数据集以普通回滚日志模式保存，由使用方的配置决定是否启用 WAL
+        db.session.execute(db.text('PRAGMA journal_mode = DELETE'))
+        db.engine.dispose()
+    os.replace(building, path)
+
+    log(f'完成: {path}  {time.perf_counter() - started:.1f}s')
+    return path
+
+
+def ensure_dataset(path=None, books=DEFAULT_BOOKS, users=DEFAULT_USERS, borrows=DEFAULT_BORROWS,
+                   seed=DEFAULT_SEED, force=False, log=print):
+    """返回数据库路径，文件不存在（或 force）时生成"""
+    path = path or default_path(books, users, borrows, seed)
+    if force or not os.path.exists(path):
+        generate(path, books, users, borrows, seed, log=log)
+    return path
+
+
+def main():
+    args = parse_args()
+    ensure_dataset(args.output, args.books, args.users, args.borrows, args.seed, force=args.force)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""响应编码与压缩基准
+
+在生成的数据集上取若干页 per_page=100 的图书列表和借阅记录列表（含完整的
+user 和 book），比较：
+
+- JSON 编码耗时：改造前的做法（to_dict 中逐字段 isoformat，Flask 默认编码器
+  排序键并转义中文）、标准库 JSONProvider、OrjsonProvider；
+- 响应体字节数和压缩耗时：不压缩、gzip 各级别、br（安装了 brotli 时）；
+- 经过完整请求处理后实际发出的字节数和延迟（按 Accept-Encoding 协商）。
+
+用法：
+    python -m benchmarks payload --pages 20 --rounds 5
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.data import bench_config, generate
+from benchmarks.runner import percentile
+
+PER_PAGE = 100
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks payload', description='响应编码与压缩基准')
+    parser.add_argument('--pages', type=int, default=20, help='每种列表取的页数')
+    parser.add_argument('--rounds', type=int, default=5, help='每页重复编码/压缩的次数')
+    parser.add_argument('--books', type=int, default=5000, help='数据集图书数量')
+    parser.add_argument('--borrows', type=int, default=50000, help='数据集借阅记录数量')
+    return parser.parse_args()
+
+
+def _isoformat(value):
+    """改造前 to_dict 的输出：日期时间先转为字符串"""
+    if isinstance(value, dict):
+        return {key: _isoformat(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_isoformat(item) for item in value]
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def load_pages(app, pages):
+    """返回 {列表名: [响应对象, ...]}，与对应接口 jsonify 的内容一致"""
+    from app import db
+    from app.models import Book, BorrowRecord
+
+    payloads = {'books': [], 'borrows': []}
+    with app.app_context():
+        for page in range(pages):
+            books = Book.query.order_by(Book.id).offset(page * PER_PAGE).limit(PER_PAGE).all()
+            payloads['books'].append({
+                'success': True, 'books': [book.to_dict() for book in books],
+                'total': 0, 'pages': 0, 'current_page': page + 1
+            })
+            records = (
+                BorrowRecord.query
+                .options(db.selectinload(BorrowRecord.user), db.selectinload(BorrowRecord.book))
+                .order_by(BorrowRecord.id).offset(page * PER_PAGE).limit(PER_PAGE).all()
+            )
+            payloads['borrows'].append({
+                'success': True, 'records': [record.to_dict() for record in records],
+                'total': 0, 'pages': 0, 'current_page': page + 1
+            })
+    return payloads
+
+
+def _timed(func, items, rounds):
+    """返回每个 item 的中位耗时（秒）列表和最后一次的结果"""
+    samples = []
+    results = []
+    for item in items:
+        elapsed = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            result = func(item)
+            elapsed.append(time.perf_counter() - started)
+        samples.append(percentile(elapsed, 0.5))
+        results.append(result)
+    return samples, results
+
+
+def bench_encoders(app, payloads, rounds):
+    from flask.json.provider import DefaultJSONProvider
+    from app.utils.json_provider import JSONProvider, OrjsonProvider, orjson
+
+    # 编码器名 -> (JSON 编码, 编码前对响应对象的处理)
+    encoders = {
+        'flask+isoformat': (DefaultJSONProvider(app), _isoformat),
+        'json': (JSONProvider(app), None),
+    }
+    if orjson is not None:
+        encoders['orjson'] = (OrjsonProvider(app), None)
+
+    print(f'JSON 编码（每页 {PER_PAGE} 条，单页耗时中位数）')
+    bodies = {}
+    with app.app_context():
+        for name, items in payloads.items():
+            for encoder, (provider, prepare) in encoders.items():
+                samples, results = _timed(
+                    lambda obj: provider.response(prepare(obj) if prepare else obj).get_data(), items, rounds
+                )
+                size = sum(map(len, results)) / len(results)
+                print(f'  {name:<8} {encoder:<16} {percentile(samples, 0.5) * 1000:7.2f} ms  {size:9.0f} B')
+                # 压缩基准使用最后一个（即应用实际使用的）编码器的输出
+                bodies[name] = results
+    return bodies
+
+
+def bench_compression(bodies, rounds):
+    from app.utils.compression import Compressor, brotli
+
+    settings = [('identity', None, None)]
+    settings += [(f'gzip-{level}', 'gzip', level) for level in (1, 6, 9)]
+    if brotli is not None:
+        settings += [(f'br-{quality}', 'br', quality) for quality in (1, 4, 6)]
+
+    print('压缩（单页耗时和字节数中位数）')
+    for name, items in bodies.items():
+        for label, encoding, level in settings:
+            if encoding is None:
+                samples, results = [0.0], items
+            else:
+                compressor = Compressor()
+                compressor.level = compressor.brotli_quality = level
+                samples, results = _timed(lambda body: compressor.compress(body, encoding), items, rounds)
+            size = percentile([len(result) for result in results], 0.5)
+            print(f'  {name:<8} {label:<10} {percentile(samples, 0.5) * 1000:7.2f} ms  {size:9d} B')
+
+
+def bench_requests(app, pages, rounds):
+    """经过完整请求处理（查询、编码、压缩）后发出的字节数和延迟"""
+    from app.utils.compression import brotli
+
+    encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    print(f'完整请求（per_page={PER_PAGE}，延迟中位数）')
+    for path in ('/api/books', '/api/borrows'):
+        for encoding in encodings:
+            elapsed = []
+            sizes = []
+            for _ in range(rounds):
+                for page in range(1, pages + 1):
+                    started = time.perf_counter()
+                    response = client.get(f'{path}?per_page={PER_PAGE}&page={page}',
+                                          headers={'Accept-Encoding': encoding})
+                    body = response.get_data()
+                    elapsed.append(time.perf_counter() - started)
+                    sizes.append(len(body))
+            print(f'  {path:<14} {encoding:<10} {percentile(elapsed, 0.5) * 1000:7.2f} ms  '
+                  f'{percentile(sizes, 0.5):9d} B')
+
+
+def main():
+    args = parse_args()
+    from app import create_app
+
+    workdir = tempfile.mkdtemp(prefix='bms-payload-')
+    try:
+        path = generate(os.path.join(workdir, 'library.db'), books=args.books, users=1000,
+                        borrows=args.borrows, log=lambda message: None)
+        # 关闭响应缓存，每次请求都经过查询和编码
+        app = create_app(bench_config('bench-payload', 'sqlite:///' + path,
+                                      RESPONSE_CACHE_TTL=0, PASSWORD_HASH_EXECUTOR='none'))
+        payloads = load_pages(app, args.pages)
+        bodies = bench_encoders(app, payloads, args.rounds)
+        bench_compression(bodies, args.rounds)
+        bench_requests(app, args.pages, args.rounds)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
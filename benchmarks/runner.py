@@ -0,0 +1,353 @@
+"""运行基准场景并与基线比较
+
+默认在进程内通过 Flask 测试客户端运行（先复制一份生成好的数据集，借还书场景
+不会改动原数据集）；指定 --http 时通过 HTTP 访问已启动的服务，服务端需使用
+同一份数据集。结果写入 JSON 文件，并与基线比较 p95 延迟和吞吐。
+
+用法：
+    python -m benchmarks run --output results.json
+    python -m benchmarks run --http http://localhost:5000 --scenarios browse,search
+    python -m benchmarks compare results.json --baseline benchmarks/baseline.json
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+from benchmarks import data
+from benchmarks.scenarios import SCENARIOS, Context, login
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+ADMIN = ('admin', 'admin123')
+READER = ('reader1', data.READER_PASSWORD)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks run', description='运行基准场景')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f'逗号分隔的场景，默认全部：{",".join(SCENARIOS)}')
+    parser.add_argument('--iterations', type=int, default=200, help='每个场景的操作次数')
+    parser.add_argument('--warmup', type=int, default=20, help='每个场景不计入结果的预热次数')
+    parser.add_argument('--concurrency', type=int, default=1, help='并发线程数')
+    parser.add_argument('--books', type=int, default=data.DEFAULT_BOOKS, help='数据集图书数量')
+    parser.add_argument('--users', type=int, default=data.DEFAULT_USERS, help='数据集读者数量')
+    parser.add_argument('--borrows', type=int, default=data.DEFAULT_BORROWS, help='数据集借阅记录数量')
+    parser.add_argument('--seed', type=int, default=data.DEFAULT_SEED, help='数据集和场景的随机种子')
+    parser.add_argument('--database', help='数据集文件，默认按规模缓存在系统临时目录')
+    parser.add_argument('--http', metavar='URL', help='通过 HTTP 访问已启动的服务')
+    parser.add_argument('--output', default='benchmark-results.json', help='结果文件')
+    parser.add_argument('--baseline', help=f'基线文件，默认 {os.path.relpath(DEFAULT_BASELINE)}（存在且数据集一致时）')
+    parser.add_argument('--threshold', type=float, default=0.25, help='判定回退的相对变化阈值')
+    return parser.parse_args()
+
+
+def _route(method, path):
+    """请求分组标签：去掉查询参数并把数字 ID 归一"""
+    return f'{method} ' + re.sub(r'/\d+(?=/|$)', '/{id}', path.split('?', 1)[0])
+
+
+class Recorder:
+    """按请求分组记录耗时和状态码"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+
+    def record(self, label, elapsed, status):
+        with self._lock:
+            entry = self.requests.setdefault(label, {'latencies': [], 'errors': 0})
+            entry['latencies'].append(elapsed)
+            if status is None or status >= 500:
+                entry['errors'] += 1
+
+
+class InProcessClient:
+    """Flask 测试客户端；recorder 为 None 时不记录（用于登录和预热）"""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+        self.recorder = None
+
+    def request(self, method, path, body=None):
+        path = urllib.parse.quote(path, safe='/?=&%')
+        started = time.perf_counter()
+        response = self._client.open(path, method=method, json=body)
+        content = response.get_data()
+        if self.recorder is not None:
+            self.recorder.record(_route(method, path), time.perf_counter() - started, response.status_code)
+        return response.status_code, content
+
+
+class HttpClient:
+    """基于 urllib 的 HTTP 客户端，保存会话 Cookie"""
+
+    def __init__(self, base_url):
+        self._base_url = base_url.rstrip('/')
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+        self.recorder = None
+
+    def request(self, method, path, body=None):
+        path = urllib.parse.quote(path, safe='/?=&%')
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self._base_url + path, data=payload, headers=headers, method=method)
+        started = time.perf_counter()
+        try:
+            with self._opener.open(req) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status, content = error.code, error.read()
+        except OSError:
+            status, content = None, b''
+        if self.recorder is not None:
+            self.recorder.record(_route(method, path), time.perf_counter() - started, status)
+        return status, content
+
+
+def percentile(values, fraction):
+    """最近秩百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def _latency_summary(latencies):
+    return {
+        'mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        'p50': round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+        'p95': round(percentile(latencies, 0.95) * 1000, 3) if latencies else None,
+        'p99': round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+        'max': round(max(latencies) * 1000, 3) if latencies else None,
+    }
+
+
+def run_scenario(scenario, make_client, books, users, args):
+    """运行单个场景，返回结果字典"""
+    def session(worker):
+        client = make_client()
+        if scenario.role == 'admin':
+            login(client, *ADMIN)
+        elif scenario.role == 'reader':
+            login(client, *READER)
+        return client, Context(random.Random(f'{args.seed}-{scenario.name}-{worker}'), books, users)
+
+    # 预热：填充缓存、建立连接，不计入结果
+    client, ctx = session('warmup')
+    for _ in range(args.warmup):
+        scenario.func(client, ctx)
+
+    recorder = Recorder()
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    per_worker = [args.iterations // args.concurrency] * args.concurrency
+    per_worker[0] += args.iterations - sum(per_worker)
+    # 登录在计时前完成，登录请求不计入结果
+    sessions = [session(index) for index in range(args.concurrency)]
+
+    def worker(client, ctx, count):
+        client.recorder = recorder
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                scenario.func(client, ctx)
+            except Exception as error:
+                with lock:
+                    failures.append(repr(error))
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [
+        threading.Thread(target=worker, args=(client, ctx, count))
+        for (client, ctx), count in zip(sessions, per_worker)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    requests = {
+        label: {
+            'count': len(entry['latencies']),
+            'errors': entry['errors'],
+            'latency_ms': _latency_summary(entry['latencies'])
+        }
+        for label, entry in sorted(recorder.requests.items())
+    }
+    return {
+        'blueprint': scenario.blueprint,
+        'description': scenario.description,
+        'operations': len(latencies),
+        'errors': len(failures) + sum(entry['errors'] for entry in requests.values()),
+        'failures': failures[:5],
+        'seconds': round(seconds, 3),
+        'ops_per_sec': round(len(latencies) / seconds, 2) if seconds else None,
+        'latency_ms': _latency_summary(latencies),
+        'requests': requests,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _in_process_target(args, workdir):
+    """复制数据集并创建应用，返回 (make_client, books, users)"""
+    from app import create_app
+    from app.models import StatCounter
+
+    template = data.ensure_dataset(args.database, args.books, args.users, args.borrows, args.seed)
+    path = os.path.join(workdir, 'library.db')
+    shutil.copyfile(template, path)
+
+    app = create_app(data.bench_config('bench-run', 'sqlite:///' + path))
+    with app.app_context():
+        counters = StatCounter.snapshot()
+    return (
+        lambda: InProcessClient(app),
+        counters.get(StatCounter.BOOKS, 0),
+        counters.get(StatCounter.USERS, 0) - 1
+    )
+
+
+def _http_target(args):
+    """从服务端统计接口读取数据规模，返回 (make_client, books, users)"""
+    client = HttpClient(args.http)
+    login(client, *ADMIN)
+    status, body = client.request('GET', '/api/stats')
+    if status != 200:
+        raise RuntimeError(f'无法读取统计数据: {status}')
+    stats = json.loads(body)['stats']
+    return lambda: HttpClient(args.http), stats['total_books'], stats['total_users'] - 1
+
+
+def run(args):
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f'未知场景: {", ".join(unknown)}')
+
+    workdir = tempfile.mkdtemp(prefix='bms-bench-run-')
+    try:
+        if args.http:
+            make_client, books, users = _http_target(args)
+        else:
+            make_client, books, users = _in_process_target(args, workdir)
+
+        results = {
+            'meta': {
+                'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+                'commit': _git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'mode': 'http' if args.http else 'in-process',
+                'target': args.http,
+                'dataset': {'books': args.books, 'users': args.users, 'borrows': args.borrows, 'seed': args.seed},
+                'iterations': args.iterations,
+                'concurrency': args.concurrency,
+            },
+            'scenarios': {}
+        }
+        for name in names:
+            result = run_scenario(SCENARIOS[name], make_client, books, users, args)
+            results['scenarios'][name] = result
+            latency = result['latency_ms']
+            print(f'{name:<10} {result["ops_per_sec"]:>8.1f} ops/s  p50 {latency["p50"]:>8.2f}ms  '
+                  f'p95 {latency["p95"]:>8.2f}ms  p99 {latency["p99"]:>8.2f}ms  错误 {result["errors"]}')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f'结果已写入 {args.output}')
+    return results
+
+
+def compare(results, baseline, threshold):
+    """与基线比较 p95 延迟和吞吐，返回回退的场景列表"""
+    if results['meta']['dataset'] != baseline['meta']['dataset']:
+        print('注意：结果与基线的数据集规模不同，比较仅供参考')
+    if results['meta']['mode'] != baseline['meta']['mode']:
+        print('注意：结果与基线的运行方式不同，比较仅供参考')
+
+    regressions = []
+    print(f'{"场景":<10} {"p95(ms)":>10} {"基线":>10} {"变化":>8}  {"ops/s":>8} {"基线":>8} {"变化":>8}')
+    for name, result in results['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            print(f'{name:<10} 基线中没有该场景')
+            continue
+        p95, base_p95 = result['latency_ms']['p95'], base['latency_ms']['p95']
+        ops, base_ops = result['ops_per_sec'], base['ops_per_sec']
+        latency_change = p95 / base_p95 - 1 if base_p95 else 0.0
+        throughput_change = ops / base_ops - 1 if base_ops else 0.0
+        regressed = latency_change > threshold or throughput_change < -threshold
+        if regressed:
+            regressions.append(name)
+        print(f'{name:<10} {p95:>10.2f} {base_p95:>10.2f} {latency_change:>+8.1%}  '
+              f'{ops:>8.1f} {base_ops:>8.1f} {throughput_change:>+8.1%}'
+              + ('  回退' if regressed else ''))
+    return regressions
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    args = parse_args()
+    results = run(args)
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if not os.path.exists(baseline_path):
+        return
+    baseline = _load(baseline_path)
+    if args.baseline is None and baseline['meta']['dataset'] != results['meta']['dataset']:
+        return
+    print(f'\n与基线 {baseline_path} 比较：')
+    if compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+
+def compare_main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks compare', description='与基线比较基准结果')
+    parser.add_argument('results', help='结果文件')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件')
+    parser.add_argument('--threshold', type=float, default=0.25, help='判定回退的相对变化阈值')
+    args = parser.parse_args()
+    if compare(_load(args.results), _load(args.baseline), args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""基准场景
+
+每个场景模拟一类用户操作，一次调用为一次操作（可能包含多个请求），
+覆盖全部蓝图：认证、图书浏览与搜索、借还书高峰、逾期列表、读者管理和仪表板。
+场景只通过 HTTP 接口访问应用，进程内和 HTTP 两种方式共用。
+"""
+import json
+
+from benchmarks.data import TITLE_WORDS, SURNAMES, GIVEN_NAMES, READER_PASSWORD
+
+# 场景名 -> Scenario
+SCENARIOS = {}
+
+
+class Scenario:
+    def __init__(self, name, blueprint, role, func, description):
+        self.name = name
+        self.blueprint = blueprint
+        self.role = role  # 以 admin、reader 身份登录，或 None（场景自行登录）
+        self.func = func
+        self.description = description
+
+
+def scenario(name, blueprint, role='admin'):
+    def decorator(func):
+        SCENARIOS[name] = Scenario(name, blueprint, role, func, func.__doc__)
+        return func
+    return decorator
+
+
+class Context:
+    """场景可见的数据规模和随机数"""
+
+    def __init__(self, rng, books, users):
+        self.rng = rng
+        self.books = books
+        self.users = users
+
+    def book_id(self):
+        return self.rng.randint(1, self.books)
+
+    def reader_id(self):
+        # 管理员 ID 为 1，读者从 2 开始
+        return self.rng.randint(2, self.users + 1)
+
+    def page(self, total, per_page=20, deep=False):
+        pages = max((total + per_page - 1) // per_page, 1)
+        # 多数请求只翻前几页，deep 时偶尔跳到很深的页
+        if deep and self.rng.random() < 0.1:
+            return self.rng.randint(1, pages)
+        return self.rng.randint(1, min(pages, 5))
+
+    def keyword(self):
+        return self.rng.choice(TITLE_WORDS)
+
+    def author(self):
+        return self.rng.choice(SURNAMES) + self.rng.choice(GIVEN_NAMES)
+
+
+def login(client, username, password):
+    status, _ = client.request('POST', '/api/auth/login', {'username': username, 'password': password})
+    if status != 200:
+        raise RuntimeError(f'登录失败: {username} ({status})')
+
+
+@scenario('auth', 'auth', role=None)
+def auth(client, ctx):
+    """读者登录并获取当前用户信息"""
+    username = f'reader{ctx.reader_id() - 1}'
+    client.request('POST', '/api/auth/login', {'username': username, 'password': READER_PASSWORD})
+    client.request('GET', '/api/auth/me')
+
+
+@scenario('browse', 'book', role='reader')
+def browse(client, ctx):
+    """翻页浏览图书列表、查看详情、游标翻页"""
+    client.request('GET', f'/api/books?page={ctx.page(ctx.books, deep=True)}&per_page=20')
+    client.request('GET', f'/api/books/{ctx.book_id()}')
+    status, body = client.request('GET', '/api/books?cursor=&per_page=20')
+    if status == 200:
+        cursor = json.loads(body).get('next_cursor')
+        if cursor:
+            client.request('GET', f'/api/books?cursor={cursor}&per_page=20')
+
+
+@scenario('search', 'book', role='reader')
+def search(client, ctx):
+    """按关键词搜索图书（长关键词走全文索引，短关键词走 LIKE）"""
+    search_type = ctx.rng.choice(('all', 'all', 'title', 'author'))
+    keyword = ctx.author() if search_type == 'author' else ctx.keyword()
+    client.request('GET', f'/api/books/search?keyword={keyword}&type={search_type}&per_page=20')
+
+
+@scenario('checkout', 'borrow')
+def checkout(client, ctx):
+    """借还书高峰：连续办理一批借阅后逐本归还"""
+    record_ids = []
+    for _ in range(5):
+        status, body = client.request('POST', '/api/borrows', {
+            'user_id': ctx.reader_id(), 'book_id': ctx.book_id()
+        })
+        if status == 201:
+            record_ids.append(json.loads(body)['record']['id'])
+    for record_id in record_ids:
+        client.request('PUT', f'/api/borrows/{record_id}/return')
+
+
+@scenario('overdue', 'borrow')
+def overdue(client, ctx):
+    """管理员查看逾期记录和某位读者的借阅历史"""
+    client.request('GET', f'/api/borrows/overdue?page={ctx.rng.randint(1, 5)}&per_page=20')
+    client.request('GET', f'/api/borrows/user/{ctx.reader_id()}?per_page=20')
+
+
+@scenario('users', 'user')
+def users(client, ctx):
+    """管理员浏览和搜索读者"""
+    client.request('GET', f'/api/users?page={ctx.page(ctx.users, deep=True)}&per_page=20')
+    client.request('GET', f'/api/users/search?keyword=reader{ctx.rng.randint(1, 999)}&per_page=20')
+    client.request('GET', f'/api/users/{ctx.reader_id()}')
+
+
+@scenario('dashboard', 'stats', role='reader')
+def dashboard(client, ctx):
+    """仪表板首页：统计数据和最近借阅"""
+    client.request('GET', '/api/stats')
+    client.request('GET', '/api/borrows?page=1&per_page=5')
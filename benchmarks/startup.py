@@ -0,0 +1,124 @@
+"""启动耗时基准
+
+同时启动多个进程（模拟预派生的多个 worker），每个进程导入应用、创建应用并
+处理第一批请求，记录从启动进程到第一个请求完成的耗时。分别在启动时自动初始化
+数据库（AUTO_INIT_DB=true）和预先执行 flask init-db 后跳过初始化两种方式下运行。
+
+用法：
+    python -m benchmarks startup --workers 16 --rounds 3
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.data import generate
+from benchmarks.runner import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子进程：输出各阶段完成时刻（time.time()），由父进程换算为相对启动时刻的耗时
+WORKER = '''
+import json, sys, time
+started = time.time()
+from app import create_app
+imported = time.time()
+from benchmarks.data import bench_config
+app = create_app(bench_config('bench-startup', sys.argv[1], AUTO_INIT_DB=sys.argv[2] == 'true'))
+created = time.time()
+client = app.test_client()
+docs = client.get('/api/openapi.json', headers={'Accept-Encoding': 'gzip'})
+first = time.time()
+probe = client.post('/api/auth/login', json={'username': 'startup-probe', 'password': 'x'})
+database = time.time()
+print(json.dumps({
+    'started': started, 'imported': imported, 'created': created, 'first': first, 'database': database,
+    'ok': docs.status_code == 200 and probe.status_code == 401
+}))
+'''
+
+# 阶段名 -> (起点, 终点)
+PHASES = {
+    'interpreter': ('launched', 'started'),
+    'import': ('started', 'imported'),
+    'create_app': ('imported', 'created'),
+    'first_request': ('created', 'first'),
+    'first_db_request': ('first', 'database'),
+    'total': ('launched', 'database'),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks startup', description='应用启动耗时基准')
+    parser.add_argument('--workers', type=int, default=16, help='同时启动的进程数')
+    parser.add_argument('--rounds', type=int, default=3, help='每种方式重复的轮数')
+    parser.add_argument('--books', type=int, default=2000, help='数据集图书数量')
+    parser.add_argument('--borrows', type=int, default=20000, help='数据集借阅记录数量')
+    return parser.parse_args()
+
+
+def start_workers(database_uri, auto_init, workers):
+    """同时启动 workers 个进程，返回每个进程的阶段耗时（秒）和失败数"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    launched = time.time()
+    processes = [
+        subprocess.Popen(
+            [sys.executable, '-c', WORKER, database_uri, 'true' if auto_init else 'false'],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        for _ in range(workers)
+    ]
+    samples = []
+    failures = 0
+    for process in processes:
+        output, _ = process.communicate()
+        try:
+            marks = json.loads(output.strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            failures += 1
+            continue
+        if process.returncode != 0 or not marks['ok']:
+            failures += 1
+            continue
+        marks['launched'] = launched
+        samples.append({phase: marks[end] - marks[start] for phase, (start, end) in PHASES.items()})
+    return samples, failures
+
+
+def run_mode(name, database_uri, auto_init, args):
+    samples = []
+    failures = 0
+    for _ in range(args.rounds):
+        round_samples, round_failures = start_workers(database_uri, auto_init, args.workers)
+        samples.extend(round_samples)
+        failures += round_failures
+
+    print(f'[{name}] {args.workers} 个进程 x {args.rounds} 轮，失败 {failures}')
+    for phase in PHASES:
+        values = [sample[phase] for sample in samples]
+        if values:
+            print(f'  {phase:<18} p50 {percentile(values, 0.5) * 1000:7.1f} ms  '
+                  f'max {max(values) * 1000:7.1f} ms')
+    return samples
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='bms-startup-')
+    try:
+        path = os.path.join(workdir, 'library.db')
+        generate(path, books=args.books, users=1000, borrows=args.borrows, log=lambda message: None)
+        database_uri = 'sqlite:///' + path
+        # 生成数据集时已完成 flask init-db 的全部工作
+        run_mode('auto-init', database_uri, True, args)
+        run_mode('init-db', database_uri, False, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
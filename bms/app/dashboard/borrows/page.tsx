@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useState, useCallback } from 'react';
+import { useEffect, useState, useCallback, useRef } from 'react';
 import { useAuth } from '@/lib/auth-context';
 import { borrowApi, bookApi, userApi } from '@/lib/api';
 import { BorrowRecord, Book, User } from '@/lib/types';
@@ -52,6 +52,7 @@ import {
   RotateCcw,
 } from 'lucide-react';
 import { toast } from 'sonner';
+import { useChangeFeed } from '@/hooks/use-change-feed';
 
 export default function BorrowsPage() {
   const { isAdmin } = useAuth();
@@ -100,6 +101,44 @@ export default function BorrowsPage() {
     fetchRecords();
   }, [fetchRecords]);
 
+  // 本页办理的借阅/归还完成后重新拉取列表，不依赖事件流（事件流按进程推送，
+  // 连接数也有上限）；其他客户端的借阅/归还事件直接更新当前页。
+  // 记录本页发起的操作，对应事件到达时跳过，避免重复计数
+  const ownActions = useRef(new Set<string>());
+
+  const trackOwnAction = (key: string) => {
+    ownActions.current.add(key);
+    // 事件可能因多进程部署或连接数已满而收不到，过期后不再跳过
+    setTimeout(() => ownActions.current.delete(key), 30000);
+  };
+
+  const matchesFilter = useCallback(
+    (record: BorrowRecord) => statusFilter === 'all' || record.status === statusFilter,
+    [statusFilter]
+  );
+
+  useChangeFeed({
+    'borrow.created': (record: BorrowRecord) => {
+      if (ownActions.current.delete(`created:${record.user_id}:${record.book_id}`)) return;
+      if (!matchesFilter(record)) return;
+      setTotal((count) => count + 1);
+      if (currentPage === 1) {
+        setRecords((prev) => [record, ...prev.filter((r) => r.id !== record.id)].slice(0, 10));
+      }
+    },
+    'borrow.returned': (record: BorrowRecord) => {
+      if (ownActions.current.delete(`returned:${record.id}`)) return;
+      if (statusFilter === 'borrowed') {
+        setTotal((count) => count - 1);
+        setRecords((prev) => prev.filter((r) => r.id !== record.id));
+      } else {
+        if (statusFilter === 'returned') setTotal((count) => count + 1);
+        setRecords((prev) => prev.map((r) => (r.id === record.id ? record : r)));
+      }
+    },
+    resync: fetchRecords,
+  });
+
   const fetchBooksAndUsers = async () => {
     try {
       const [booksRes, usersRes] = await Promise.all([
@@ -126,6 +165,7 @@ export default function BorrowsPage() {
     }
 
     setSubmitting(true);
+    trackOwnAction(`created:${formData.user_id}:${formData.book_id}`);
     try {
       await borrowApi.createBorrow({
         user_id: parseInt(formData.user_id),
@@ -146,6 +186,7 @@ export default function BorrowsPage() {
   const handleReturn = async () => {
     if (!returningRecord) return;
 
+    trackOwnAction(`returned:${returningRecord.id}`);
     try {
       await borrowApi.returnBook(returningRecord.id);
       toast.success('归还成功');
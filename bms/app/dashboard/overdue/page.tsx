@@ -34,6 +34,7 @@ import {
   RotateCcw,
 } from 'lucide-react';
 import { toast } from 'sonner';
+import { useChangeFeed } from '@/hooks/use-change-feed';
 
 export default function OverduePage() {
   const { isAdmin } = useAuth();
@@ -76,6 +77,19 @@ export default function OverduePage() {
     }
   }, [fetchRecords, isAdmin]);
 
+  // 其他客户端归还的记录直接移出列表；本页的归还完成后重新拉取，不依赖事件流
+  useChangeFeed(
+    {
+      'borrow.returned': (record: BorrowRecord) => {
+        if (!records.some((r) => r.id === record.id)) return;
+        setTotal((count) => count - 1);
+        setRecords((prev) => prev.filter((r) => r.id !== record.id));
+      },
+      resync: fetchRecords,
+    },
+    isAdmin
+  );
+
   const handleReturn = async () => {
     if (!returningRecord) return;
 
@@ -1,12 +1,13 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useCallback, useEffect, useState } from 'react';
 import { useAuth } from '@/lib/auth-context';
-import { bookApi, borrowApi, userApi } from '@/lib/api';
+import { borrowApi } from '@/lib/api';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
 import { BookCopy, Users, ClipboardList, AlertTriangle, BookOpen, Clock } from 'lucide-react';
 import { BorrowRecord } from '@/lib/types';
+import { useChangeFeed } from '@/hooks/use-change-feed';
 
 interface DashboardStats {
   totalBooks: number;
@@ -26,45 +27,49 @@ export default function DashboardPage() {
   const [recentBorrows, setRecentBorrows] = useState<BorrowRecord[]>([]);
   const [loading, setLoading] = useState(true);
 
-  useEffect(() => {
-    const fetchStats = async () => {
-      try {
-        const [booksRes, borrowsRes] = await Promise.all([
-          bookApi.getBooks(1, 1),
-          borrowApi.getBorrows(1, 5),
-        ]);
+  const fetchStats = useCallback(async () => {
+    try {
+      const [statsRes, borrowsRes] = await Promise.all([
+        fetch('/api/stats', { credentials: 'include' }).then((res) => res.json()),
+        borrowApi.getBorrows(1, 5),
+      ]);
 
-        const newStats: DashboardStats = {
-          totalBooks: booksRes.total || 0,
-          totalUsers: 0,
-          totalBorrows: borrowsRes.total || 0,
-          overdueBorrows: 0,
-        };
+      const counters = statsRes.stats || {};
+      setStats({
+        totalBooks: counters.total_books || 0,
+        totalUsers: counters.total_users || 0,
+        totalBorrows: counters.total_borrows || 0,
+        overdueBorrows: counters.overdue_borrows || 0,
+      });
+      setRecentBorrows(borrowsRes.records || []);
+    } catch (error) {
+      console.error('获取统计数据失败:', error);
+    } finally {
+      setLoading(false);
+    }
+  }, []);
 
-        if (isAdmin) {
-          try {
-            const [usersRes, overdueRes] = await Promise.all([
-              userApi.getUsers(1, 1),
-              borrowApi.getOverdueBorrows(1, 1),
-            ]);
-            newStats.totalUsers = usersRes.total || 0;
-            newStats.overdueBorrows = overdueRes.total || 0;
-          } catch {
-            // 非管理员可能无权访问
-          }
-        }
+  useEffect(() => {
+    fetchStats();
+  }, [fetchStats, isAdmin]);
 
-        setStats(newStats);
-        setRecentBorrows(borrowsRes.records || []);
-      } catch (error) {
-        console.error('获取统计数据失败:', error);
-      } finally {
-        setLoading(false);
+  // 根据变更事件就地更新统计和最近借阅，不再重新拉取
+  useChangeFeed({
+    'book.created': () => setStats((prev) => ({ ...prev, totalBooks: prev.totalBooks + 1 })),
+    'book.deleted': () => setStats((prev) => ({ ...prev, totalBooks: prev.totalBooks - 1 })),
+    'borrow.created': (record: BorrowRecord) => {
+      setStats((prev) => ({ ...prev, totalBorrows: prev.totalBorrows + 1 }));
+      setRecentBorrows((prev) => [record, ...prev.filter((r) => r.id !== record.id)].slice(0, 5));
+    },
+    'borrow.returned': (record: BorrowRecord) => {
+      // 只有最近借阅中已知逾期的记录才能确定逾期数减少
+      if (recentBorrows.some((r) => r.id === record.id && r.is_overdue)) {
+        setStats((prev) => ({ ...prev, overdueBorrows: prev.overdueBorrows - 1 }));
       }
-    };
-
-    fetchStats();
-  }, [isAdmin]);
+      setRecentBorrows((prev) => prev.map((r) => (r.id === record.id ? record : r)));
+    },
+    resync: fetchStats,
+  });
 
   const formatDate = (dateString: string) => {
     return new Date(dateString).toLocaleDateString('zh-CN', {
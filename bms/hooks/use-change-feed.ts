@@ -0,0 +1,50 @@
+import { useEffect, useRef } from 'react';
+
+// 后端 /api/events 推送的事件类型
+export type ChangeEventType =
+  | 'borrow.created'
+  | 'borrow.returned'
+  | 'inventory'
+  | 'book.created'
+  | 'book.updated'
+  | 'book.deleted'
+  | 'resync';
+
+export type ChangeHandlers = Partial<Record<ChangeEventType, (data: any) => void>>;
+
+const EVENT_TYPES: ChangeEventType[] = [
+  'borrow.created',
+  'borrow.returned',
+  'inventory',
+  'book.created',
+  'book.updated',
+  'book.deleted',
+  'resync',
+];
+
+/**
+ * 订阅后端变更事件流，收到事件时调用对应的处理函数。
+ * EventSource 断线后会携带 Last-Event-ID 自动重连；错过的事件无法补发时
+ * 收到 resync，页面应重新拉取数据。后端以 WSGI 方式运行时该接口返回 503，
+ * EventSource 不再重连，页面只依赖自身操作后的重新拉取。
+ */
+export function useChangeFeed(handlers: ChangeHandlers, enabled = true) {
+  const handlersRef = useRef(handlers);
+
+  useEffect(() => {
+    handlersRef.current = handlers;
+  });
+
+  useEffect(() => {
+    if (!enabled) return;
+
+    const source = new EventSource('/api/events', { withCredentials: true });
+    for (const type of EVENT_TYPES) {
+      source.addEventListener(type, (event) => {
+        const data = JSON.parse((event as MessageEvent).data || '{}');
+        handlersRef.current[type]?.(data);
+      });
+    }
+    return () => source.close();
+  }, [enabled]);
+}
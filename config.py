@@ -4,13 +4,139 @@ from datetime import timedelta
 basedir = os.path.abspath(os.path.dirname(__file__))
 
 
+def engine_options(database_uri):
+    """按数据库类型生成 SQLALCHEMY_ENGINE_OPTIONS"""
+    if database_uri.startswith('sqlite'):
+        # SQLite 写操作串行，连接池只需覆盖并发读；等待写锁的时间由 busy_timeout 控制
+        return {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 8)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 8))
+        }
+    # 服务端数据库：连接池大小、取用前探活、定期回收以避开服务端空闲断开
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    }
+
+
 class Config:
     """基础配置类"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # 启动时自动建表、初始化全文索引和统计计数器并创建默认管理员；关闭后需先执行
+    # flask init-db，多进程部署时各进程启动不再访问数据库
+    AUTO_INIT_DB = os.environ.get('AUTO_INIT_DB', 'true').lower() in ('1', 'true', 'yes')
+    
+    # 在应用进程内运行定时任务（校准计数、逾期扫描、归档、清理删除记录、复制副本）；
+    # 多进程部署时关闭，改由单独的 flask run-jobs 进程运行，各任务只有一份在执行
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    
+    # SQLite 连接建立时执行的 PRAGMA，空表示使用 SQLite 默认设置
+    SQLITE_PRAGMAS = {}
+    
+    # 密码哈希：算法参数（werkzeug 格式）、执行器（thread/process/none）、
+    # 并发计算数、排队上限以及排队等待超时（秒，0 表示没有空位时立即拒绝）。
+    # 计算和排队中的请求都占用一个请求线程，两者之和应远小于服务的线程数
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt'
+    PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR') or 'thread'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 4))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 0))
+    
+    # 已登录用户身份缓存：过期时间（秒，0 表示关闭）、最大条目数，
+    # 以及各进程回表检查用户身份版本号的间隔（秒）
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 4096))
+    USER_CACHE_POLL = float(os.environ.get('USER_CACHE_POLL', 1))
+    
+    # 图书目录响应缓存：过期时间（秒，0 表示关闭）、最大条目数，
+    # 以及各进程回表检查目录版本号的间隔（秒）
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+    CATALOGUE_GENERATION_POLL = float(os.environ.get('CATALOGUE_GENERATION_POLL', 1))
+    
     # 借阅默认期限（天）
     BORROW_DAYS = 30
+    
+    # 每位用户同时在借的最多本数，0 表示不限制
+    MAX_ACTIVE_LOANS = int(os.environ.get('MAX_ACTIVE_LOANS', 0))
+    
+    # 批量借阅/归还单次最多处理的数量
+    BORROW_BATCH_LIMIT = 50
+    
+    # 统计计数器校准间隔（秒），0 表示不在进程内定时校准
+    STATS_RECONCILE_INTERVAL = int(os.environ.get('STATS_RECONCILE_INTERVAL', 3600))
+    
+    # 批量导入图书时每个事务写入的行数
+    BOOK_IMPORT_CHUNK_SIZE = 1000
+    
+    # 导出借阅记录时每批读取的行数
+    BORROW_EXPORT_BATCH_SIZE = 1000
+    
+    # 逾期扫描间隔（秒），0 表示不在进程内定时扫描
+    OVERDUE_SWEEP_INTERVAL = int(os.environ.get('OVERDUE_SWEEP_INTERVAL', 300))
+    
+    # 借阅记录归档：归还超过 BORROW_ARCHIVE_AFTER_DAYS 天的记录移入 borrow_records_archive，
+    # 每批移动的行数，以及归档间隔（秒，0 表示不在进程内定时归档）
+    BORROW_ARCHIVE_AFTER_DAYS = int(os.environ.get('BORROW_ARCHIVE_AFTER_DAYS', 180))
+    BORROW_ARCHIVE_BATCH_SIZE = int(os.environ.get('BORROW_ARCHIVE_BATCH_SIZE', 1000))
+    BORROW_ARCHIVE_INTERVAL = int(os.environ.get('BORROW_ARCHIVE_INTERVAL', 3600))
+    
+    # 只读副本：SQLALCHEMY_BINDS 中存在 REPLICA_BIND 时，REPLICA_BLUEPRINTS 中蓝图的
+    # GET 请求读副本；客户端自己的写操作提交后 REPLICA_STICKY_SECONDS 秒内仍读主库。
+    # 本地可用另一个 SQLite 文件充当副本，由 flask sync-replica 或每隔
+    # REPLICA_SYNC_INTERVAL 秒（0 表示不在进程内定时复制）从主库整体复制
+    REPLICA_BIND = 'replica'
+    SQLALCHEMY_BINDS = {REPLICA_BIND: os.environ['REPLICA_DATABASE_URL']} \
+        if os.environ.get('REPLICA_DATABASE_URL') else {}
+    REPLICA_BLUEPRINTS = ('book', 'borrow', 'user')
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    REPLICA_SYNC_INTERVAL = int(os.environ.get('REPLICA_SYNC_INTERVAL', 0))
+    
+    # ASGI 模式（asgi.py）：异步读接口的数据库连接串，为空时按 SQLALCHEMY_DATABASE_URI
+    # 推导异步驱动；同步接口在线程池中执行，ASGI_SYNC_WORKERS 为线程数
+    ASYNC_DATABASE_URI = os.environ.get('ASYNC_DATABASE_URL')
+    ASGI_SYNC_WORKERS = int(os.environ.get('ASGI_SYNC_WORKERS', 16))
+    
+    # 请求与 SQL 指标，由 /metrics 以 Prometheus 文本格式输出；
+    # 设置 METRICS_TOKEN 后抓取时需携带 Authorization: Bearer <token>
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # 图书增量同步（/api/books/changes）：单次返回的最多条数、只返回多少秒之前的变更
+    # （须大于最长的写事务耗时），以及删除记录的保留天数和清理间隔（秒，0 表示不在
+    # 进程内定时清理）；水位早于保留天数的客户端需全量重建
+    DELTA_SYNC_LIMIT = int(os.environ.get('DELTA_SYNC_LIMIT', 1000))
+    DELTA_SYNC_LAG = float(os.environ.get('DELTA_SYNC_LAG', 5))
+    BOOK_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('BOOK_TOMBSTONE_RETENTION_DAYS', 30))
+    TOMBSTONE_PURGE_INTERVAL = int(os.environ.get('TOMBSTONE_PURGE_INTERVAL', 86400))
+    
+    # 变更事件流（/api/events，仅 ASGI 模式）：每个连接缓冲的事件数、断线重连可补发的
+    # 历史事件数、每个进程的同时连接数上限、保活间隔和单次连接时长（秒）
+    EVENTS_BUFFER_SIZE = int(os.environ.get('EVENTS_BUFFER_SIZE', 100))
+    EVENTS_HISTORY = int(os.environ.get('EVENTS_HISTORY', 256))
+    EVENTS_MAX_CLIENTS = int(os.environ.get('EVENTS_MAX_CLIENTS', 100))
+    EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', 15))
+    EVENTS_STREAM_LIFETIME = float(os.environ.get('EVENTS_STREAM_LIFETIME', 300))
+    
+    # JSON 编码：auto（安装了 orjson 时使用 orjson）、json、orjson，见 app/utils/json_provider.py
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER') or 'auto'
+    
+    # 响应压缩：按优先顺序排列的编码（br 需要安装 brotli，为空表示关闭）、
+    # 压缩的最小响应体（字节）以及 gzip 压缩级别和 brotli 质量
+    COMPRESS_ALGORITHMS = os.environ.get('COMPRESS_ALGORITHMS', 'br,gzip')
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+    
+    # SQL 预算检查（见 app/utils/query_budget.py）：raise 超出即抛异常，log 记录警告，
+    # off 关闭；QUERY_BUDGET_REPEATS 为同一形状语句在一个请求内的重复次数上限
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE') or 'off'
+    QUERY_BUDGET_REPEATS = int(os.environ.get('QUERY_BUDGET_REPEATS', 3))
 
 
 class DevelopmentConfig(Config):
@@ -18,6 +144,7 @@ class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'library.db')
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE') or 'log'
 
 
 class ProductionConfig(Config):
@@ -25,12 +152,32 @@ class ProductionConfig(Config):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'library_prod.db')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    AUTO_INIT_DB = os.environ.get('AUTO_INIT_DB', 'false').lower() in ('1', 'true', 'yes')
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    
+    # WAL 模式下读写互不阻塞；synchronous=NORMAL 在 WAL 下仅在检查点时同步磁盘
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,  # 毫秒
+        'cache_size': -64000,  # 负数单位为 KiB，即 64 MiB
+        'mmap_size': 268435456,  # 256 MiB
+        'temp_store': 'MEMORY'
+    }
 
 
 class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    STATS_RECONCILE_INTERVAL = 0
+    OVERDUE_SWEEP_INTERVAL = 0
+    TOMBSTONE_PURGE_INTERVAL = 0
+    BORROW_ARCHIVE_INTERVAL = 0
+    REPLICA_SYNC_INTERVAL = 0
+    PASSWORD_HASH_EXECUTOR = 'none'
+    QUERY_BUDGET_MODE = 'raise'
 
 
 config = {
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+import pytest
+from app import create_app, db
+from app.models import Book, BorrowRecord, StatCounter, User
+from app.utils.bootstrap import DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from config import config, TestingConfig
+
+
+@pytest.fixture
+def app():
+    """测试配置的应用（内存数据库，QUERY_BUDGET_MODE=raise）"""
+    app = create_app('testing')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def make_app():
+    """按测试配置加若干覆盖项创建应用，如 make_app(SQLALCHEMY_DATABASE_URI=...)"""
+    apps = []
+
+    def factory(**overrides):
+        name = f'testing-{len(apps)}'
+        config[name] = type('OverriddenTestingConfig', (TestingConfig,), overrides)
+        try:
+            app = create_app(name)
+        finally:
+            del config[name]
+        apps.append(app)
+        return app
+
+    yield factory
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+def login(client, username=DEFAULT_ADMIN_USERNAME, password=DEFAULT_ADMIN_PASSWORD):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def client(app):
+    """已登录默认管理员账户的测试客户端"""
+    return login(app.test_client())
+
+
+def seed_borrows(app, count, users=5):
+    """新增 users 个读者和 count 条借阅记录（每 users 条记录共用一本图书），返回 (用户 ID, 图书 ID)
+
+    偶数记录已归还，其余未归还；每三条中有一条已过应还日期并被标记为逾期。
+    可重复调用，每次新增的读者和图书互不重复。
+    """
+    now = datetime.utcnow()
+    with app.app_context():
+        offset = db.session.query(db.func.count(User.id)).scalar()
+        readers = [
+            User(username=f'reader{offset + i}', name=f'读者{offset + i}', password_hash='-')
+            for i in range(users)
+        ]
+        books = [
+            Book(title=f'图书{offset + i}', author='作者', isbn=f'T{offset:05d}{i:05d}', quantity=users, available=users)
+            for i in range((count + users - 1) // users)
+        ]
+        db.session.add_all(readers + books)
+        db.session.flush()
+        for i in range(count):
+            returned = i % 2 == 0
+            db.session.add(BorrowRecord(
+                user_id=readers[i % users].id,
+                book_id=books[i // users].id,
+                borrow_date=now - timedelta(days=40),
+                due_date=now - timedelta(days=10) if i % 3 == 0 else now + timedelta(days=10),
+                return_date=now - timedelta(days=1) if returned else None,
+                status='returned' if returned else 'borrowed'
+            ))
+        db.session.commit()
+        BorrowRecord.sweep_overdue()
+        StatCounter.reconcile()
+        return readers[0].id, books[0].id
@@ -0,0 +1,78 @@
+import json
+from app import db
+from app.models import BorrowRecord
+from app.models.borrow import borrow_records_archive
+from conftest import login, seed_borrows
+
+
+def archived_ids(app):
+    with app.app_context():
+        return [row_id for (row_id,) in db.session.execute(db.select(borrow_records_archive.c.id).order_by('id'))]
+
+
+def test_archive_moves_old_returned_records(app):
+    seed_borrows(app, 10)
+    with app.app_context():
+        returned = [record.id for record in BorrowRecord.query.filter_by(status='returned').order_by(BorrowRecord.id)]
+        assert BorrowRecord.archive_returned(2) == 0
+        assert BorrowRecord.archive_returned(0, batch_size=2) == 5
+        assert BorrowRecord.archive_returned(0) == 0
+        assert BorrowRecord.query.count() == 5
+        assert BorrowRecord.query.filter_by(status='returned').count() == 0
+    assert archived_ids(app) == returned
+
+
+def test_archive_keeps_record_with_max_id(app):
+    seed_borrows(app, 9)
+    with app.app_context():
+        last_id = db.session.scalar(db.select(db.func.max(BorrowRecord.id)))
+        assert db.session.get(BorrowRecord, last_id).status == 'returned'
+        assert BorrowRecord.archive_returned(0) == 4
+        assert db.session.get(BorrowRecord, last_id) is not None
+    assert last_id not in archived_ids(app)
+
+
+def test_archive_command(app):
+    seed_borrows(app, 10)
+    result = app.test_cli_runner().invoke(args=['archive-borrows', '--days', '0'])
+    assert result.exit_code == 0
+    assert '归档借阅记录 5 条' in result.output
+
+
+def test_detail_falls_back_to_archive(app, client):
+    seed_borrows(app, 10)
+    with app.app_context():
+        BorrowRecord.archive_returned(0)
+    record_id = archived_ids(app)[0]
+
+    record = client.get(f'/api/borrows/{record_id}').get_json()['record']
+    assert record['status'] == 'returned'
+    assert record['user']['username'] and record['book']['title']
+    record = client.get(f'/api/borrows/{record_id}?fields=return_date,book.isbn').get_json()['record']
+    assert list(record) == ['id', 'return_date', 'book'] and list(record['book']) == ['id', 'isbn']
+    assert client.get('/api/borrows/99999').status_code == 404
+
+    # 读者不能查看他人的归档记录
+    reader = app.test_client()
+    reader.post('/api/auth/register', json={'username': 'newreader', 'password': 'secret123', 'name': '新读者'})
+    login(reader, 'newreader', 'secret123')
+    assert reader.get(f'/api/borrows/{record_id}').status_code == 403
+
+
+def test_history_lists_include_archive(app, client):
+    user_id, book_id = seed_borrows(app, 10)
+    with app.app_context():
+        BorrowRecord.archive_returned(0)
+
+    assert client.get('/api/borrows').get_json()['total'] == 5
+    assert client.get('/api/borrows?status=returned').get_json()['total'] == 0
+    assert client.get('/api/borrows?history=true').get_json()['total'] == 10
+    assert client.get('/api/borrows?history=true&status=returned').get_json()['total'] == 5
+    assert client.get('/api/borrows?history=true&status=borrowed').get_json()['total'] == 5
+
+    records = client.get('/api/borrows?history=true&per_page=100').get_json()['records']
+    assert len({record['id'] for record in records}) == 10
+    assert all(record['user'] and record['book'] for record in records)
+
+    lines = client.get('/api/borrows/export?format=ndjson').get_data(as_text=True).splitlines()
+    assert len([json.loads(line) for line in lines]) == 10
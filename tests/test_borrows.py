@@ -0,0 +1,195 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app import db
+from app.models import Book, BorrowRecord, StatCounter, User
+from conftest import login
+
+
+def create_reader(app, username='reader', active_loans=0):
+    with app.app_context():
+        user = User(username=username, name=username, password_hash='-', active_loans=active_loans)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def create_books(app, count, quantity=1):
+    with app.app_context():
+        books = [
+            Book(title=f'图书{i}', author='作者', isbn=f'B{i:05d}', quantity=quantity, available=quantity)
+            for i in range(count)
+        ]
+        db.session.add_all(books)
+        db.session.commit()
+        return [book.id for book in books]
+
+
+def drift_active_loans(app, user_id, value):
+    """模拟在借数量计数出现偏差"""
+    with app.app_context():
+        db.session.execute(db.update(User).where(User.id == user_id).values(active_loans=value))
+        db.session.commit()
+
+
+def test_duplicate_loan_rejected_when_counter_drifted(app, client):
+    user_id = create_reader(app)
+    book_id, = create_books(app, 1, quantity=2)
+    assert client.post('/api/borrows', json={'user_id': user_id, 'book_id': book_id}).status_code == 201
+    drift_active_loans(app, user_id, 0)
+
+    response = client.post('/api/borrows', json={'user_id': user_id, 'book_id': book_id})
+    assert response.status_code == 400
+    response = client.post('/api/borrows/batch', json={'user_id': user_id, 'book_ids': [book_id]})
+    assert response.status_code == 400
+    assert response.get_json()['results'][0]['message'] == '该用户已借阅此书且未归还'
+    with app.app_context():
+        assert BorrowRecord.query.filter_by(user_id=user_id, status='borrowed').count() == 1
+
+
+def test_delete_user_with_open_loan_rejected_when_counter_drifted(app, client):
+    user_id = create_reader(app)
+    book_id, = create_books(app, 1)
+    client.post('/api/borrows', json={'user_id': user_id, 'book_id': book_id})
+    drift_active_loans(app, user_id, 0)
+
+    assert client.delete(f'/api/users/{user_id}').status_code == 400
+    with app.app_context():
+        assert db.session.get(User, user_id) is not None
+
+
+def test_active_loans_never_negative(app, client):
+    user_id = create_reader(app)
+    book_id, = create_books(app, 1)
+    record_id = client.post('/api/borrows', json={'user_id': user_id, 'book_id': book_id}).get_json()['record']['id']
+    drift_active_loans(app, user_id, 0)
+
+    assert client.put(f'/api/borrows/{record_id}/return').status_code == 200
+    with app.app_context():
+        assert User.adjust_active_loans(user_id, -1) is False
+        assert db.session.get(User, user_id).active_loans == 0
+
+
+def test_set_quantity_uses_current_stock(app):
+    book_id, = create_books(app, 1, quantity=3)
+    with app.app_context():
+        book = db.session.get(Book, book_id)
+        # 读取之后另一个请求借出一本
+        db.session.execute(db.update(Book).where(Book.id == book_id).values(available=Book.available - 1))
+        assert book.quantity == 3
+        assert book.set_quantity(5)
+        db.session.commit()
+        assert (book.quantity, book.available) == (5, 4)
+        assert not book.set_quantity(0)
+
+
+def concurrently(app, requests, workers=8):
+    """每个线程使用各自登录的客户端并发发送请求，返回状态码列表"""
+    local = threading.local()
+
+    def send(request):
+        if not hasattr(local, 'client'):
+            local.client = login(app.test_client())
+        method, url, body = request
+        return local.client.open(url, method=method, json=body).status_code
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(send, requests))
+
+
+def test_concurrent_borrow_of_last_copy(make_app, tmp_path):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "library.db"}')
+    book_id, = create_books(app, 1, quantity=1)
+    user_ids = [create_reader(app, f'reader{i}') for i in range(8)]
+
+    statuses = concurrently(app, [('POST', '/api/borrows', {'user_id': user_id, 'book_id': book_id}) for user_id in user_ids])
+    assert sorted(statuses) == [201] + [400] * 7
+    with app.app_context():
+        assert db.session.get(Book, book_id).available == 0
+        assert BorrowRecord.query.filter_by(book_id=book_id, status='borrowed').count() == 1
+
+
+def test_concurrent_duplicate_borrow_and_return(make_app, tmp_path):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "library.db"}')
+    book_id, = create_books(app, 1, quantity=5)
+    user_id = create_reader(app)
+
+    statuses = concurrently(app, [('POST', '/api/borrows', {'user_id': user_id, 'book_id': book_id})] * 8)
+    assert sorted(statuses) == [201] + [400] * 7
+
+    with app.app_context():
+        record_id = BorrowRecord.query.filter_by(user_id=user_id, status='borrowed').one().id
+    statuses = concurrently(app, [('PUT', f'/api/borrows/{record_id}/return', None)] * 8)
+    assert sorted(statuses) == [200] + [400] * 7
+    with app.app_context():
+        assert db.session.get(Book, book_id).available == 5
+        assert db.session.get(User, user_id).active_loans == 0
+        assert StatCounter.value_of(StatCounter.ACTIVE_BORROWS) == 0
+
+
+def test_batch_borrow_reports_each_book(app, client):
+    user_id = create_reader(app)
+    available, out_of_stock, borrowed = create_books(app, 3)
+    client.post('/api/borrows', json={'user_id': create_reader(app, 'other'), 'book_id': out_of_stock})
+    client.post('/api/borrows', json={'user_id': user_id, 'book_id': borrowed})
+
+    response = client.post('/api/borrows/batch', json={
+        'user_id': user_id, 'book_ids': [borrowed, 9999, available, out_of_stock, available]
+    })
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['succeeded'], body['failed']) == (1, 4)
+    assert [(r['book_id'], r['message']) for r in body['results']] == [
+        (borrowed, '该用户已借阅此书且未归还'),
+        (9999, '图书不存在'),
+        (available, '借阅成功'),
+        (out_of_stock, '该图书暂无库存'),
+        (available, '图书ID重复'),
+    ]
+    assert body['results'][2]['record']['book_id'] == available
+    with app.app_context():
+        assert db.session.get(User, user_id).active_loans == 2
+        assert db.session.get(Book, available).available == 0
+
+
+def test_batch_borrow_respects_max_active_loans(app, client):
+    app.config['MAX_ACTIVE_LOANS'] = 3
+    user_id = create_reader(app)
+    book_ids = create_books(app, 5)
+    client.post('/api/borrows', json={'user_id': user_id, 'book_id': book_ids[0]})
+
+    response = client.post('/api/borrows/batch', json={'user_id': user_id, 'book_ids': book_ids[:0:-1]})
+    assert response.status_code == 201
+    results = {r['book_id']: r['message'] for r in response.get_json()['results']}
+    # 名额不足时按图书 ID 升序办理
+    assert results == {
+        book_ids[1]: '借阅成功',
+        book_ids[2]: '借阅成功',
+        book_ids[3]: '该用户在借数量已达上限(3本)',
+        book_ids[4]: '该用户在借数量已达上限(3本)',
+    }
+    with app.app_context():
+        assert db.session.get(User, user_id).active_loans == 3
+        assert [db.session.get(Book, book_id).available for book_id in book_ids] == [0, 0, 0, 1, 1]
+
+    response = client.post('/api/borrows/batch', json={'user_id': user_id, 'book_ids': [book_ids[4]]})
+    assert response.status_code == 400
+    assert client.post('/api/borrows', json={'user_id': user_id, 'book_id': book_ids[4]}).status_code == 400
+    with app.app_context():
+        assert db.session.get(Book, book_ids[4]).available == 1
+
+
+def test_batch_borrow_rejects_non_integer_ids(client):
+    response = client.post('/api/borrows/batch', json={'user_id': 1, 'book_ids': [1, '2']})
+    assert response.status_code == 400
+
+
+def test_batch_borrow_locks_books_in_id_order(app, client, monkeypatch):
+    """库存按图书 ID 升序扣减，与请求中的顺序无关"""
+    user_id = create_reader(app)
+    book_ids = create_books(app, 4, quantity=2)
+    locked = []
+    borrow_one = Book.borrow_one
+    monkeypatch.setattr(Book, 'borrow_one', lambda book: locked.append(book.id) or borrow_one(book))
+
+    client.post('/api/borrows/batch', json={'user_id': user_id, 'book_ids': book_ids[::-1] + book_ids[:1]})
+    assert locked == sorted(book_ids)
@@ -0,0 +1,83 @@
+from app import db
+from app.models import Book, StatCounter
+from app.utils.query_budget import query_budget
+from conftest import seed_borrows
+
+
+def test_if_none_match_returns_304_without_queries(app, client):
+    _, book_id = seed_borrows(app, 5)
+    response = client.get(f'/api/books/{book_id}')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    with app.app_context(), query_budget(None, repeats=0) as statements:
+        response = client.get(f'/api/books/{book_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert statements == []
+
+
+def test_query_parameter_order_does_not_change_etag(client):
+    first = client.get('/api/books?page=1&per_page=5').headers['ETag']
+    assert client.get('/api/books?per_page=5&page=1').headers['ETag'] == first
+    assert client.get('/api/books?per_page=6&page=1').headers['ETag'] != first
+
+
+def test_book_update_invalidates_cached_responses(client):
+    book_id = client.post('/api/books', json={'title': '旧书名', 'author': '作者', 'isbn': 'C-1'}).get_json()['book']['id']
+    response = client.get(f'/api/books/{book_id}')
+    etag = response.headers['ETag']
+
+    client.put(f'/api/books/{book_id}', json={'title': '新书名'})
+    response = client.get(f'/api/books/{book_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['book']['title'] == '新书名'
+    assert client.get('/api/books/search?keyword=新书名').get_json()['total'] == 1
+
+
+def test_borrow_and_return_invalidate_stock(app, client):
+    user_id, book_id = seed_borrows(app, 5)
+    before = client.get(f'/api/books/{book_id}')
+    available = before.get_json()['book']['available']
+
+    record = client.post('/api/borrows', json={'user_id': user_id, 'book_id': book_id}).get_json()['record']
+    response = client.get(f'/api/books/{book_id}', headers={'If-None-Match': before.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()['book']['available'] == available - 1
+
+    client.put(f'/api/borrows/{record["id"]}/return')
+    assert client.get(f'/api/books/{book_id}').get_json()['book']['available'] == available
+
+
+def test_failed_write_keeps_etag(client):
+    client.post('/api/books', json={'title': '图书', 'author': '作者', 'isbn': 'C-1'})
+    etag = client.get('/api/books').headers['ETag']
+    assert client.post('/api/books', json={'title': '图书', 'author': '作者', 'isbn': 'C-1'}).status_code == 400
+    assert client.get('/api/books', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_generation_bumped_by_another_process(make_app):
+    app = make_app(CATALOGUE_GENERATION_POLL=0)
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    etag = client.get('/api/books').headers['ETag']
+    assert client.get('/api/books', headers={'If-None-Match': etag}).status_code == 304
+
+    # 其他进程提交的目录变更：只递增数据库中的版本号，本进程的本地缓存未被失效
+    with app.app_context():
+        db.session.add(Book(title='其他进程', author='作者', isbn='C-2'))
+        StatCounter.increment(StatCounter.CATALOGUE_GENERATION)
+        db.session.commit()
+    response = client.get('/api/books', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 1
+
+
+def test_compressed_response_uses_weak_etag(app, client):
+    seed_borrows(app, 50)
+    response = client.get('/api/books?per_page=50', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    response = client.get('/api/books?per_page=50', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
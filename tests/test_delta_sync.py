@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import Book
+from app.models.book import BookTombstone
+
+
+def changes(client, since=None, **params):
+    if since is not None:
+        params['since'] = since
+    response = client.get('/api/books/changes', query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def create_book(client, isbn):
+    return client.post('/api/books', json={'title': f'图书{isbn}', 'author': '作者', 'isbn': isbn}).get_json()['book']['id']
+
+
+def test_changes_after_watermark(app, client):
+    app.config['DELTA_SYNC_LAG'] = 0
+    kept, updated, deleted = [create_book(client, f'D-{i}') for i in range(3)]
+    full = changes(client)
+    assert full['reset'] is True
+    assert {book['id'] for book in full['books']} == {kept, updated, deleted}
+
+    created = create_book(client, 'D-3')
+    client.put(f'/api/books/{updated}', json={'title': '新书名'})
+    client.delete(f'/api/books/{deleted}')
+    delta = changes(client, full['watermark'])
+    assert delta['reset'] is False
+    assert sorted(book['id'] for book in delta['books']) == sorted([created, updated])
+    assert delta['deleted'] == [deleted]
+
+    assert changes(client, delta['watermark'])['books'] == []
+
+
+def test_changes_are_paged_by_limit(app, client):
+    app.config['DELTA_SYNC_LAG'] = 0
+    book_ids = [create_book(client, f'P-{i}') for i in range(5)]
+    client.delete(f'/api/books/{book_ids[1]}')
+
+    seen, deleted, since = [], [], None
+    while True:
+        page = changes(client, since, limit=2)
+        assert len(page['books']) + len(page['deleted']) <= 2
+        seen += [book['id'] for book in page['books']]
+        deleted += page['deleted']
+        since = page['watermark']
+        if not page['has_more']:
+            break
+    assert sorted(seen) == [book_ids[0]] + book_ids[2:]
+    assert deleted == [book_ids[1]]
+
+
+def test_recent_changes_held_back_by_lag(client):
+    # 默认留出 DELTA_SYNC_LAG 秒，刚提交的变更下次同步才返回
+    create_book(client, 'L-1')
+    assert changes(client)['books'] == []
+
+
+def test_reused_id_reported_as_latest_state(app, client):
+    app.config['DELTA_SYNC_LAG'] = 0
+    watermark = changes(client)['watermark']
+    book_id = create_book(client, 'R-1')
+    client.delete(f'/api/books/{book_id}')
+    assert create_book(client, 'R-2') == book_id
+
+    delta = changes(client, watermark)
+    assert [book['isbn'] for book in delta['books']] == ['R-2']
+    assert delta['deleted'] == []
+
+
+def test_watermark_older_than_retention_resets(app, client):
+    app.config['DELTA_SYNC_LAG'] = 0
+    book_id = create_book(client, 'T-1')
+    watermark = changes(client)['watermark']
+    client.delete(f'/api/books/{book_id}')
+
+    with app.app_context():
+        db.session.execute(db.update(BookTombstone).values(deleted_at=datetime.utcnow() - timedelta(days=31)))
+        db.session.commit()
+        assert BookTombstone.purge_expired(30) == 1
+
+    app.config['BOOK_TOMBSTONE_RETENTION_DAYS'] = 0
+    delta = changes(client, watermark)
+    assert delta['reset'] is True
+    assert delta['deleted'] == []
+    with app.app_context():
+        assert len(delta['books']) == Book.query.count()
+
+
+def test_invalid_watermark_rejected(client):
+    response = client.get('/api/books/changes?since=not-a-cursor')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == '无效的同步水位'
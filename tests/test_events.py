@@ -0,0 +1,92 @@
+import asyncio
+from app.asgi import AsgiApp
+from app.utils.async_db import async_db
+from app.utils.events import change_feed
+from conftest import login
+
+
+def session_cookie(app):
+    client = login(app.test_client())
+    return client.get_cookie('session').value
+
+
+async def open_stream(asgi_app, cookie, messages):
+    """向 ASGI 应用发起 GET /api/events，返回 (收到的消息队列, 断开连接的函数, 请求任务)"""
+    disconnect = asyncio.Event()
+    received = asyncio.Queue()
+
+    async def receive():
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        await received.put(message)
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': '/api/events', 'raw_path': b'/api/events',
+        'query_string': b'', 'root_path': '', 'server': ('localhost', 80), 'client': ('127.0.0.1', 1),
+        'headers': [(b'host', b'localhost'), (b'cookie', f'session={cookie}'.encode())],
+    }
+    task = asyncio.ensure_future(asgi_app(scope, receive, send))
+    return received, disconnect.set, task
+
+
+def test_wsgi_mode_does_not_serve_events(client):
+    assert client.get('/api/events').status_code == 503
+
+
+def test_asgi_stream_pushes_events(make_app, tmp_path):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "library.db"}')
+    async_db.init_app(app)
+    asgi_app = AsgiApp(app)
+    cookie = session_cookie(app)
+    messages = []
+
+    async def scenario():
+        received, disconnect, task = await open_stream(asgi_app, cookie, messages)
+        start = await asyncio.wait_for(received.get(), 5)
+        assert start['status'] == 200
+        assert (b'content-type', b'text/event-stream; charset=utf-8') in start['headers']
+        assert (await asyncio.wait_for(received.get(), 5))['body'] == b'retry: 3000\n\n'
+
+        # 由其他线程中的写接口发布
+        with app.app_context():
+            await asyncio.to_thread(change_feed.publish, 'inventory', {'id': 1})
+        body = (await asyncio.wait_for(received.get(), 5))['body']
+        assert b'event: inventory' in body and b'"id":1' in body.replace(b' ', b'')
+        # 连接期间没有占用同步线程池
+        assert not asgi_app.executor._threads
+
+        disconnect()
+        await asyncio.wait_for(task, 5)
+        await async_db.dispose()
+
+    asyncio.run(scenario())
+    assert not change_feed._subscribers
+    asgi_app.executor.shutdown()
+
+
+def test_asgi_stream_limits_clients(make_app, tmp_path):
+    app = make_app(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "library.db"}',
+        EVENTS_MAX_CLIENTS=1
+    )
+    async_db.init_app(app)
+    asgi_app = AsgiApp(app)
+    cookie = session_cookie(app)
+
+    async def scenario():
+        first, disconnect_first, first_task = await open_stream(asgi_app, cookie, [])
+        assert (await asyncio.wait_for(first.get(), 5))['status'] == 200
+        second, disconnect_second, second_task = await open_stream(asgi_app, cookie, [])
+        assert (await asyncio.wait_for(second.get(), 5))['status'] == 503
+        disconnect_second()
+        disconnect_first()
+        await asyncio.wait_for(asyncio.gather(first_task, second_task), 5)
+        await async_db.dispose()
+
+    asyncio.run(scenario())
+    assert not change_feed._subscribers
+    asgi_app.executor.shutdown()
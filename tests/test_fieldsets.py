@@ -0,0 +1,61 @@
+import pytest
+from app.utils.query_budget import query_budget
+from conftest import seed_borrows
+
+
+def test_book_fields(app, client):
+    _, book_id = seed_borrows(app, 5)
+    books = client.get('/api/books?fields=title,is_available').get_json()['books']
+    assert books and all(list(book) == ['id', 'title', 'is_available'] for book in books)
+
+    book = client.get(f'/api/books/{book_id}?fields=isbn').get_json()['book']
+    assert list(book) == ['id', 'isbn']
+    assert list(client.get(f'/api/books/{book_id}').get_json()['book']) == [
+        'id', 'title', 'author', 'isbn', 'quantity', 'available', 'is_available', 'created_at', 'updated_at'
+    ]
+    books = client.get('/api/books/search?keyword=图书&fields=author').get_json()['books']
+    assert books and all(list(book) == ['id', 'author'] for book in books)
+
+
+def test_borrow_fields_and_expand(app, client):
+    seed_borrows(app, 5)
+    records = client.get('/api/borrows?fields=status,book.title').get_json()['records']
+    assert records
+    for record in records:
+        assert list(record) == ['id', 'status', 'book']
+        assert list(record['book']) == ['id', 'title']
+
+    records = client.get('/api/borrows?fields=is_overdue&expand=user').get_json()['records']
+    assert all(list(record) == ['id', 'is_overdue', 'user'] and 'username' in record['user'] for record in records)
+
+    # 只指定 expand 时输出全部字段和指定的关联
+    record = client.get('/api/borrows?expand=book').get_json()['records'][0]
+    assert 'book' in record and 'user' not in record and 'due_date' in record
+
+    record_id = records[0]['id']
+    record = client.get(f'/api/borrows/{record_id}?fields=due_date,user.name').get_json()['record']
+    assert list(record) == ['id', 'due_date', 'user'] and list(record['user']) == ['id', 'name']
+
+
+def test_unexpanded_relations_are_not_loaded(app, client):
+    seed_borrows(app, 20)
+    client.get('/api/borrows?per_page=100')
+    with app.app_context(), query_budget(None, repeats=0) as statements:
+        client.get('/api/borrows?per_page=100&fields=status')
+    # 计数和记录各一条，不查询用户和图书
+    assert len(statements) == 2, statements
+    assert all('users' not in s and 'books' not in s for s in statements)
+
+
+@pytest.mark.parametrize('url, message', [
+    ('/api/books?fields=title,secret', '未知字段: secret'),
+    ('/api/books/search?keyword=图书&fields=password_hash', '未知字段: password_hash'),
+    ('/api/borrows?fields=book.nope', '未知字段: book.nope'),
+    ('/api/borrows?expand=librarian', '不能展开: librarian'),
+    ('/api/borrows?fields=user.password_hash', '未知字段: user.password_hash'),
+    ('/api/books?fields=user.name', '不能展开: user'),
+])
+def test_unknown_fields_rejected(client, url, message):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == message
@@ -0,0 +1,96 @@
+import json
+from app import db
+from app.models import Book, StatCounter
+
+
+def post_import(client, body, content_type='application/x-ndjson', query=''):
+    return client.post(f'/api/books/import{query}', data=body, content_type=content_type)
+
+
+def ndjson(*rows):
+    return '\n'.join(row if isinstance(row, str) else json.dumps(row, ensure_ascii=False) for row in rows)
+
+
+def test_ndjson_reports_error_rows(app, client):
+    with app.app_context():
+        db.session.add(Book(title='已有', author='作者', isbn='I-EXISTING'))
+        db.session.commit()
+
+    response = post_import(client, ndjson(
+        {'title': '图书一', 'author': '作者', 'isbn': 'I-1', 'quantity': 3},
+        '{"title": "缺右括号"',
+        '',
+        '[1, 2]',
+        {'title': '', 'author': '作者', 'isbn': 'I-2'},
+        {'title': '图书三', 'author': '作者', 'isbn': 'I-3', 'quantity': 'x'},
+        {'title': '图书四', 'author': '作者', 'isbn': 'I-4', 'quantity': -1},
+        {'title': '图书五', 'author': '作者', 'isbn': 'I-EXISTING'},
+        {'title': '图书六', 'author': '作者', 'isbn': 'I-1'},
+        {'title': '  图书七 ', 'author': '作者', 'isbn': ' I-7 '},
+    ))
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['total'], body['imported'], body['failed']) == (9, 2, 7)
+    assert [(error['row'], error['message']) for error in body['errors']] == [
+        (2, 'JSON格式错误'),
+        (4, '每行必须是JSON对象'),
+        (5, '书名、作者和ISBN不能为空'),
+        (6, '数量必须为整数'),
+        (7, '数量不能为负数'),
+        (8, 'ISBN已存在'),
+        (9, 'ISBN已存在'),
+    ]
+    assert body['errors'][-1]['isbn'] == 'I-1'
+
+    with app.app_context():
+        book = Book.query.filter_by(isbn='I-7').one()
+        assert (book.title, book.quantity, book.available) == ('图书七', 1, 1)
+        assert Book.query.filter_by(isbn='I-1').one().available == 3
+        # 直接写入的已有图书未计入计数器
+        assert StatCounter.value_of(StatCounter.BOOKS) == 2
+
+
+def test_csv_import(app, client):
+    body = '﻿title,author,isbn,quantity\n图书一,作者,C-1,2\n图书二,,C-2,1\n"图书,三",作者,C-3,\n'
+    response = post_import(client, body.encode('utf-8'), content_type='text/csv')
+    assert response.status_code == 200
+    result = response.get_json()
+    assert (result['total'], result['imported']) == (3, 2)
+    assert result['errors'] == [{'row': 2, 'isbn': 'C-2', 'message': '书名、作者和ISBN不能为空'}]
+    with app.app_context():
+        assert Book.query.filter_by(isbn='C-3').one().title == '图书,三'
+
+
+def test_duplicates_across_chunks(app, client):
+    app.config['BOOK_IMPORT_CHUNK_SIZE'] = 2
+    rows = [{'title': f'图书{i}', 'author': '作者', 'isbn': f'K-{i % 3}'} for i in range(7)]
+    result = post_import(client, ndjson(*rows)).get_json()
+    assert (result['imported'], result['failed']) == (3, 4)
+    assert [error['row'] for error in result['errors']] == [4, 5, 6, 7]
+    with app.app_context():
+        assert Book.query.filter(Book.isbn.like('K-%')).count() == 3
+        assert StatCounter.value_of(StatCounter.BOOKS) == 3
+
+
+def test_invalid_encoding_keeps_committed_chunks(app, client):
+    app.config['BOOK_IMPORT_CHUNK_SIZE'] = 2
+    # 请求体按块解码，坏字节放在若干块之后，之前已提交的批次保留
+    good = ndjson(*[{'title': f'图书{i}', 'author': '作者', 'isbn': f'E-{i}'} for i in range(1000)])
+    response = post_import(client, good.encode() + b'\n\xff\xfe\n')
+    assert response.status_code == 400
+    imported = response.get_json()['imported']
+    assert 0 < imported < 1000
+    with app.app_context():
+        assert Book.query.filter(Book.isbn.like('E-%')).count() == imported
+
+
+def test_unknown_format_rejected(client):
+    response = post_import(client, 'x', query='?format=xlsx')
+    assert response.status_code == 400
+
+
+def test_import_requires_admin(app):
+    client = app.test_client()
+    client.post('/api/auth/register', json={'username': 'reader', 'password': 'secret123', 'name': '读者'})
+    client.post('/api/auth/login', json={'username': 'reader', 'password': 'secret123'})
+    assert post_import(client, ndjson({'title': '图书', 'author': '作者', 'isbn': 'A-1'})).status_code == 403
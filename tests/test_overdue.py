@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import BorrowRecord, StatCounter
+from conftest import seed_borrows
+
+
+def overdue_counter(app):
+    with app.app_context():
+        return StatCounter.value_of(StatCounter.OVERDUE_BORROWS)
+
+
+def test_sweep_marks_each_record_once(app):
+    seed_borrows(app, 12)
+    with app.app_context():
+        marked = BorrowRecord.query.filter_by(status='borrowed', overdue=True).count()
+        assert marked == StatCounter.value_of(StatCounter.OVERDUE_BORROWS) == 2
+        assert BorrowRecord.sweep_overdue() == 0
+
+        # 借阅到期后下一次扫描才标记
+        record = BorrowRecord.query.filter_by(status='borrowed', overdue=False).first()
+        assert BorrowRecord.sweep_overdue(now=record.due_date + timedelta(seconds=1)) >= 1
+        assert db.session.get(BorrowRecord, record.id).overdue
+        assert StatCounter.value_of(StatCounter.OVERDUE_BORROWS) == \
+            BorrowRecord.query.filter_by(status='borrowed', overdue=True).count()
+
+
+def test_sweep_ignores_returned_records(app):
+    seed_borrows(app, 12)
+    with app.app_context():
+        assert BorrowRecord.sweep_overdue(now=datetime.utcnow() + timedelta(days=365)) == 4
+        assert BorrowRecord.query.filter_by(status='returned', overdue=True).count() == 0
+
+
+def test_overdue_list_and_counter_follow_returns(app, client):
+    seed_borrows(app, 12)
+    records = client.get('/api/borrows/overdue').get_json()['records']
+    assert len(records) == 2 and all(record['is_overdue'] for record in records)
+
+    client.put(f"/api/borrows/{records[0]['id']}/return")
+    assert overdue_counter(app) == 1
+    client.put('/api/borrows/batch/return', json={'record_ids': [records[1]['id']]})
+    assert overdue_counter(app) == 0
+    assert client.get('/api/borrows/overdue').get_json()['records'] == []
+    assert client.get('/api/stats').get_json()['stats']['overdue_borrows'] == 0
+
+
+def test_sweep_between_load_and_return_is_counted_back(app, client):
+    """归还请求读取记录之后、更新之前被扫描标记为逾期，归还时仍扣减逾期计数"""
+    seed_borrows(app, 12)
+    with app.app_context():
+        record = BorrowRecord.query.filter_by(status='borrowed', overdue=False).first()
+        record_id, due_date = record.id, record.due_date
+
+    with app.app_context():
+        record = db.session.get(BorrowRecord, record_id)
+        assert record.overdue is False
+        BorrowRecord.sweep_overdue(now=due_date + timedelta(seconds=1))
+        assert record.return_book()
+        assert BorrowRecord.clear_overdue([record]) == 1
+        StatCounter.increment(StatCounter.OVERDUE_BORROWS, -1)
+        db.session.commit()
+        assert StatCounter.value_of(StatCounter.OVERDUE_BORROWS) == \
+            BorrowRecord.query.filter_by(status='borrowed', overdue=True).count()
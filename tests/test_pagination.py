@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import Book
+from conftest import seed_borrows
+
+
+def create_books(app, count, created_at=None):
+    """新增 count 本图书；created_at 为空时每本相差一秒，否则全部相同"""
+    start = datetime(2024, 1, 1)
+    with app.app_context():
+        books = [
+            Book(title=f'图书{i}', author='作者', isbn=f'P{i:05d}', created_at=created_at or start + timedelta(seconds=i))
+            for i in range(count)
+        ]
+        db.session.add_all(books)
+        db.session.commit()
+        return [book.id for book in books]
+
+
+def walk(client, url, per_page):
+    """沿 next_cursor 翻完全部页面，返回各页的 ID 列表"""
+    pages = []
+    cursor = ''
+    while cursor is not None:
+        body = client.get(f'{url}?per_page={per_page}&cursor={cursor}').get_json()
+        key = 'books' if 'books' in body else 'records'
+        pages.append([item['id'] for item in body[key]])
+        assert body['has_more'] == (body['next_cursor'] is not None)
+        assert 'total' not in body
+        cursor = body['next_cursor']
+    return pages
+
+
+def test_cursor_walks_every_book_once(app, client):
+    book_ids = create_books(app, 23)
+    pages = walk(client, '/api/books', 5)
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert sum(pages, []) == book_ids[::-1]
+
+
+def test_cursor_breaks_ties_by_id(app, client):
+    book_ids = create_books(app, 12, created_at=datetime(2024, 1, 1))
+    assert sum(walk(client, '/api/books', 5), []) == book_ids[::-1]
+
+
+def test_cursor_is_stable_under_inserts(app, client):
+    book_ids = create_books(app, 10)
+    first = client.get('/api/books?per_page=4&cursor=').get_json()
+    # 翻页期间新增的图书排在最前，不会使后续页重复或遗漏
+    with app.app_context():
+        db.session.add(Book(title='新书', author='作者', isbn='P-NEW'))
+        db.session.commit()
+    second = client.get(f"/api/books?per_page=4&cursor={first['next_cursor']}").get_json()
+    assert [book['id'] for book in first['books'] + second['books']] == book_ids[::-1][:8]
+
+
+def test_cursor_with_total(app, client):
+    create_books(app, 7)
+    body = client.get('/api/books?per_page=3&cursor=&include_total=true').get_json()
+    assert body['total'] == 7 and len(body['books']) == 3 and body['has_more']
+    assert 'pages' not in body
+
+
+def test_page_numbers_still_supported(app, client):
+    book_ids = create_books(app, 7)
+    body = client.get('/api/books?page=2&per_page=3').get_json()
+    assert (body['total'], body['pages'], body['current_page']) == (7, 3, 2)
+    assert [book['id'] for book in body['books']] == book_ids[::-1][3:6]
+    assert 'next_cursor' not in body
+
+
+def test_borrow_cursor_walks_every_record_once(app, client):
+    seed_borrows(app, 17)
+    with app.app_context():
+        expected = [
+            record_id for (record_id,) in db.session.execute(
+                db.text('SELECT id FROM borrow_records ORDER BY borrow_date DESC, id DESC')
+            )
+        ]
+    assert sum(walk(client, '/api/borrows', 4), []) == expected
+
+
+def encode(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor!',
+    encode(5),
+    encode(['yesterday', 1]),
+    encode(['2024-01-01T00:00:00', 'abc']),
+    encode([None, 1]),
+    encode(['2024-01-01T00:00:00']),
+    base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+])
+@pytest.mark.parametrize('url', ['/api/books', '/api/borrows', '/api/borrows/overdue'])
+def test_bad_cursor_rejected(client, url, cursor):
+    response = client.get(f'{url}?cursor={cursor}')
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'message': '无效的游标'}
@@ -0,0 +1,31 @@
+import threading
+import time
+from app.utils.passwords import password_hasher
+
+
+def test_login_rejected_immediately_when_hash_slots_busy(make_app):
+    app = make_app(PASSWORD_HASH_EXECUTOR='thread', PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def occupy():
+        started.set()
+        release.wait(10)
+
+    # 唯一的哈希名额被占用
+    holder = threading.Thread(target=password_hasher._run, args=(occupy,))
+    holder.start()
+    try:
+        assert started.wait(5)
+        rejected = password_hasher.stats()['rejected']
+        begin = time.perf_counter()
+        response = app.test_client().post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+        assert response.status_code == 503
+        assert time.perf_counter() - begin < 1
+        assert password_hasher.stats()['rejected'] == rejected + 1
+    finally:
+        release.set()
+        holder.join()
+
+    response = app.test_client().post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
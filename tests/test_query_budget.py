@@ -0,0 +1,132 @@
+import pytest
+from app import db
+from app.models import Book, BorrowRecord
+from app.models.borrow import borrow_records_archive
+from app.models.user import user_cache
+from app.utils.http_cache import catalogue_generation
+from app.utils.query_budget import QueryBudgetExceeded, query_budget
+from conftest import seed_borrows
+
+
+def budgeted_endpoints(app):
+    return {
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if getattr(app.view_functions[rule.endpoint], 'query_budget', None) is not None
+    }
+
+
+def test_every_budgeted_route_stays_within_budget(app, client):
+    """测试配置下逐个请求声明了预算的接口（缓存均未命中），超出预算时 query_guard 直接抛出异常"""
+    user_id, book_id = seed_borrows(app, 30)
+    with app.app_context():
+        open_ids = [
+            record_id for (record_id,) in db.session.query(BorrowRecord.id)
+            .filter_by(status='borrowed').order_by(BorrowRecord.id)
+        ]
+    urls = app.url_map.bind('localhost')
+    hit = set()
+
+    def call(method, url, status, **kwargs):
+        # 身份缓存未命中、目录版本号需要重新读取时各多一条查询，也应在预算内
+        user_cache.clear()
+        catalogue_generation.invalidate()
+        response = client.open(url, method=method, **kwargs)
+        assert response.status_code == status, (method, url, response.get_data(as_text=True)[:200])
+        hit.add(urls.match(url.partition('?')[0], method=method)[0])
+        return response
+
+    # 认证
+    call('POST', '/api/auth/login', 200, json={'username': 'admin', 'password': 'admin123'})
+    call('GET', '/api/auth/me', 200)
+    call('POST', '/api/auth/register', 201, json={'username': 'newreader', 'password': 'secret123', 'name': '新读者'})
+
+    # 图书
+    call('GET', '/api/books?per_page=50', 200)
+    call('GET', '/api/books?per_page=50&cursor=', 200)
+    call('GET', f'/api/books/{book_id}', 200)
+    call('GET', '/api/books/search?keyword=图书', 200)
+    call('GET', '/api/books/changes', 200)
+    created = call('POST', '/api/books', 201, json={'title': '预算', 'author': '作者', 'isbn': 'BUDGET-1'})
+    new_book_id = created.get_json()['book']['id']
+    call('PUT', f'/api/books/{new_book_id}', 200, json={'title': '预算（修订）', 'quantity': 3})
+    call('POST', '/api/books/import', 200, data='\n'.join(
+        f'{{"title": "导入{i}", "author": "作者", "isbn": "IMPORT-{i}"}}' for i in range(20)
+    ), content_type='application/x-ndjson')
+    call('DELETE', f'/api/books/{new_book_id}', 200)
+
+    # 借阅
+    call('GET', '/api/borrows?per_page=100', 200)
+    call('GET', '/api/borrows?per_page=100&history=true', 200)
+    call('GET', f'/api/borrows/{open_ids[0]}', 200)
+    call('GET', f'/api/borrows/user/{user_id}', 200)
+    call('GET', f'/api/borrows/book/{book_id}', 200)
+    call('GET', '/api/borrows/overdue', 200)
+    call('GET', '/api/borrows/export', 200).close()
+    call('PUT', f'/api/borrows/{open_ids[0]}/return', 200)
+    call('PUT', '/api/borrows/batch/return', 200, json={'record_ids': open_ids[1:]})
+    with app.app_context():
+        BorrowRecord.archive_returned(0)
+        archived_id = db.session.scalar(db.select(db.func.min(borrow_records_archive.c.id)))
+    call('GET', f'/api/borrows/{archived_id}', 200)
+    call('POST', '/api/borrows', 201, json={'user_id': user_id, 'book_id': book_id})
+    with app.app_context():
+        imported_ids = [book_id for (book_id,) in db.session.query(Book.id).filter(Book.isbn.like('IMPORT-%'))]
+    call('POST', '/api/borrows/batch', 201, json={'user_id': user_id, 'book_ids': imported_ids})
+
+    # 用户
+    call('GET', '/api/users', 200)
+    call('GET', f'/api/users/{user_id}', 200)
+    call('GET', '/api/users/search?keyword=读者', 200)
+    created = call('POST', '/api/users', 201, json={'username': 'budget', 'password': 'secret123', 'name': '预算'})
+    new_user_id = created.get_json()['user']['id']
+    call('PUT', f'/api/users/{new_user_id}', 200, json={'name': '预算（修订）'})
+    call('DELETE', f'/api/users/{new_user_id}', 200)
+
+    # 统计、事件、文档与指标
+    call('GET', '/api/stats', 200)
+    call('GET', '/api/events', 503)
+    call('GET', '/api/openapi.json', 200)
+    call('GET', '/api/openapi.yaml', 200)
+    call('GET', '/api/docs/', 200)
+    call('GET', '/api/docs/swagger-ui.css', 200).close()
+    call('GET', '/metrics', 200)
+
+    # 修改密码和登出放在最后
+    call('POST', '/api/auth/change-password', 200, json={'old_password': 'admin123', 'new_password': 'admin456'})
+    call('POST', '/api/auth/logout', 200)
+
+    assert hit == budgeted_endpoints(app)
+
+
+def test_over_budget_view_raises(app):
+    @app.route('/test/over-budget')
+    @query_budget(1)
+    def over_budget():
+        for _ in range(3):
+            db.session.execute(db.text('SELECT 1'))
+        return 'ok'
+
+    with pytest.raises(QueryBudgetExceeded, match='执行 3 条 SQL，预算 1 条'):
+        app.test_client().get('/test/over-budget')
+
+
+def test_repeated_statements_raise(app):
+    @app.route('/test/repeats')
+    @query_budget(None)
+    def repeats():
+        for book_id in range(app.config['QUERY_BUDGET_REPEATS'] + 1):
+            db.session.execute(db.text('SELECT id FROM books WHERE id = :id'), {'id': book_id})
+        return 'ok'
+
+    with pytest.raises(QueryBudgetExceeded, match='同一语句执行'):
+        app.test_client().get('/test/repeats')
+
+
+def test_context_manager_raises(app, client):
+    seed_borrows(app, 10)
+    with app.app_context():
+        with query_budget(10):
+            client.get('/api/borrows')
+        with pytest.raises(QueryBudgetExceeded):
+            with query_budget(1):
+                client.get('/api/borrows')
@@ -0,0 +1,48 @@
+import pytest
+from app.utils.query_budget import query_budget
+from conftest import seed_borrows
+
+# 借阅记录列表和仪表盘使用的接口；借阅记录随关联的用户和图书一起输出
+ENDPOINTS = [
+    '/api/borrows?per_page=100',
+    '/api/borrows?per_page=100&history=true',
+    '/api/borrows?per_page=100&cursor=',
+    '/api/borrows/user/{user_id}?per_page=100',
+    '/api/borrows/book/{book_id}?per_page=100',
+    '/api/borrows/overdue?per_page=100',
+    '/api/borrows?page=1&per_page=5',
+    '/api/stats',
+]
+
+
+def count_statements(app, client, url):
+    """请求 url 并返回执行的 SQL 语句数"""
+    with app.app_context(), query_budget(None, repeats=0) as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+    return len(statements)
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_query_count_does_not_grow_with_rows(app, client, url):
+    # 第一批每位读者 2 条、每本书 3 条记录；第二批每位读者 6 条、每本书 15 条
+    user_id, book_id = seed_borrows(app, 6, users=3)
+    small_url = url.format(user_id=user_id, book_id=book_id)
+    # 预热：身份缓存等只在首次请求时查询
+    count_statements(app, client, small_url)
+    small = count_statements(app, client, small_url)
+
+    user_id, book_id = seed_borrows(app, 90, users=15)
+    assert count_statements(app, client, url.format(user_id=user_id, book_id=book_id)) == small
+
+
+def test_borrow_list_loads_relations_in_fixed_queries(app, client):
+    seed_borrows(app, 60)
+    client.get('/api/borrows?per_page=100')
+    with app.app_context(), query_budget(None, repeats=0) as statements:
+        records = client.get('/api/borrows?per_page=100').get_json()['records']
+
+    assert len(records) == 60
+    assert all(record['user'] and record['book'] for record in records)
+    # 计数、记录、用户、图书各一条
+    assert len(statements) == 4, statements
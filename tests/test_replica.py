@@ -0,0 +1,97 @@
+import pytest
+from app import db
+from app.models import Book
+from app.replica import replica_router, sync_sqlite_replica
+from app.utils.http_cache import catalogue_generation
+from conftest import login
+
+
+@pytest.fixture
+def replica_app(make_app, tmp_path):
+    """主库和副本均为 SQLite 文件的应用，副本已与主库同步"""
+    app = make_app(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "primary.db"}',
+        SQLALCHEMY_BINDS={'replica': f'sqlite:///{tmp_path / "replica.db"}'},
+    )
+    with app.app_context():
+        sync_sqlite_replica()
+    return app
+
+
+def add_book_to_primary(app, isbn):
+    with app.app_context():
+        book = Book(title='主库图书', author='作者', isbn=isbn)
+        db.session.add(book)
+        catalogue_generation.bump()
+        db.session.commit()
+        return book.id
+
+
+def expire_sticky(client):
+    with client.session_transaction() as session:
+        session.pop('_primary_until', None)
+
+
+def test_router_disabled_without_replica_bind(app):
+    assert not replica_router.enabled
+
+
+def test_reads_go_to_replica_until_synced(replica_app):
+    client = login(replica_app.test_client())
+    expire_sticky(client)
+    book_id = add_book_to_primary(replica_app, 'R-1')
+
+    assert client.get(f'/api/books/{book_id}').status_code == 404
+    assert client.get('/api/books').get_json()['total'] == 0
+
+    with replica_app.app_context():
+        sync_sqlite_replica()
+    assert client.get(f'/api/books/{book_id}').status_code == 200
+    assert client.get('/api/books').get_json()['total'] == 1
+
+
+def test_writes_go_to_primary_and_stick_reads(replica_app):
+    client = login(replica_app.test_client())
+    expire_sticky(client)
+    response = client.post('/api/books', json={'title': '新书', 'author': '作者', 'isbn': 'R-2'})
+    assert response.status_code == 201
+    book_id = response.get_json()['book']['id']
+    with client.session_transaction() as session:
+        assert '_primary_until' in session
+
+    # 提交后的时限内读主库，能读到自己刚写入的数据
+    assert client.get(f'/api/books/{book_id}').status_code == 200
+    with replica_app.app_context():
+        assert db.session.get(Book, book_id) is not None
+
+    # 其他客户端和时限过后读副本
+    other = login(replica_app.test_client())
+    expire_sticky(other)
+    assert other.get(f'/api/books/{book_id}').status_code == 404
+    expire_sticky(client)
+    assert client.get(f'/api/books/{book_id}').status_code == 404
+
+
+def test_expired_sticky_marker_removed(replica_app):
+    client = login(replica_app.test_client())
+    with client.session_transaction() as session:
+        session['_primary_until'] = 0
+    client.get('/api/books')
+    with client.session_transaction() as session:
+        assert '_primary_until' not in session
+
+
+def test_sync_replica_command(replica_app):
+    add_book_to_primary(replica_app, 'R-3')
+    result = replica_app.test_cli_runner().invoke(args=['sync-replica'])
+    assert result.exit_code == 0
+    with replica_app.app_context():
+        replica = db.engines['replica']
+        with replica.connect() as conn:
+            assert conn.execute(db.select(db.func.count()).select_from(Book.__table__)).scalar() == 1
+
+
+def test_sync_replica_command_requires_replica(app):
+    result = app.test_cli_runner().invoke(args=['sync-replica'])
+    assert result.exit_code != 0
+    assert '未配置只读副本' in result.output
@@ -0,0 +1,81 @@
+import pytest
+from app import db
+from app.models import Book
+from app.utils.query_budget import query_budget
+
+BOOKS = [
+    ('图书管理系统设计', '张三', '9787000000001'),
+    ('数据库系统概论', '李四', '9787000000002'),
+    ('Python Cookbook', 'David Beazley', '9787000000003'),
+    ('管理学原理', '张三丰', '9787000000004'),
+]
+
+
+@pytest.fixture
+def books(app):
+    with app.app_context():
+        books = [Book(title=title, author=author, isbn=isbn) for title, author, isbn in BOOKS]
+        db.session.add_all(books)
+        db.session.commit()
+        return {book.title: book.id for book in books}
+
+
+def search(app, client, query):
+    """返回 (匹配的书名集合, 执行的 SQL)"""
+    client.get(f'/api/books/search?{query}')
+    with app.app_context(), query_budget(None, repeats=0) as statements:
+        response = client.get(f'/api/books/search?{query}&per_page=50')
+    assert response.status_code == 200
+    return {book['title'] for book in response.get_json()['books']}, ' '.join(statements)
+
+
+def test_trigram_matches_substrings(app, client, books):
+    titles, sql = search(app, client, 'keyword=管理系')
+    assert titles == {'图书管理系统设计'}
+    assert 'MATCH' in sql and 'LIKE' not in sql
+
+    assert search(app, client, 'keyword=ookboo')[0] == {'Python Cookbook'}
+    assert search(app, client, 'keyword=cookbook')[0] == {'Python Cookbook'}
+    assert search(app, client, 'keyword=0000002')[0] == {'数据库系统概论'}
+
+
+def test_search_type_limits_columns(app, client, books):
+    assert search(app, client, 'keyword=张三丰&type=author')[0] == {'管理学原理'}
+    assert search(app, client, 'keyword=张三丰&type=title')[0] == set()
+    assert search(app, client, 'keyword=9787000000004&type=isbn')[0] == {'管理学原理'}
+
+
+def test_short_keyword_falls_back_to_like(app, client, books):
+    titles, sql = search(app, client, 'keyword=管理')
+    assert titles == {'图书管理系统设计', '管理学原理'}
+    assert 'LIKE' in sql and 'MATCH' not in sql
+
+
+def test_like_fallback_when_fulltext_unavailable(app, client, books):
+    app.extensions['fulltext'] = False
+    titles, sql = search(app, client, 'keyword=管理系')
+    assert titles == {'图书管理系统设计'}
+    assert 'LIKE' in sql and 'MATCH' not in sql
+
+
+def test_index_follows_writes(app, client, books):
+    book_id = books['数据库系统概论']
+    client.put(f'/api/books/{book_id}', json={'title': '分布式数据系统'})
+    assert search(app, client, 'keyword=分布式')[0] == {'分布式数据系统'}
+    assert search(app, client, 'keyword=系统概论')[0] == set()
+
+    client.delete(f'/api/books/{book_id}')
+    assert search(app, client, 'keyword=分布式')[0] == set()
+
+
+@pytest.mark.parametrize('keyword', ['"管理"系', 'AND OR', '张三*', 'title:管理'])
+def test_operators_are_matched_literally(app, client, books, keyword):
+    response = client.get('/api/books/search', query_string={'keyword': keyword})
+    assert response.status_code == 200
+    assert response.get_json()['books'] == []
+
+
+def test_user_search(app, client):
+    client.post('/api/users', json={'username': 'wangwu', 'password': 'secret123', 'name': '王五', 'phone': '13800138000'})
+    users = client.get('/api/users/search?keyword=0013800').get_json()['users']
+    assert [user['username'] for user in users] == ['wangwu']
@@ -0,0 +1,37 @@
+from app.routes import docs
+
+
+def test_swagger_ui_is_not_registered_at_startup(app):
+    assert 'swagger_ui' not in app.blueprints
+    client = app.test_client()
+    assert client.get('/api/docs').status_code == 308
+
+    page = client.get('/api/docs/')
+    assert page.status_code == 200 and page.mimetype == 'text/html'
+    html = page.get_data(as_text=True)
+    assert '<title>图书管理系统 API</title>' in html
+    assert '"url": "/api/openapi.yaml"' in html
+    asset = client.get('/api/docs/swagger-ui-bundle.js')
+    assert asset.status_code == 200
+    asset.close()
+    assert client.get('/api/docs/missing.js').status_code == 404
+    assert docs._swagger_ui is not None
+
+
+def test_jobs_start_only_when_scheduler_enabled(make_app):
+    disabled = make_app(SCHEDULER_ENABLED=False, OVERDUE_SWEEP_INTERVAL=300)
+    assert not disabled.extensions.get('periodic_jobs')
+
+    enabled = make_app(SCHEDULER_ENABLED=True, OVERDUE_SWEEP_INTERVAL=300, STATS_RECONCILE_INTERVAL=3600)
+    jobs = enabled.extensions['periodic_jobs']
+    try:
+        assert set(jobs) == {'sweep-overdue', 'reconcile-stats'}
+    finally:
+        for stop in jobs.values():
+            stop.set()
+
+
+def test_run_jobs_command_without_enabled_jobs(app):
+    result = app.test_cli_runner().invoke(args=['run-jobs'])
+    assert result.exit_code != 0
+    assert '没有启用的定时任务' in result.output
@@ -0,0 +1,54 @@
+from sqlalchemy import event
+from app import db
+from app.models import BorrowRecord, StatCounter
+from conftest import seed_borrows
+
+
+def test_stats_follow_borrow_and_return(app, client):
+    seed_borrows(app, 10)
+    stats = client.get('/api/stats').get_json()['stats']
+    assert stats['total_borrows'] == 10
+    assert stats['active_borrows'] == 5
+
+    with app.app_context():
+        record = BorrowRecord.query.filter_by(status='borrowed').first()
+        record_id, user_id = record.id, record.user_id
+    client.put(f'/api/borrows/{record_id}/return')
+    client.post('/api/borrows', json={'user_id': user_id, 'book_id': 1})
+    stats = client.get('/api/stats').get_json()['stats']
+    assert stats['total_borrows'] == 11
+    assert stats['active_borrows'] == 5
+
+
+def test_reconcile_corrects_drift_in_place(app):
+    seed_borrows(app, 10)
+    with app.app_context():
+        StatCounter.increment(StatCounter.BOOKS, 7)
+        db.session.query(StatCounter).filter_by(name=StatCounter.OVERDUE_BORROWS).delete()
+        db.session.commit()
+        expected = {name: db.session.scalar(db.select(query)) for name, query in StatCounter.count_all().items()}
+
+        drift = StatCounter.reconcile()
+        assert drift == {StatCounter.BOOKS: -7}
+        snapshot = StatCounter.snapshot()
+        assert {name: snapshot[name] for name in expected} == expected
+        assert StatCounter.reconcile() == {}
+
+
+def test_reconcile_writes_counts_in_single_statement(app):
+    """校准在 UPDATE 语句内统计，读取计数与写回之间没有可被并发 increment 插入的间隙"""
+    seed_borrows(app, 4)
+    with app.app_context():
+        StatCounter.increment(StatCounter.BORROWS, 3)
+        db.session.commit()
+        statements = []
+        engine = db.engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            StatCounter.reconcile()
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+    updates = [s for s in statements if s.lstrip().upper().startswith('UPDATE STAT_COUNTERS')]
+    assert updates and all('count(' in s.lower() for s in updates), updates
@@ -0,0 +1,81 @@
+import time
+from app import db
+from app.models import StatCounter, User
+from app.models.user import user_cache
+from app.utils.query_budget import query_budget
+from conftest import login
+
+
+def create_admin(app, client, username='admin2'):
+    response = client.post('/api/users', json={'username': username, 'password': 'secret123', 'name': username, 'role': 'admin'})
+    assert response.status_code == 201
+    return response.get_json()['user']['id'], login(app.test_client(), username, 'secret123')
+
+
+def change_in_other_process(app, user_id, **values):
+    """模拟其他进程修改用户：写库并递增版本号，但不清除本进程的身份缓存"""
+    with app.app_context():
+        if values:
+            db.session.execute(db.update(User).where(User.id == user_id).values(**values))
+        else:
+            db.session.execute(db.delete(User).where(User.id == user_id))
+        StatCounter.increment(StatCounter.USER_GENERATION)
+        db.session.commit()
+
+
+def test_cached_identity_skips_user_query(make_app):
+    app = make_app(USER_CACHE_POLL=60)
+    client = login(app.test_client())
+    client.get('/api/auth/me')
+    with app.app_context(), query_budget(None, repeats=0) as statements:
+        assert client.get('/api/auth/me').status_code == 200
+    # 只按需加载未缓存的在借数量等字段，不再查询身份
+    assert not any('users.username' in statement for statement in statements), statements
+
+
+def test_role_change_in_other_process_seen_after_poll(make_app):
+    app = make_app(USER_CACHE_POLL=0.2)
+    user_id, other = create_admin(app, login(app.test_client()))
+    assert other.get('/api/users').status_code == 200
+
+    change_in_other_process(app, user_id, role='user')
+    time.sleep(0.3)
+    assert other.get('/api/users').status_code == 403
+    assert other.get('/api/auth/me').get_json()['user']['role'] == 'user'
+
+
+def test_user_deleted_in_other_process_logged_out_after_poll(make_app):
+    app = make_app(USER_CACHE_POLL=0.2)
+    user_id, other = create_admin(app, login(app.test_client()))
+    assert other.get('/api/auth/me').status_code == 200
+
+    change_in_other_process(app, user_id)
+    time.sleep(0.3)
+    # 用户已不存在，按未登录处理（重定向到登录）
+    assert other.get('/api/auth/me').status_code == 302
+
+
+def test_generation_change_clears_whole_cache(make_app):
+    app = make_app(USER_CACHE_POLL=0.2)
+    client = login(app.test_client())
+    user_id, other = create_admin(app, client)
+    client.get('/api/auth/me')
+    other.get('/api/auth/me')
+    assert user_cache.stats()['size'] == 2
+
+    change_in_other_process(app, user_id, name='改名')
+    time.sleep(0.3)
+    client.get('/api/auth/me')
+    assert user_cache.stats()['size'] == 1
+
+
+def test_local_changes_bump_generation(app, client):
+    user_id, other = create_admin(app, client)
+    assert client.put(f'/api/users/{user_id}', json={'role': 'user'}).status_code == 200
+    # 本进程立即生效
+    assert other.get('/api/users').status_code == 403
+
+    other.post('/api/auth/change-password', json={'old_password': 'secret123', 'new_password': 'secret456'})
+    assert client.delete(f'/api/users/{user_id}').status_code == 200
+    with app.app_context():
+        assert StatCounter.value_of(StatCounter.USER_GENERATION) == 3